@@ -0,0 +1,96 @@
+"""
+Interleaves adds and deletes against a calendar store and checks that
+IDs stay unique and every delete removes exactly one event.
+
+Each operation is an add or a delete, chosen at random. A delete targets
+a live event or, some of the time, an already-deleted ID (which must
+report that nothing was found). A model of the live IDs is checked
+against the store at the end.
+
+Usage:
+    python benchmarks/bench_churn.py
+    python benchmarks/bench_churn.py --ops 100000 --backend sqlite
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import tempfile
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_agent import EventStore, SQLiteEventStore
+
+START = datetime.date(2025, 1, 1)
+
+
+def churn(store, ops, seed=0):
+    """Run the workload; return (seconds, errors, live model)."""
+    rng = random.Random(seed)
+    live = []          # Live IDs, removed by swap-with-last for O(1) picks
+    deleted = []
+    errors = []
+    last_id = 0
+
+    start = time.perf_counter()
+    for _ in range(ops):
+        if not live or rng.random() < 0.5:
+            date_obj = START + datetime.timedelta(days=rng.randrange(365))
+            event = store.add("churn", date_obj, datetime.time(rng.randrange(24), 0))
+            if event.id <= last_id:
+                errors.append(f"ID {event.id} handed out after {last_id}")
+            last_id = event.id
+            live.append(event.id)
+        elif deleted and rng.random() < 0.1:
+            event_id = rng.choice(deleted)
+            if store.delete(event_id):
+                errors.append(f"deleted ID {event_id} was deleted again")
+        else:
+            index = rng.randrange(len(live))
+            event_id = live[index]
+            live[index] = live[-1]
+            live.pop()
+            if not store.delete(event_id):
+                errors.append(f"live ID {event_id} was not found")
+            deleted.append(event_id)
+    store.flush()
+    elapsed = time.perf_counter() - start
+    return elapsed, errors, set(live)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ID allocation under add/delete churn")
+    parser.add_argument("--ops", type=int, default=1_000_000, help="Total adds + deletes")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="SQLite commit batch size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.backend == "sqlite":
+            store = SQLiteEventStore(os.path.join(tmp, "churn.db"), batch_size=args.batch_size)
+        else:
+            store = EventStore()
+
+        elapsed, errors, live = churn(store, args.ops)
+
+        if len(store) != len(live):
+            errors.append(f"store holds {len(store)} events, expected {len(live)}")
+        missing = [event_id for event_id in live if store.get(event_id) is None]
+        if missing:
+            errors.append(f"{len(missing)} live events missing from the store")
+        store.close()
+
+    print(f"{args.backend}: {args.ops} ops in {elapsed:.2f}s ({args.ops / elapsed:,.0f} ops/s), "
+          f"{len(live)} events left")
+    if errors:
+        print(f"FAILED: {len(errors)} errors, first: {errors[0]}")
+        sys.exit(1)
+    print("OK: IDs unique, every delete removed exactly one event")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compares conflict checks through the sorted index with a scan that
+tests every event, and times free-slot searches over a week.
+
+The indexed check reads only the events starting inside
+[start - max_duration, end) from the store's (day, minute) order; the
+scan tests each stored event against the new interval. Both must find
+the same conflicts.
+
+Usage:
+    python benchmarks/bench_conflicts.py
+    python benchmarks/bench_conflicts.py --sizes 10000 100000 --backend sqlite
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import tempfile
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_agent import EventStore, SQLiteEventStore, find_conflicts, find_free_slots
+
+START = datetime.date(2025, 1, 1)
+DAYS = 730
+
+
+def fill(store, count, seed=0):
+    rng = random.Random(seed)
+    with store.bulk():
+        for i in range(count):
+            date_obj = START + datetime.timedelta(days=rng.randrange(DAYS))
+            time_obj = datetime.time(rng.randrange(7, 20), rng.choice([0, 15, 30, 45]))
+            store.add(f"event {i}", date_obj, time_obj, rng.choice([None, 30, 90]))
+
+
+def scan_conflicts(events, start, end):
+    """The pairwise baseline: test every event against [start, end)."""
+    return [event for event in events if event.span() and event.span()[0] < end and event.span()[1] > start]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark conflict and free-slot searches")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'indexed (us)':>13} {'scan (us)':>11} {'free week (us)':>15}")
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            if args.backend == "sqlite":
+                store = SQLiteEventStore(os.path.join(tmp, f"conflicts-{size}.db"))
+            else:
+                store = EventStore()
+            fill(store, size)
+            events = store.upcoming(START)
+            probes = [(START + datetime.timedelta(days=rng.randrange(DAYS)),
+                       datetime.time(rng.randrange(8, 18), 0)) for _ in range(args.queries)]
+
+            start = time.perf_counter()
+            found = [find_conflicts(date_obj, time_obj, 60, store) for date_obj, time_obj in probes]
+            indexed = (time.perf_counter() - start) / args.queries
+
+            start = time.perf_counter()
+            for (date_obj, time_obj), conflicts in zip(probes, found):
+                begin = date_obj.toordinal() * 1440 + time_obj.hour * 60
+                if len(scan_conflicts(events, begin, begin + 60)) != len(conflicts):
+                    sys.exit(f"Mismatch at {date_obj} {time_obj}")
+            scan = (time.perf_counter() - start) / args.queries
+
+            start = time.perf_counter()
+            for date_obj, _ in probes:
+                find_free_slots(date_obj, date_obj + datetime.timedelta(days=6), store=store)
+            free = (time.perf_counter() - start) / args.queries
+
+            print(f"{size:>8} {indexed * 1e6:>13.1f} {scan * 1e6:>11.1f} {free * 1e6:>15.1f}")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
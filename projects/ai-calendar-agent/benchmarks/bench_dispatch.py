@@ -0,0 +1,61 @@
+"""
+Measures process_command throughput on a mixed command corpus.
+
+The corpus is the "Test with:" list from calendar_agent.py. Each pass
+starts from an empty in-memory calendar, so the numbers reflect command
+parsing and dispatch rather than a growing calendar.
+
+Usage:
+    python benchmarks/bench_dispatch.py
+    python benchmarks/bench_dispatch.py --passes 20000
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calendar_agent
+
+CORPUS = [
+    "help",
+    "add meeting on 2025-12-14 at 10:00",
+    "add meeting 2025-12-14 at 10:00",
+    "add meeting for 2025-12-14 at 10:00",
+    "add meeting today",
+    "add meeting tomorrow at 09:00",
+    "add appointment on 2025-12-15 at 14:30",
+    "view all events",
+    "view events on 2025-12-14",
+    "what's happening today",
+    "what's happening tomorrow",
+    "delete event 1",
+    "delete event 99",
+    "this is not a command",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark calendar command dispatch")
+    parser.add_argument("--passes", type=int, default=5000, help="Times to replay the corpus")
+    args = parser.parse_args()
+
+    process_command = calendar_agent.process_command
+    elapsed = 0.0
+    for _ in range(args.passes):
+        calendar_agent.calendar_store = calendar_agent.EventStore()
+        start = time.perf_counter()
+        for command in CORPUS:
+            process_command(command)
+        elapsed += time.perf_counter() - start
+
+    total = args.passes * len(CORPUS)
+    print(f"{total} commands in {elapsed:.3f}s: {total / elapsed:,.0f} commands/s "
+          f"({elapsed / total * 1e6:.2f} us/command)")
+
+
+if __name__ == "__main__":
+    main()
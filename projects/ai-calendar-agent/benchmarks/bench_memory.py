@@ -0,0 +1,98 @@
+"""
+Compares the memory used by the old dict event layout and Event records.
+
+The dict layout is the original {'id', 'title', 'date', 'time'} record
+with datetime.date/datetime.time values. The compact layout is the
+slotted Event class with the date as an ordinal and the time as minutes
+since midnight. Memory is measured with tracemalloc. The full
+EventStore, indexes included, is measured as well.
+
+Usage:
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --events 1000000
+"""
+
+import os
+import sys
+import random
+import argparse
+import datetime
+import tracemalloc
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_agent import Event, EventStore
+
+START = datetime.date(2025, 1, 1)
+
+
+def random_fields(count, seed=0):
+    """
+    Generate (id, title, (y, m, d), (h, m) or None) tuples over two years.
+    Each layout builds its own date/time values from these inside the
+    measurement, so neither one gets to share objects with the input.
+    """
+    rng = random.Random(seed)
+    for i in range(1, count + 1):
+        date_obj = START + datetime.timedelta(days=rng.randrange(730))
+        hm = None if rng.random() < 0.1 else (rng.randrange(24), rng.randrange(0, 60, 5))
+        yield i, f"event {i}", (date_obj.year, date_obj.month, date_obj.day), hm
+
+
+def to_datetime(ymd, hm):
+    return datetime.date(*ymd), (datetime.time(*hm) if hm else None)
+
+
+def measure(build):
+    """Return (bytes allocated, result) for building a structure."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event record memory use")
+    parser.add_argument("--events", type=int, default=200_000)
+    args = parser.parse_args()
+
+    # Titles are shared by both layouts and excluded from the comparison
+    fields = list(random_fields(args.events))
+
+    def dict_layout():
+        records = []
+        for i, t, ymd, hm in fields:
+            d, tm = to_datetime(ymd, hm)
+            records.append({"id": i, "title": t, "date": d, "time": tm})
+        return records
+
+    def event_layout():
+        return [Event.from_datetime(i, t, *to_datetime(ymd, hm)) for i, t, ymd, hm in fields]
+
+    def event_store():
+        store = EventStore()
+        for _, t, ymd, hm in fields:
+            store.add(t, *to_datetime(ymd, hm))
+        return store
+
+    dict_bytes, dicts = measure(dict_layout)
+    del dicts
+    event_bytes, events = measure(event_layout)
+    del events
+    store_bytes, store = measure(event_store)
+    del store
+
+    n = args.events
+    print(f"{'layout':<30} {'total (MB)':>11} {'bytes/event':>12}")
+    print(f"{'dict records':<30} {dict_bytes / 2**20:>11.1f} {dict_bytes / n:>12.1f}")
+    print(f"{'Event records':<30} {event_bytes / 2**20:>11.1f} {event_bytes / n:>12.1f}")
+    print(f"{'EventStore (with indexes)':<30} {store_bytes / 2**20:>11.1f} {store_bytes / n:>12.1f}")
+    print(f"Event records use {event_bytes / dict_bytes:.0%} of the dict layout")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compares the in-memory and SQLite calendar backends.
+
+For each size the benchmark bulk-loads random events, then times date
+lookups, short upcoming-range queries and deletes by ID.
+
+Usage:
+    python benchmarks/bench_storage.py
+    python benchmarks/bench_storage.py --sizes 10000 100000 --queries 500
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import tempfile
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_agent import EventStore, SQLiteEventStore
+
+START = datetime.date(2025, 1, 1)
+SPAN_DAYS = 730
+
+
+def random_events(count, seed=0):
+    """Generate (title, date, time) tuples spread over two years."""
+    rng = random.Random(seed)
+    for i in range(count):
+        date_obj = START + datetime.timedelta(days=rng.randrange(SPAN_DAYS))
+        time_obj = None if rng.random() < 0.1 else datetime.time(rng.randrange(24), rng.randrange(0, 60, 5))
+        yield f"event {i}", date_obj, time_obj
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def bench_store(store, size, queries, seed=0):
+    """Run the load/query/delete workload against a store."""
+    rng = random.Random(seed + 1)
+    results = {}
+
+    def load():
+        for title, date_obj, time_obj in random_events(size, seed):
+            store.add(title, date_obj, time_obj)
+        store.flush()
+    results["load"] = timed(load)
+
+    lookup_dates = [START + datetime.timedelta(days=rng.randrange(SPAN_DAYS)) for _ in range(queries)]
+
+    def lookups():
+        for date_obj in lookup_dates:
+            store.on_date(date_obj)
+    results["on_date"] = timed(lookups) / queries
+
+    # Upcoming queries over the last week of the range keep result sets small
+    tail_start = START + datetime.timedelta(days=SPAN_DAYS - 7)
+
+    def upcoming():
+        for _ in range(queries):
+            store.upcoming(tail_start)
+    results["upcoming"] = timed(upcoming) / queries
+
+    delete_ids = rng.sample(range(1, size + 1), min(queries, size))
+
+    def deletes():
+        for event_id in delete_ids:
+            store.delete(event_id)
+        store.flush()
+    results["delete"] = timed(deletes) / len(delete_ids)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark calendar storage backends")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=1000, help="Lookups and deletes per size")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="SQLite commit batch size")
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'events':>9} {'load (s)':>10} {'on_date (us)':>13} "
+          f"{'upcoming (us)':>14} {'delete (us)':>12}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            backends = [
+                ("memory", EventStore()),
+                ("sqlite", SQLiteEventStore(os.path.join(tmp, "bench.db"), batch_size=args.batch_size)),
+            ]
+            for name, store in backends:
+                r = bench_store(store, size, args.queries)
+                store.close()
+                print(f"{name:<8} {size:>9} {r['load']:>10.2f} {r['on_date'] * 1e6:>13.1f} "
+                      f"{r['upcoming'] * 1e6:>14.1f} {r['delete'] * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Load generator for calendar_server.py.
+
+Simulates many concurrent users. Each one opens its own connection and
+sends a mix of add, date-view, paged-view and delete commands, waiting
+for every reply before sending the next. Reports throughput and
+p50/p90/p99 request latency.
+
+Without --port, an in-process server is started on a free port. Clients
+and server then share one event loop. Run the server separately for
+numbers that exclude client overhead:
+
+    python calendar_server.py --port 8765
+    python benchmarks/load_test.py --port 8765 --users 5000
+
+Usage:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --users 2000 --commands 50 --sqlite
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import datetime
+import tempfile
+import statistics
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_server import UserCalendars, start_server
+
+
+def user_commands(count, rng):
+    """Build a realistic mix of commands for one user."""
+    today = datetime.date.today()
+    commands = []
+    for i in range(count):
+        day = (today + datetime.timedelta(days=rng.randrange(60))).isoformat()
+        roll = rng.random()
+        if roll < 0.5:
+            commands.append(f"add meeting {i} on {day} at {rng.randrange(8, 18):02d}:{rng.choice(['00', '30'])}")
+        elif roll < 0.75:
+            commands.append(f"view events on {day}")
+        elif roll < 0.9:
+            commands.append("show next 20 events")
+        else:
+            commands.append(f"delete event {rng.randrange(1, i + 2)}")
+    return commands
+
+
+async def run_user(host, port, user, commands, latencies, errors):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError as e:
+        errors.append(f"{user}: connect failed: {e}")
+        return
+    try:
+        for command in commands:
+            start = time.perf_counter()
+            writer.write(json.dumps({"user": user, "command": command}).encode() + b"\n")
+            await writer.drain()
+            line = await reader.readline()
+            latencies.append(time.perf_counter() - start)
+            if not line:
+                errors.append(f"{user}: connection closed before the reply to {command!r}")
+                return
+            if "response" not in json.loads(line):
+                errors.append(f"{user}: bad reply to {command!r}: {line!r}")
+    except (OSError, ValueError) as e:
+        # A dropped connection is one user's error, not the end of the run
+        errors.append(f"{user}: connection failed: {e!r}")
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+
+async def run_load(args, data_dir=None):
+    rng = random.Random(args.seed)
+    server = calendars = None
+    host, port = args.host, args.port
+    if port is None:
+        calendars = UserCalendars(data_dir)
+        server = await start_server(calendars, host, 0)
+        port = server.sockets[0].getsockname()[1]
+
+    workloads = {f"user-{n}": user_commands(args.commands, rng) for n in range(args.users)}
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_user(host, port, user, commands, latencies, errors)
+                           for user, commands in workloads.items()))
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+        calendars.close()
+    return elapsed, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the calendar server")
+    parser.add_argument("--users", type=int, default=1000, help="Concurrent simulated users")
+    parser.add_argument("--commands", type=int, default=20, help="Commands per user")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Target a running server instead of an in-process one")
+    parser.add_argument("--sqlite", action="store_true",
+                        help="In-process server: keep per-user SQLite files in a temporary directory")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        elapsed, latencies, errors = asyncio.run(run_load(args, tmp if args.sqlite else None))
+
+    if not latencies:
+        print(f"No requests completed ({len(errors)} errors, first: {errors[0] if errors else '-'})")
+        sys.exit(1)
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{args.users} users x {args.commands} commands: {len(latencies)} requests in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:,.0f} req/s)")
+    print(f"latency p50 {cuts[49] * 1e3:.2f} ms, p90 {cuts[89] * 1e3:.2f} ms, "
+          f"p99 {cuts[98] * 1e3:.2f} ms, max {max(latencies) * 1e3:.2f} ms")
+    if errors:
+        print(f"{len(errors)} errors, first: {errors[0]}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
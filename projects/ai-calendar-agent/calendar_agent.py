@@ -1,28 +1,755 @@
 import re
+import sys
+import heapq
+import bisect
+import sqlite3
+import argparse
 import datetime
+import functools
+import itertools
+import contextlib
 
 # --- Calendar Data Structure ---
-# Simple in-memory calendar. .... but this could be a database.
-calendar_events = []
+# Events are compact Event records: the date is kept as a proleptic
+# ordinal and the time as minutes since midnight (None for all-day).
+# Two interchangeable storage backends with the same interface:
+# - EventStore: in-memory, with an id -> event hash index and the
+#   (day, minute, id) keys kept in sorted order in a chunked SortedKeys list.
+# - SQLiteEventStore: a SQLite file, so the calendar survives restarts.
+# Both order all-day events first on their day, then by time, then by ID.
+# Repeating events are stored once as a Recurrence rule; their occurrences
+# are generated lazily for the dates being viewed and merged with the
+# single events, never stored.
+# Timed events last `duration` minutes (DEFAULT_DURATION_MINUTES if not
+# given); all-day events never take up time.
+
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_DURATION_MINUTES = 60
+MAX_DURATION_MINUTES = MINUTES_PER_DAY
+# Ordinals of the first and last dates datetime.date can represent
+MIN_DAY = datetime.date.min.toordinal()
+MAX_DAY = datetime.date.max.toordinal()
+
+def _minute_of_day(time_obj):
+    return None if time_obj is None else time_obj.hour * 60 + time_obj.minute
+
+# Default for update() arguments that should be left unchanged
+KEEP = object()
+
+def _apply_update(event, title, date_obj, time_obj, duration):
+    if title is not None:
+        event.title = title
+    if date_obj is not None:
+        event.day = date_obj.toordinal()
+    if time_obj is not KEEP:
+        event.minute = _minute_of_day(time_obj)
+    if duration is not KEEP:
+        event.duration = duration
+    event._line = None
+
+class Event:
+    """
+    A calendar event stored as plain ints instead of date/time objects.
+    Edit events through the store's update() so the cached display line
+    (see format_event) is dropped.
+    """
+    __slots__ = ("id", "title", "day", "minute", "duration", "_line")
+
+    def __init__(self, event_id, title, day, minute=None, duration=None):
+        self.id = event_id
+        self.title = title
+        self.day = day            # date.toordinal()
+        self.minute = minute      # Minutes since midnight, or None for all-day
+        self.duration = duration  # Minutes, or None for the default length
+        self._line = None         # Cached format_event() output
+
+    @classmethod
+    def from_datetime(cls, event_id, title, date_obj, time_obj=None, duration=None):
+        return cls(event_id, title, date_obj.toordinal(), _minute_of_day(time_obj), duration)
+
+    @property
+    def date(self):
+        return datetime.date.fromordinal(self.day)
+
+    @property
+    def time(self):
+        if self.minute is None:
+            return None
+        return datetime.time(self.minute // 60, self.minute % 60)
+
+    def sort_key(self):
+        # All-day events sort first on their day
+        return (self.day, -1 if self.minute is None else self.minute, self.id)
+
+    def span(self):
+        """
+        Returns (start, end) in minutes since the start of ordinal day 0,
+        or None for an all-day event.
+        """
+        if self.minute is None:
+            return None
+        start = self.day * MINUTES_PER_DAY + self.minute
+        return start, start + (DEFAULT_DURATION_MINUTES if self.duration is None else self.duration)
+
+    def __eq__(self, other):
+        if not isinstance(other, Event):
+            return NotImplemented
+        return ((self.id, self.title, self.day, self.minute, self.duration)
+                == (other.id, other.title, other.day, other.minute, other.duration))
+
+    def __repr__(self):
+        return f"Event(id={self.id!r}, title={self.title!r}, date={self.date}, time={self.time})"
+
+class Recurrence:
+    """
+    A repeating event stored once: it starts on `day` and repeats every
+    `interval` days, up to and including `last_day` (None repeats forever).
+    Occurrences are Event records that share the rule's ID.
+    """
+    __slots__ = ("id", "title", "day", "minute", "interval", "last_day", "duration")
+
+    def __init__(self, rule_id, title, day, minute, interval, last_day=None, duration=None):
+        self.id = rule_id
+        self.title = title
+        self.day = day
+        self.minute = minute
+        self.interval = interval
+        self.last_day = last_day
+        self.duration = duration
+
+    @classmethod
+    def from_datetime(cls, rule_id, title, date_obj, time_obj, interval, until=None, count=None,
+                      duration=None):
+        """
+        Builds a rule from dates and times; `until` (a date) and `count`
+        (number of occurrences) both cap the series, whichever ends first.
+        A count reaching past the last date datetime.date can represent
+        ends the series on that date instead.
+        """
+        day = date_obj.toordinal()
+        # Longer intervals repeat after MAX_DAY, so they all mean "once"
+        interval = min(interval, MAX_DAY)
+        last_day = None if until is None else until.toordinal()
+        if count is not None:
+            by_count = min(day + interval * (count - 1), MAX_DAY)
+            last_day = by_count if last_day is None else min(last_day, by_count)
+        return cls(rule_id, title, day, _minute_of_day(time_obj), interval, last_day, duration)
+
+    def occurs_on(self, day):
+        return (self.day <= day and (self.last_day is None or day <= self.last_day)
+                and (day - self.day) % self.interval == 0)
+
+    def occurrences(self, first_day, last_day=None):
+        """
+        Yields the occurrences from first_day up to last_day (inclusive;
+        None means as far as the rule goes), in date order. No series goes
+        past MAX_DAY.
+        """
+        if first_day <= self.day:
+            day = self.day
+        else:
+            day = first_day + (self.day - first_day) % self.interval
+        last_day = MAX_DAY if last_day is None else min(last_day, MAX_DAY)
+        if self.last_day is not None:
+            last_day = min(last_day, self.last_day)
+        while day <= last_day:
+            yield Event(self.id, self.title, day, self.minute, self.duration)
+            day += self.interval
+
+    def occurrence_on(self, day):
+        return Event(self.id, self.title, day, self.minute, self.duration)
+
+    def __repr__(self):
+        return (f"Recurrence(id={self.id!r}, title={self.title!r}, day={self.day}, "
+                f"minute={self.minute}, interval={self.interval}, last_day={self.last_day}, "
+                f"duration={self.duration})")
+
+def _merge_occurrences(events, rules, first_day, after=None, last_day=None):
+    # Lazily merges date-ordered single events with the occurrences of each
+    # rule from first_day on (up to last_day), resuming after sort key `after`
+    if after is not None:
+        first_day = max(first_day, after[0])
+    streams = [events]
+    for rule in rules:
+        occurrences = rule.occurrences(first_day, last_day)
+        if after is not None:
+            occurrences = itertools.dropwhile(lambda event: event.sort_key() <= after, occurrences)
+        streams.append(occurrences)
+    if len(streams) == 1:
+        return iter(events)
+    return heapq.merge(*streams, key=Event.sort_key)
+
+def _timed_in_window(events, rules, start, end):
+    # Merges start-ordered single events with the timed occurrences of each
+    # rule that start in [start, end) (minutes since ordinal day 0)
+    first_day, last_day = start // MINUTES_PER_DAY, (end - 1) // MINUTES_PER_DAY
+    streams = [events]
+    for rule in rules:
+        if rule.minute is None:
+            continue
+        streams.append(event for event in rule.occurrences(first_day, last_day)
+                       if start <= event.span()[0] < end)
+    if len(streams) == 1:
+        return iter(events)
+    return heapq.merge(*streams, key=Event.sort_key)
+
+class IdAllocator:
+    """
+    Hands out event IDs from a monotonic counter. An ID is never handed
+    out twice, even after the event holding it has been deleted.
+    """
+    __slots__ = ("last_id",)
+
+    def __init__(self, last_id=0):
+        self.last_id = last_id
+
+    def allocate(self):
+        self.last_id += 1
+        return self.last_id
+
+class SortedKeys:
+    """
+    A sorted list of keys, split into chunks of at most 2 * CHUNK_SIZE keys
+    with the last key of each chunk kept in `_maxes`. A key is found with one
+    bisect over `_maxes` and one inside its chunk, and adding or removing it
+    only shifts the keys of that chunk. One flat list would shift half of its
+    keys on every insert and delete, which dominates at millions of events.
+    """
+    CHUNK_SIZE = 1000
+
+    def __init__(self):
+        self._chunks = []
+        self._maxes = []
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._chunks)
+
+    def add(self, key):
+        chunks, maxes = self._chunks, self._maxes
+        self._len += 1
+        if not chunks:
+            chunks.append([key])
+            maxes.append(key)
+            return
+        i = bisect.bisect_left(maxes, key)
+        if i == len(maxes):
+            # Past every key: append to the last chunk
+            i -= 1
+            chunks[i].append(key)
+            maxes[i] = key
+        else:
+            bisect.insort(chunks[i], key)
+        chunk = chunks[i]
+        if len(chunk) > 2 * self.CHUNK_SIZE:
+            chunks.insert(i + 1, chunk[self.CHUNK_SIZE:])
+            del chunk[self.CHUNK_SIZE:]
+            maxes.insert(i, chunk[-1])
+
+    def remove(self, key):
+        """
+        Removes a key that is in the list.
+        """
+        i = bisect.bisect_left(self._maxes, key)
+        chunk = self._chunks[i]
+        j = bisect.bisect_left(chunk, key)
+        del chunk[j]
+        self._len -= 1
+        if not chunk:
+            del self._chunks[i]
+            del self._maxes[i]
+        elif j == len(chunk):
+            self._maxes[i] = chunk[-1]
+
+    def irange(self, lo, hi=None, inclusive=True):
+        """
+        Yields the keys from `lo` (or from just after it, if not inclusive)
+        up to but not including `hi` (None for no bound), in order. Keys
+        may be shorter tuples than the stored ones, e.g. (day,).
+        """
+        find = bisect.bisect_left if inclusive else bisect.bisect_right
+        chunks = self._chunks
+        i = find(self._maxes, lo)
+        j = find(chunks[i], lo) if i < len(chunks) else 0
+        while i < len(chunks):
+            chunk = chunks[i]
+            if hi is not None and not self._maxes[i] < hi:
+                # The last chunk of the range
+                yield from itertools.islice(chunk, j, bisect.bisect_left(chunk, hi, j))
+                return
+            yield from itertools.islice(chunk, j, None)
+            i += 1
+            j = 0
+
+class EventStore:
+    """
+    Holds calendar events indexed by ID and by (date, time).
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._order = SortedKeys()  # (day, minute, id) keys
+        self._rules = {}  # id -> Recurrence
+        self._ids = IdAllocator()
+        # Upper bound on any event's duration (it never shrinks), so an
+        # overlap search only has to look this far back from its start
+        self.max_duration = DEFAULT_DURATION_MINUTES
+
+    def __len__(self):
+        return len(self._by_id) + len(self._rules)
+
+    def _track_duration(self, duration):
+        if duration is not None and duration > self.max_duration:
+            self.max_duration = duration
+
+    def add(self, title, date_obj, time_obj=None, duration=None):
+        """
+        Stores a new event and returns it.
+        """
+        event = Event.from_datetime(self._ids.allocate(), title, date_obj, time_obj, duration)
+        self._by_id[event.id] = event
+        self._order.add(event.sort_key())
+        self._track_duration(duration)
+        return event
+
+    def add_recurring(self, title, date_obj, time_obj, interval, until=None, count=None, duration=None):
+        """
+        Stores a recurrence rule and returns it.
+        """
+        rule = Recurrence.from_datetime(self._ids.allocate(), title, date_obj, time_obj, interval,
+                                        until, count, duration)
+        self._rules[rule.id] = rule
+        self._track_duration(duration)
+        return rule
+
+    def get(self, event_id):
+        """
+        Returns the event with the given ID, or None.
+        """
+        return self._by_id.get(event_id)
+
+    def delete(self, event_id):
+        """
+        Removes an event or recurrence rule by ID.
+        Returns True if something was removed.
+        """
+        event = self._by_id.pop(event_id, None)
+        if event is None:
+            return self._rules.pop(event_id, None) is not None
+        self._order.remove(event.sort_key())
+        return True
+
+    def update(self, event_id, title=None, date_obj=None, time_obj=KEEP, duration=KEEP):
+        """
+        Changes an event's title, date, time and/or duration (pass
+        time_obj=None to make it all-day, duration=None for the default
+        length). Returns the updated event, or None if not found.
+        """
+        event = self._by_id.get(event_id)
+        if event is None:
+            return None
+        self._order.remove(event.sort_key())
+        _apply_update(event, title, date_obj, time_obj, duration)
+        self._order.add(event.sort_key())
+        self._track_duration(event.duration)
+        return event
+
+    def _range(self, start_key, end_key=None):
+        for key in self._order.irange(start_key, end_key):
+            yield self._by_id[key[2]]
+
+    def _iter_single(self, first_day, after):
+        if after is not None and after[0] >= first_day:
+            keys = self._order.irange(after, inclusive=False)
+        else:
+            keys = self._order.irange((first_day,))
+        for key in keys:
+            yield self._by_id[key[2]]
+
+    def iter_upcoming(self, from_date, after=None, until=None):
+        """
+        Yields the events (including recurring occurrences) on or after a
+        date in date/time order, starting after the sort key `after` if
+        given. Recurring series are expanded only up to the date `until`,
+        if given. Events are produced lazily, so taking the first N costs
+        O(log n + N) plus a heap merge over the recurrence rules.
+        """
+        first_day = from_date.toordinal()
+        last_day = None if until is None else until.toordinal()
+        return _merge_occurrences(self._iter_single(first_day, after), self._rules.values(),
+                                  first_day, after, last_day)
+
+    def on_date(self, date_obj):
+        """
+        Returns the events (including recurring occurrences) on a date,
+        ordered by time.
+        """
+        day = date_obj.toordinal()
+        events = list(self._range((day,), (day + 1,)))
+        occurrences = [rule.occurrence_on(day) for rule in self._rules.values() if rule.occurs_on(day)]
+        if occurrences:
+            events = sorted(events + occurrences, key=Event.sort_key)
+        return events
+
+    def timed_events(self, start, end):
+        """
+        Returns the timed events (including recurring occurrences) that
+        start in [start, end), given in minutes since ordinal day 0, ordered
+        by start. The window is read from the sorted index.
+        """
+        keys = self._order.irange(divmod(start, MINUTES_PER_DAY), divmod(end, MINUTES_PER_DAY))
+        # Skip the all-day keys (minute -1) of the days inside the window
+        events = [self._by_id[key[2]] for key in keys if key[1] >= 0]
+        return list(_timed_in_window(events, self._rules.values(), start, end))
+
+    def upcoming(self, from_date, until=None):
+        """
+        Returns the events on or after a date, ordered by date and time.
+        Pass `until` to bound open-ended recurring series.
+        """
+        return list(self.iter_upcoming(from_date, until=until))
+
+    def bulk(self):
+        """
+        Groups writes into one transaction; a no-op for the in-memory store.
+        """
+        return contextlib.nullcontext(self)
+
+    def flush(self):
+        """
+        Nothing to write out for the in-memory store.
+        """
+
+    def close(self):
+        """
+        Nothing to release for the in-memory store.
+        """
+
+# SQLite stores integers as signed 64-bit values; sqlite3 raises
+# OverflowError for a Python int outside this range
+SQLITE_MIN_INTEGER = -2 ** 63
+SQLITE_MAX_INTEGER = 2 ** 63 - 1
+
+def _fits_sqlite_integer(value):
+    """
+    True if `value` can be bound as a SQLite INTEGER.
+    """
+    return SQLITE_MIN_INTEGER <= value <= SQLITE_MAX_INTEGER
+
+class SQLiteEventStore:
+    """
+    Holds calendar events in a SQLite database file.
+
+    Dates are stored as proleptic ordinals and times as minutes since
+    midnight (NULL for all-day events), so the (day, minute) index answers
+    date lookups and upcoming-range queries directly. Writes are committed
+    every `batch_size` changes; call flush() or close() to commit the rest.
+    Inside a bulk() block all writes go into a single transaction instead.
+    The last allocated ID is saved in the `meta` table with each commit,
+    so IDs are not reused across restarts.
+    """
+
+    # Statements are kept as constants so sqlite3's per-connection
+    # statement cache reuses the prepared form on every call.
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS events ("
+        " id INTEGER PRIMARY KEY,"
+        " title TEXT NOT NULL,"
+        " day INTEGER NOT NULL,"
+        " minute INTEGER,"
+        " duration INTEGER)",
+        "CREATE INDEX IF NOT EXISTS idx_events_day_minute ON events (day, minute)",
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS recurrences ("
+        " id INTEGER PRIMARY KEY,"
+        " title TEXT NOT NULL,"
+        " day INTEGER NOT NULL,"
+        " minute INTEGER,"
+        " interval INTEGER NOT NULL,"
+        " last_day INTEGER,"
+        " duration INTEGER)",
+    )
+    # Files created before events had durations are migrated on open
+    _MIGRATIONS = (
+        ("events", "duration", "ALTER TABLE events ADD COLUMN duration INTEGER"),
+        ("recurrences", "duration", "ALTER TABLE recurrences ADD COLUMN duration INTEGER"),
+    )
+    _INSERT = "INSERT INTO events (id, title, day, minute, duration) VALUES (?, ?, ?, ?, ?)"
+    _LOAD_LAST_ID = "SELECT MAX(last_id) FROM (SELECT value AS last_id FROM meta WHERE key = 'last_id' UNION ALL SELECT MAX(id) FROM events)"
+    _SAVE_LAST_ID = "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_id', ?)"
+    _SELECT_ID = "SELECT id, title, day, minute, duration FROM events WHERE id = ?"
+    _DELETE_ID = "DELETE FROM events WHERE id = ?"
+    _UPDATE_ID = "UPDATE events SET title = ?, day = ?, minute = ?, duration = ? WHERE id = ?"
+    _SELECT_DAY = "SELECT id, title, day, minute, duration FROM events WHERE day = ? ORDER BY minute, id"
+    _SELECT_FROM_DAY = "SELECT id, title, day, minute, duration FROM events WHERE day >= ? ORDER BY day, minute, id"
+    _SELECT_AFTER_KEY = (
+        "SELECT id, title, day, minute, duration FROM events"
+        " WHERE day >= ? AND (day, IFNULL(minute, -1), id) > (?, ?, ?)"
+        " ORDER BY day, minute, id"
+    )
+    _COUNT = "SELECT (SELECT COUNT(*) FROM events) + (SELECT COUNT(*) FROM recurrences)"
+    _INSERT_RULE = (
+        "INSERT INTO recurrences (id, title, day, minute, interval, last_day, duration)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)"
+    )
+    _DELETE_RULE = "DELETE FROM recurrences WHERE id = ?"
+    _SELECT_RULES_ON_DAY = (
+        "SELECT id, title, day, minute, interval, last_day, duration FROM recurrences"
+        " WHERE day <= ?1 AND (last_day IS NULL OR last_day >= ?1) AND (?1 - day) % interval = 0"
+    )
+    _SELECT_RULES_FROM_DAY = (
+        "SELECT id, title, day, minute, interval, last_day, duration FROM recurrences"
+        " WHERE last_day IS NULL OR last_day >= ?"
+    )
+    # ?1/?2 bound the days so the (day, minute) index narrows the scan;
+    # ?3/?4 are the start/end in minutes since ordinal day 0
+    _SELECT_TIMED = (
+        "SELECT id, title, day, minute, duration FROM events"
+        " WHERE day BETWEEN ?1 AND ?2 AND minute IS NOT NULL"
+        " AND day * 1440 + minute >= ?3 AND day * 1440 + minute < ?4"
+        " ORDER BY day, minute, id"
+    )
+    _SELECT_TIMED_RULES = (
+        "SELECT id, title, day, minute, interval, last_day, duration FROM recurrences"
+        " WHERE minute IS NOT NULL AND day <= ?2 AND (last_day IS NULL OR last_day >= ?1)"
+    )
+    _MAX_DURATION = (
+        "SELECT MAX(duration) FROM"
+        " (SELECT MAX(duration) AS duration FROM events UNION ALL SELECT MAX(duration) FROM recurrences)"
+    )
+
+    def __init__(self, path, batch_size=1, check_same_thread=True):
+        # Pass check_same_thread=False to share the store between threads;
+        # the caller must then make sure only one thread uses it at a time.
+        self._conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in self._SCHEMA:
+            self._conn.execute(statement)
+        for table, column, statement in self._MIGRATIONS:
+            if column not in {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}:
+                self._conn.execute(statement)
+        self._conn.commit()
+        last_id = self._conn.execute(self._LOAD_LAST_ID).fetchone()[0] or 0
+        self._ids = IdAllocator(last_id)
+        self._saved_last_id = last_id
+        longest = self._conn.execute(self._MAX_DURATION).fetchone()[0] or 0
+        self.max_duration = max(DEFAULT_DURATION_MINUTES, longest)
+        self.batch_size = batch_size
+        self._pending = 0
+        self._bulk_depth = 0
+
+    def __len__(self):
+        return self._conn.execute(self._COUNT).fetchone()[0]
+
+    @staticmethod
+    def _to_event(row):
+        return Event(*row)
+
+    def _written(self):
+        self._pending += 1
+        if self._pending >= self.batch_size and not self._bulk_depth:
+            self.flush()
+
+    @contextlib.contextmanager
+    def bulk(self):
+        """
+        Commits every write made inside the block as a single transaction.
+        The writes are rolled back if the block raises.
+        """
+        self._bulk_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._bulk_depth == 1:
+                self._conn.rollback()
+                self._pending = 0
+            raise
+        finally:
+            self._bulk_depth -= 1
+        if not self._bulk_depth:
+            self.flush()
+
+    def _track_duration(self, duration):
+        if duration is not None and duration > self.max_duration:
+            self.max_duration = duration
+
+    def add(self, title, date_obj, time_obj=None, duration=None):
+        """
+        Stores a new event and returns it.
+        """
+        event = Event.from_datetime(self._ids.allocate(), title, date_obj, time_obj, duration)
+        self._conn.execute(self._INSERT, (event.id, title, event.day, event.minute, duration))
+        self._written()
+        self._track_duration(duration)
+        return event
+
+    def add_recurring(self, title, date_obj, time_obj, interval, until=None, count=None, duration=None):
+        """
+        Stores a recurrence rule and returns it.
+        """
+        rule = Recurrence.from_datetime(self._ids.allocate(), title, date_obj, time_obj, interval,
+                                        until, count, duration)
+        self._conn.execute(self._INSERT_RULE, (rule.id, rule.title, rule.day, rule.minute,
+                                               rule.interval, rule.last_day, duration))
+        self._written()
+        self._track_duration(duration)
+        return rule
+
+    def get(self, event_id):
+        """
+        Returns the event with the given ID, or None.
+        """
+        if not _fits_sqlite_integer(event_id):
+            return None
+        row = self._conn.execute(self._SELECT_ID, (event_id,)).fetchone()
+        return self._to_event(row) if row else None
+
+    def delete(self, event_id):
+        """
+        Removes an event or recurrence rule by ID.
+        Returns True if something was removed.
+        """
+        if not _fits_sqlite_integer(event_id):
+            return False
+        removed = (self._conn.execute(self._DELETE_ID, (event_id,)).rowcount > 0
+                   or self._conn.execute(self._DELETE_RULE, (event_id,)).rowcount > 0)
+        if removed:
+            self._written()
+        return removed
+
+    def update(self, event_id, title=None, date_obj=None, time_obj=KEEP, duration=KEEP):
+        """
+        Changes an event's title, date, time and/or duration (pass
+        time_obj=None to make it all-day, duration=None for the default
+        length). Returns the updated event, or None if not found.
+        """
+        event = self.get(event_id)
+        if event is None:
+            return None
+        _apply_update(event, title, date_obj, time_obj, duration)
+        self._conn.execute(self._UPDATE_ID, (event.title, event.day, event.minute, event.duration, event.id))
+        self._written()
+        self._track_duration(event.duration)
+        return event
+
+    def on_date(self, date_obj):
+        """
+        Returns the events (including recurring occurrences) on a date,
+        ordered by time.
+        """
+        day = date_obj.toordinal()
+        events = [self._to_event(row) for row in self._conn.execute(self._SELECT_DAY, (day,))]
+        rules = self._conn.execute(self._SELECT_RULES_ON_DAY, (day,)).fetchall()
+        if rules:
+            events.extend(Recurrence(*row).occurrence_on(day) for row in rules)
+            events.sort(key=Event.sort_key)
+        return events
+
+    def timed_events(self, start, end):
+        """
+        Returns the timed events (including recurring occurrences) that
+        start in [start, end), given in minutes since ordinal day 0, ordered
+        by start. The window is read from the (day, minute) index.
+        """
+        params = (start // MINUTES_PER_DAY, (end - 1) // MINUTES_PER_DAY, start, end)
+        events = [self._to_event(row) for row in self._conn.execute(self._SELECT_TIMED, params)]
+        rules = [Recurrence(*row) for row in self._conn.execute(self._SELECT_TIMED_RULES, params[:2])]
+        return list(_timed_in_window(events, rules, start, end))
+
+    def upcoming(self, from_date, until=None):
+        """
+        Returns the events on or after a date, ordered by date and time.
+        Pass `until` to bound open-ended recurring series.
+        """
+        return list(self.iter_upcoming(from_date, until=until))
+
+    def _iter_single(self, first_day, after):
+        if after is None:
+            rows = self._conn.execute(self._SELECT_FROM_DAY, (first_day,))
+        else:
+            rows = self._conn.execute(self._SELECT_AFTER_KEY, (max(first_day, after[0]),) + tuple(after))
+        for row in rows:
+            yield self._to_event(row)
+
+    def iter_upcoming(self, from_date, after=None, until=None):
+        """
+        Yields the events (including recurring occurrences) on or after a
+        date in date/time order, starting after the sort key `after` if
+        given. Recurring series are expanded only up to the date `until`,
+        if given. Rows are read from the (day, minute) index as they are
+        consumed.
+        """
+        first_day = from_date.toordinal()
+        last_day = None if until is None else until.toordinal()
+        rules = [Recurrence(*row) for row in self._conn.execute(self._SELECT_RULES_FROM_DAY, (first_day,))]
+        return _merge_occurrences(self._iter_single(first_day, after), rules, first_day, after, last_day)
+
+    def flush(self):
+        """
+        Commits any writes still pending in the current batch.
+        """
+        if self._pending:
+            if self._ids.last_id != self._saved_last_id:
+                self._conn.execute(self._SAVE_LAST_ID, (self._ids.last_id,))
+                self._saved_last_id = self._ids.last_id
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self):
+        """
+        Commits pending writes and closes the database.
+        """
+        self.flush()
+        self._conn.close()
+
+def open_store(db_path=None, batch_size=1):
+    """
+    Returns a SQLiteEventStore for db_path, or an in-memory EventStore.
+    """
+    if db_path:
+        return SQLiteEventStore(db_path, batch_size=batch_size)
+    return EventStore()
+
+# The agent's calendar. Tools read and write through this store.
+calendar_store = EventStore()
 
 # --- Helper Functions ---
 
+# Parsed dates and times are memoized in bounded LRU caches; chat logs
+# repeat the same few date strings over and over.
+DATE_CACHE_SIZE = 4096
+TIME_CACHE_SIZE = 2048  # Enough for every HH:MM of the day
+
+RELATIVE_DAYS = {"today": 0, "tomorrow": 1}
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date_literal(date_str):
+    try:
+        return datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+@functools.lru_cache(maxsize=8)
+def _relative_date(offset, today):
+    # Keyed on today's date, so entries stop matching once the day changes
+    return today + datetime.timedelta(days=offset)
+
 def parse_date(date_str):
     """
     Attempts to parse a date string into a datetime.date object.
     Supports 'tomorrow', 'today', and YYYY-MM-DD format.
     """
     date_str = date_str.lower()
-    if date_str == "today":
-        return datetime.date.today()
-    elif date_str == "tomorrow":
-        return datetime.date.today() + datetime.timedelta(days=1)
-    else:
-        try:
-            return datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-        except ValueError:
-            return None
+    offset = RELATIVE_DAYS.get(date_str)
+    if offset is not None:
+        return _relative_date(offset, datetime.date.today())
+    return _parse_date_literal(date_str)
 
+@functools.lru_cache(maxsize=TIME_CACHE_SIZE)
 def parse_time(time_str):
     """
     Attempts to parse a time string into a datetime.time object.
@@ -33,147 +760,544 @@ def parse_time(time_str):
     except ValueError:
         return None
 
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def _format_day(day):
+    return datetime.date.fromordinal(day).isoformat()
+
+def _format_minute(minute):
+    minute %= MINUTES_PER_DAY
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+def format_duration(minutes):
+    """
+    Formats a number of minutes as e.g. '45 min', '2 h' or '1 h 30 min'.
+    """
+    hours, minutes = divmod(minutes, 60)
+    if not hours:
+        return f"{minutes} min"
+    return f"{hours} h {minutes} min" if minutes else f"{hours} h"
+
 def format_event(event):
     """
-    Formats an event dictionary into a human-readable string.
+    Formats an Event into a human-readable string.
+    Events with an explicit duration show their end time as well.
+    The line is cached on the event until the event is updated.
     """
-    date_str = event['date'].strftime('%Y-%m-%d')
-    time_str = event['time'].strftime('%H:%M') if event['time'] else "All Day"
-    return f"[{date_str} {time_str}] {event['title']}"
+    line = event._line
+    if line is None:
+        if event.minute is None:
+            time_str = "All Day"
+        elif event.duration is None:
+            time_str = _format_minute(event.minute)
+        else:
+            time_str = f"{_format_minute(event.minute)}-{_format_minute(event.minute + event.duration)}"
+        line = event._line = f"[{_format_day(event.day)} {time_str}] {event.title}"
+    return line
 
 # --- Agentic Functions (Tools) ---
+# Each tool acts on the global calendar_store unless it is given a store,
+# so a server can keep a separate calendar per user.
+
+def _resolve_store(store):
+    return calendar_store if store is None else store
 
-def add_event_to_calendar(title, date_obj, time_obj=None):
+def add_event_to_calendar(title, date_obj, time_obj=None, store=None, duration=None):
     """
-    Adds a new event to the calendar_events list.
+    Adds a new event to the calendar store, warning about any events it
+    overlaps with.
     """
-    event = {
-        "id": len(calendar_events) + 1, # Simple ID generation
-        "title": title,
-        "date": date_obj,
-        "time": time_obj
-    }
-    calendar_events.append(event)
+    conflicts = find_conflicts(date_obj, time_obj, duration, store) if time_obj else []
+    _resolve_store(store).add(title, date_obj, time_obj, duration)
     time_str = f" at {time_obj.strftime('%H:%M')}" if time_obj else ""
-    return f"Event '{title}' added for {date_obj.strftime('%Y-%m-%d')}{time_str}."
+    if duration is not None:
+        time_str += f" for {format_duration(duration)}"
+    response = f"Event '{title}' added for {date_obj.strftime('%Y-%m-%d')}{time_str}."
+    if conflicts:
+        response += " It overlaps with " + _describe_conflicts(conflicts) + "."
+    return response
 
-def view_events_on_date(date_obj):
+def view_events_on_date(date_obj, store=None):
     """
     Retrieves and formats events for a specific date.
     """
-    events_on_date = [e for e in calendar_events if e['date'] == date_obj]
+    events_on_date = _resolve_store(store).on_date(date_obj)
     if not events_on_date:
         return f"No events found for {date_obj.strftime('%Y-%m-%d')}."
     
-    response = f"Events for {date_obj.strftime('%Y-%m-%d')}:\n"
-    for event in sorted(events_on_date, key=lambda x: x['time'] if x['time'] else datetime.time.min):
-        response += f"- {format_event(event)}\n"
-    return response.strip()
+    lines = [f"Events for {date_obj.strftime('%Y-%m-%d')}:"]
+    lines.extend(f"- {format_event(event)}" for event in events_on_date)
+    return "\n".join(lines).strip()
+
+def add_recurring_event(title, date_obj, time_obj, interval, until=None, count=None, store=None,
+                        duration=None):
+    """
+    Adds a repeating event to the calendar store.
+    """
+    rule = _resolve_store(store).add_recurring(title, date_obj, time_obj, interval, until, count, duration)
+    if interval == 1:
+        every = "every day"
+    elif interval == 7:
+        every = "every week"
+    else:
+        every = f"every {interval} days"
+    time_str = f" at {time_obj.strftime('%H:%M')}" if time_obj else ""
+    if duration is not None:
+        time_str += f" for {format_duration(duration)}"
+    if rule.last_day is None:
+        end_str = ""
+    else:
+        end_str = f" until {_format_day(rule.last_day)}"
+    return f"Recurring event '{title}' added {every} from {date_obj.strftime('%Y-%m-%d')}{time_str}{end_str}."
+
+# The full upcoming view expands recurring series this far ahead
+RECURRENCE_HORIZON_DAYS = 365
 
-def view_all_upcoming_events():
+def view_all_upcoming_events(store=None):
     """
     Retrieves and formats all upcoming events.
+    Recurring events are listed for the next RECURRENCE_HORIZON_DAYS days.
     """
+    # Already sorted by date, then by time
     today = datetime.date.today()
-    upcoming_events = [e for e in calendar_events if e['date'] >= today]
+    horizon = today + datetime.timedelta(days=RECURRENCE_HORIZON_DAYS)
+    upcoming_events = _resolve_store(store).iter_upcoming(today, until=horizon)
+    lines = [f"- {format_event(event)}" for event in upcoming_events]
     
-    if not upcoming_events:
+    if not lines:
         return "No upcoming events."
 
-    response = "Upcoming Events:\n"
-    # Sort by date, then by time
-    for event in sorted(upcoming_events, key=lambda x: (x['date'], x['time'] if x['time'] else datetime.time.min)):
-        response += f"- {format_event(event)}\n"
-    return response.strip()
+    return "Upcoming Events:\n" + "\n".join(lines).strip()
+
+# --- Paginated Upcoming View ---
+# Chat front ends only show a screenful of events, so the upcoming view
+# can also be read a page at a time. A page token is the sort key of the
+# last event shown; the next page resumes right after it in the date
+# index, so each page costs O(page size) however large the calendar is.
+
+UPCOMING_PAGE_SIZE = 20
+MAX_UPCOMING_PAGE_SIZE = 100
 
-def delete_event_by_id(event_id):
+def encode_page_token(event):
+    """
+    Returns the page token that resumes the upcoming view after `event`.
+    """
+    return ":".join(str(part) for part in event.sort_key())
+
+def decode_page_token(token):
+    """
+    Returns the sort key encoded in a page token, or None if it is invalid:
+    not three integers, a day outside the range of datetime.date, a minute
+    that is neither -1 (all-day) nor a minute of the day, or an ID that
+    does not fit in a SQLite INTEGER.
+    """
+    try:
+        day, minute, event_id = (int(part) for part in token.split(":"))
+    except ValueError:
+        return None
+    if not (MIN_DAY <= day <= MAX_DAY and -1 <= minute < MINUTES_PER_DAY and _fits_sqlite_integer(event_id)):
+        return None
+    return (day, minute, event_id)
+
+def upcoming_events_page(limit=UPCOMING_PAGE_SIZE, token=None, store=None):
+    """
+    Returns (events, next_token) for one page of upcoming events.
+    next_token is None on the last page.
+    """
+    after = decode_page_token(token) if token else None
+    upcoming = _resolve_store(store).iter_upcoming(datetime.date.today(), after)
+    events = list(itertools.islice(upcoming, limit + 1))
+    if len(events) > limit:
+        del events[limit:]
+        return events, encode_page_token(events[-1])
+    return events, None
+
+def view_upcoming_events_page(limit=UPCOMING_PAGE_SIZE, token=None, store=None):
+    """
+    Retrieves and formats one page of upcoming events, with a hint for
+    fetching the next page.
+    """
+    if token and decode_page_token(token) is None:
+        return f"Invalid page token '{token}'."
+    events, next_token = upcoming_events_page(limit, token, store)
+    if not events:
+        return "No more upcoming events." if token else "No upcoming events."
+
+    lines = ["Upcoming Events:"]
+    lines.extend(f"- {format_event(event)}" for event in events)
+    if next_token:
+        lines.append(f"More: `show next {limit} events after {next_token}`")
+    return "\n".join(lines)
+
+# --- Conflicts and Free Time ---
+# Events are intervals [start, end) in minutes since ordinal day 0. Both
+# stores can list the timed events starting inside a window straight from
+# their sorted (day, minute) index, and no event is longer than the store's
+# max_duration, so everything overlapping [start, end) starts inside
+# [start - max_duration, end). Conflict checks read just that window, and
+# free time comes from one sweep over each day's start-ordered events;
+# events are never compared pairwise. All-day events do not block time.
+
+# Free time is looked for inside these hours
+WORKDAY_START = 9 * 60
+WORKDAY_END = 18 * 60
+MIN_FREE_SLOT_MINUTES = 30
+MAX_FREE_SLOT_DAYS = 31
+# Overlapping events listed in full in the add warning
+CONFLICT_PREVIEW = 3
+
+def find_conflicts(date_obj, time_obj, duration=None, store=None):
+    """
+    Returns the timed events (including recurring occurrences) that
+    overlap an event on date_obj at time_obj lasting `duration` minutes
+    (DEFAULT_DURATION_MINUTES if None), ordered by start.
+    """
+    store = _resolve_store(store)
+    start = date_obj.toordinal() * MINUTES_PER_DAY + _minute_of_day(time_obj)
+    end = start + (DEFAULT_DURATION_MINUTES if duration is None else duration)
+    candidates = store.timed_events(start - store.max_duration, end)
+    return [event for event in candidates if event.span()[1] > start]
+
+def find_free_slots(first_date, last_date, min_length=MIN_FREE_SLOT_MINUTES,
+                    day_start=WORKDAY_START, day_end=WORKDAY_END, store=None):
+    """
+    Returns the free (start, end) intervals of at least min_length minutes
+    between day_start and day_end (minutes since midnight) on each day from
+    first_date to last_date, in minutes since ordinal day 0.
+    """
+    store = _resolve_store(store)
+    slots = []
+    for day in range(first_date.toordinal(), last_date.toordinal() + 1):
+        free_from = day * MINUTES_PER_DAY + day_start
+        closes = day * MINUTES_PER_DAY + day_end
+        # Start-ordered sweep: a gap opens wherever the next event starts
+        # after everything seen so far has ended
+        for event in store.timed_events(free_from - store.max_duration, closes):
+            start, end = event.span()
+            if start - free_from >= min_length:
+                slots.append((free_from, start))
+            free_from = max(free_from, end)
+        if closes - free_from >= min_length:
+            slots.append((free_from, closes))
+    return slots
+
+def _describe_conflicts(events):
+    shown = ", ".join(format_event(event) for event in events[:CONFLICT_PREVIEW])
+    if len(events) > CONFLICT_PREVIEW:
+        shown += f" and {len(events) - CONFLICT_PREVIEW} more"
+    return shown
+
+def view_conflicts(date_obj, time_obj, duration=None, store=None):
+    """
+    Lists the events that would overlap a new event at the given time.
+    """
+    conflicts = find_conflicts(date_obj, time_obj, duration, store)
+    minute = _minute_of_day(time_obj)
+    when = (f"{date_obj.strftime('%Y-%m-%d')} "
+            f"{_format_minute(minute)}-{_format_minute(minute + (duration or DEFAULT_DURATION_MINUTES))}")
+    if not conflicts:
+        return f"No conflicts for {when}."
+
+    lines = [f"Conflicts for {when}:"]
+    lines.extend(f"- {format_event(event)}" for event in conflicts)
+    return "\n".join(lines)
+
+def view_free_slots(first_date, last_date, min_length=MIN_FREE_SLOT_MINUTES, store=None):
+    """
+    Retrieves and formats the free time between first_date and last_date.
+    """
+    if last_date == first_date:
+        period = f"on {first_date.strftime('%Y-%m-%d')}"
+    else:
+        period = f"from {first_date.strftime('%Y-%m-%d')} to {last_date.strftime('%Y-%m-%d')}"
+    slots = find_free_slots(first_date, last_date, min_length, store=store)
+    if not slots:
+        return f"No free time {period}."
+
+    lines = [f"Free time {period} ({_format_minute(WORKDAY_START)}-{_format_minute(WORKDAY_END)}):"]
+    for start, end in slots:
+        day, minute = divmod(start, MINUTES_PER_DAY)
+        lines.append(f"- {_format_day(day)} {_format_minute(minute)}-{_format_minute(end)} "
+                     f"({format_duration(end - start)})")
+    return "\n".join(lines)
+
+def delete_event_by_id(event_id, store=None):
     """
     Deletes an event by its ID.
     """
-    global calendar_events # Needed to modify the global list
-    initial_len = len(calendar_events)
-    calendar_events = [e for e in calendar_events if e['id'] != event_id]
-    
-    if len(calendar_events) < initial_len:
+    if _resolve_store(store).delete(event_id):
         return f"Event with ID {event_id} deleted."
     else:
         return f"No event found with ID {event_id}."
 
 # --- Agent's Brain (Intent Parser and Executor) ---
+# The command patterns are compiled once at import time. process_command
+# routes each command on its first word, so it only tries the patterns
+# that can match it instead of running every pattern in turn.
+
+# e.g., "for 90 minutes", "for 2 hours"
+DURATION = r"(?:\s+for\s+(?P<duration>\d+)\s*(?P<duration_unit>minutes?|mins?|m|hours?|hrs?|h))"
+
+# e.g., "add meeting on 2023-12-25 at 10:00"
+# e.g., "add workshop tomorrow at 13:00 for 2 hours"
+ADD_PATTERN = re.compile(
+    r"add\s+(?P<title>.+?)\s*(?:on|for)?\s*(?P<date>\d{4}-\d{2}-\d{2}|today|tomorrow)"
+    r"(?:\s+at\s+(?P<time>\d{1,2}:\d{2})" + DURATION + r"?)?$",
+    re.IGNORECASE
+)
+
+# e.g., "add standup daily from 2025-12-15 at 09:30"
+# e.g., "add review every week on 2025-12-15 at 14:00 until 2026-03-01"
+# e.g., "add backup every 3 days from today for 10 times"
+# A bare daily/weekly needs "from" or "starting": "add standup weekly on
+# 2025-12-15" is a single event titled "standup weekly", as it always was.
+RECURRING_PATTERN = re.compile(
+    r"add\s+(?P<title>.+?)\s+"
+    r"(?:every\s+(?:(?P<days>\d+)\s+days|(?P<unit>day|week))(?:\s+(?:from|starting|on))?"
+    r"|(?P<freq>daily|weekly)\s+(?:from|starting))"
+    r"\s+(?P<date>\d{4}-\d{2}-\d{2}|today|tomorrow)"
+    r"(?:\s+at\s+(?P<time>\d{1,2}:\d{2})" + DURATION + r"?)?"
+    r"(?:\s+until\s+(?P<until>\d{4}-\d{2}-\d{2}|today|tomorrow)|\s+for\s+(?P<count>\d+)\s+times)?$",
+    re.IGNORECASE
+)
+
+# e.g., "view events on 2023-12-25"
+# e.g., "what's happening today"
+# e.g., "show me tomorrow's schedule"
+VIEW_DATE_PATTERN = re.compile(
+    r"(view|show|what's happening)\s+(events\s+(?:on\s+|for\s+)?|schedule\s+)?(?P<date>\d{4}-\d{2}-\d{2}|today|tomorrow)",
+    re.IGNORECASE
+)
 
-def process_command(command):
+# e.g., "view all events"
+# e.g., "show upcoming schedule"
+UPCOMING_PATTERN = re.compile(r"view all events|show upcoming events|show my schedule")
+
+# e.g., "show next 20 events"
+# e.g., "show next 20 events after 739599:600:42"
+UPCOMING_PAGE_PATTERN = re.compile(
+    r"(?:view|show)\s+next\s+(?P<limit>\d+)\s+events(?:\s+after\s+(?P<token>\S+))?$",
+    re.IGNORECASE
+)
+
+# e.g., "check conflicts on 2025-12-14 at 10:00 for 30 minutes"
+CONFLICT_PATTERN = re.compile(
+    r"check\s+(?:for\s+)?conflicts\s+(?:on\s+)?(?P<date>\d{4}-\d{2}-\d{2}|today|tomorrow)"
+    r"\s+at\s+(?P<time>\d{1,2}:\d{2})" + DURATION + r"?$",
+    re.IGNORECASE
+)
+
+# e.g., "when am i free this week"
+# e.g., "find free slots on 2025-12-15"
+# e.g., "find free time from 2025-12-15 to 2025-12-19"
+FREE_PATTERN = re.compile(
+    r"(?:when\s+am\s+i\s+free|find\s+free\s+(?:slots|time))\s+"
+    r"(?:(?P<week>this\s+week)|(?:on\s+)?(?P<date>\d{4}-\d{2}-\d{2}|today|tomorrow)"
+    r"|from\s+(?P<first>\d{4}-\d{2}-\d{2}|today|tomorrow)\s+to\s+(?P<last>\d{4}-\d{2}-\d{2}|today|tomorrow))"
+    r"\??$",
+    re.IGNORECASE
+)
+
+# e.g., "delete event 5"
+DELETE_PATTERN = re.compile(r"delete\s+event\s+(?P<id>\d+)$")
+
+HELP_COMMANDS = ("help", "hi", "hello")
+
+HELP_TEXT = (
+    "Hello! I am your AI Calendar Agent.\n"
+    "Here are the commands you can use:\n"
+    "- Add an event: `add <title> on <YYYY-MM-DD> [at <HH:MM>]` (e.g., `add meeting on 2023-12-25 at 10:00`)\n"
+    "- Add an event for today/tomorrow: `add <title> today [at <HH:MM>]` (e.g., `add dentist appointment tomorrow at 14:30`)\n"
+    "- Add an event with a length: `add <title> on <YYYY-MM-DD> at <HH:MM> for <N> minutes|hours` (1 hour if not given)\n"
+    "- Add a recurring event: `add <title> daily|weekly|every <N> days from <date> [at <HH:MM>] [until <date> | for <N> times]`\n"
+    "- View events for a date: `view events on <YYYY-MM-DD>` or `what's happening today`\n"
+    "- View all upcoming events: `view all events` or `show my schedule`\n"
+    f"- View upcoming events a page at a time: `show next <N> events` (up to {MAX_UPCOMING_PAGE_SIZE})\n"
+    "- Check for conflicts: `check conflicts on <date> at <HH:MM> [for <N> minutes]`\n"
+    "- Find free time: `when am i free this week` or `find free slots on <date>`\n"
+    "- Delete an event: `delete event <ID>` (You'll see IDs when viewing events)\n"
+    "- Type 'exit' to quit."
+)
+
+DATE_ERROR = "Could not understand the date. Please use YYYY-MM-DD, 'today', or 'tomorrow'."
+DURATION_ERROR = f"An event has to last between 1 minute and {MAX_DURATION_MINUTES // 60} hours."
+
+def _parse_duration(match):
+    # Minutes from a DURATION group; None if absent, 0 if out of range
+    if not match.group('duration'):
+        return None
+    minutes = int(match.group('duration'))
+    if match.group('duration_unit').lower().startswith("h"):
+        minutes *= 60
+    return minutes if 1 <= minutes <= MAX_DURATION_MINUTES else 0
+
+def _handle_add_recurring(command, store):
+    match = RECURRING_PATTERN.fullmatch(command)
+    if not match:
+        return None
+    title = match.group('title').strip()
+    date_obj = parse_date(match.group('date'))
+    time_obj = parse_time(match.group('time')) if match.group('time') else None
+    until = parse_date(match.group('until')) if match.group('until') else None
+    if not date_obj or (match.group('until') and not until):
+        return DATE_ERROR
+
+    if match.group('days'):
+        interval = int(match.group('days'))
+    else:
+        interval = 7 if (match.group('unit') or match.group('freq')).lower() in ("week", "weekly") else 1
+    count = int(match.group('count')) if match.group('count') else None
+
+    if interval < 1:
+        return "A recurring event needs to repeat at least every 1 day."
+    if count is not None and count < 1:
+        return "A recurring event needs at least 1 occurrence."
+    if until is not None and until < date_obj:
+        return "The end date of a recurring event can't be before its start date."
+    duration = _parse_duration(match) if time_obj else None
+    if duration == 0:
+        return DURATION_ERROR
+    return add_recurring_event(title, date_obj, time_obj, interval, until, count, store, duration)
+
+def _handle_add(command, store):
+    match = ADD_PATTERN.fullmatch(command)
+    if not match:
+        return None
+    title = match.group('title').strip()
+    date_str = match.group('date')
+    time_str = match.group('time')
+
+    date_obj = parse_date(date_str)
+    time_obj = parse_time(time_str) if time_str else None
+    # A length only applies to timed events
+    duration = _parse_duration(match) if time_obj else None
+
+    if not date_obj:
+        return DATE_ERROR
+    if duration == 0:
+        return DURATION_ERROR
+    return add_event_to_calendar(title, date_obj, time_obj, store, duration)
+
+def _handle_view_date(command, store):
+    match = VIEW_DATE_PATTERN.match(command)
+    if not match:
+        return None
+    date_obj = parse_date(match.group('date'))
+    if date_obj:
+        return view_events_on_date(date_obj, store)
+    else:
+        return DATE_ERROR
+
+def _handle_upcoming(command, store):
+    # The upcoming-view phrases are accepted anywhere in the command
+    if UPCOMING_PATTERN.search(command):
+        return view_all_upcoming_events(store)
+    return None
+
+def _handle_upcoming_page(command, store):
+    match = UPCOMING_PAGE_PATTERN.match(command)
+    if not match:
+        return None
+    limit = int(match.group('limit'))
+    if limit < 1:
+        return "Please ask for at least one event."
+    if limit > MAX_UPCOMING_PAGE_SIZE:
+        return (f"Showing {MAX_UPCOMING_PAGE_SIZE} events, the most a page can hold.\n"
+                + view_upcoming_events_page(MAX_UPCOMING_PAGE_SIZE, match.group('token'), store))
+    return view_upcoming_events_page(limit, match.group('token'), store)
+
+def _handle_conflicts(command, store):
+    match = CONFLICT_PATTERN.fullmatch(command)
+    if not match:
+        return None
+    date_obj = parse_date(match.group('date'))
+    time_obj = parse_time(match.group('time'))
+    duration = _parse_duration(match)
+    if not date_obj:
+        return DATE_ERROR
+    if not time_obj:
+        return "Could not understand the time. Please use HH:MM (24-hour)."
+    if duration == 0:
+        return DURATION_ERROR
+    return view_conflicts(date_obj, time_obj, duration, store)
+
+def _handle_free(command, store):
+    match = FREE_PATTERN.fullmatch(command)
+    if not match:
+        return None
+    if match.group('week'):
+        # From today through Sunday
+        first_date = datetime.date.today()
+        last_date = first_date + datetime.timedelta(days=6 - first_date.weekday())
+    elif match.group('date'):
+        first_date = last_date = parse_date(match.group('date'))
+    else:
+        first_date, last_date = parse_date(match.group('first')), parse_date(match.group('last'))
+    if not first_date or not last_date:
+        return DATE_ERROR
+    if last_date < first_date:
+        return "The end date can't be before the start date."
+    if (last_date - first_date).days >= MAX_FREE_SLOT_DAYS:
+        return f"Please ask for at most {MAX_FREE_SLOT_DAYS} days at a time."
+    return view_free_slots(first_date, last_date, store=store)
+
+def _handle_delete(command, store):
+    match = DELETE_PATTERN.match(command)
+    if not match:
+        return None
+    return delete_event_by_id(int(match.group('id')), store)
+
+def _handle_help(command, store):
+    return HELP_TEXT if command in HELP_COMMANDS else None
+
+# Handlers to try for each (lower-cased) first word, in priority order.
+# Commands starting with any other word can only be an upcoming view.
+COMMAND_HANDLERS = {
+    "add": (_handle_add_recurring, _handle_add, _handle_upcoming),
+    "view": (_handle_view_date, _handle_upcoming, _handle_upcoming_page),
+    "show": (_handle_view_date, _handle_upcoming, _handle_upcoming_page),
+    "what's": (_handle_view_date, _handle_upcoming),
+    "delete": (_handle_delete, _handle_upcoming),
+    "check": (_handle_conflicts, _handle_upcoming),
+    "when": (_handle_free, _handle_upcoming),
+    "find": (_handle_free, _handle_upcoming),
+    "help": (_handle_help, _handle_upcoming),
+    "hi": (_handle_help, _handle_upcoming),
+    "hello": (_handle_help, _handle_upcoming),
+}
+DEFAULT_HANDLERS = (_handle_upcoming,)
+
+def command_keyword(command):
+    """
+    Returns the lower-cased first word of a command, or '' if it is blank.
+    """
+    words = command.split(None, 1)
+    return words[0].lower() if words else ""
+
+def process_command(command, store=None):
     """
     The core agent logic: parses the command and calls the appropriate tool.
+    Tools act on `store`, or on the global calendar_store if it is None.
     """
     command = command.strip()  # Remove leading/trailing spaces
 
-    # 1. Add Event
-    add_pattern = re.compile(
-        r"add\s+(?P<title>.+?)\s*(?:on|for)?\s*(?P<date>\d{4}-\d{2}-\d{2}|today|tomorrow)"
-        r"(?:\s+at\s+(?P<time>\d{1,2}:\d{2}))?$",
-        re.IGNORECASE
-    )
-    match = add_pattern.fullmatch(command)
-    if match:
-        title = match.group('title').strip()
-        date_str = match.group('date')
-        time_str = match.group('time')
-
-        date_obj = parse_date(date_str)
-        time_obj = parse_time(time_str) if time_str else None
-
-        if date_obj:
-            return add_event_to_calendar(title, date_obj, time_obj)
-        else:
-            return "Could not understand the date. Please use YYYY-MM-DD, 'today', or 'tomorrow'."
-
-    # 2. View Events for a Specific Date
-    # e.g., "view events on 2023-12-25"
-    # e.g., "what's happening today"
-    # e.g., "show me tomorrow's schedule"
-    view_date_pattern = re.compile(
-        r"(view|show|what's happening)\s+(events\s+(?:on\s+|for\s+)?|schedule\s+)?(?P<date>\d{4}-\d{2}-\d{2}|today|tomorrow)",
-        re.IGNORECASE
-    )
-    match = view_date_pattern.match(command)
-    if match:
-        date_str = match.group('date')
-        date_obj = parse_date(date_str)
-        if date_obj:
-            return view_events_on_date(date_obj)
-        else:
-            return "Could not understand the date. Please use YYYY-MM-DD, 'today', or 'tomorrow'."
-
-    # 3. View All Upcoming Events
-    # e.g., "view all events"
-    # e.g., "show upcoming schedule"
-    if "view all events" in command or "show upcoming events" in command or "show my schedule" in command:
-        return view_all_upcoming_events()
-
-    # 4. Delete Event by ID
-    # e.g., "delete event 5"
-    delete_pattern = re.compile(r"delete\s+event\s+(?P<id>\d+)$")
-    match = delete_pattern.match(command)
-    if match:
-        event_id = int(match.group('id'))
-        return delete_event_by_id(event_id)
-
-    # 5. Help
-    if command in ("help", "hi", "hello"):
-        return (
-            "Hello! I am your AI Calendar Agent.\n"
-            "Here are the commands you can use:\n"
-            "- Add an event: `add <title> on <YYYY-MM-DD> [at <HH:MM>]` (e.g., `add meeting on 2023-12-25 at 10:00`)\n"
-            "- Add an event for today/tomorrow: `add <title> today [at <HH:MM>]` (e.g., `add dentist appointment tomorrow at 14:30`)\n"
-            "- View events for a date: `view events on <YYYY-MM-DD>` or `what's happening today`\n"
-            "- View all upcoming events: `view all events` or `show my schedule`\n"
-            "- Delete an event: `delete event <ID>` (You'll see IDs when viewing events)\n"
-            "- Type 'exit' to quit."
-        )
+    for handler in COMMAND_HANDLERS.get(command_keyword(command), DEFAULT_HANDLERS):
+        response = handler(command, store)
+        if response is not None:
+            return response
 
     # If no command matches
     return "I didn't understand that command. Type 'help' for available commands."
 
+def run_command(command, store=None):
+    """
+    Runs process_command, answering with an error message instead of
+    raising, so one failing command does not end a session or a batch.
+    """
+    try:
+        return process_command(command, store)
+    except Exception as error:
+        return f"The command failed ({type(error).__name__}: {error})."
+
 # --- Main Agent Loop ---
 
 def run_agent():
@@ -189,11 +1313,71 @@ def run_agent():
             print("Goodbye!")
             break
         
-        response = process_command(user_input)
+        response = run_command(user_input)
         print(response)
 
+def _batch_commands(lines):
+    # Non-blank, stripped commands up to (not including) an 'exit' line
+    commands = (line.strip() for line in lines)
+    commands = (command for command in commands if command)
+    return itertools.takewhile(lambda command: command.lower() != 'exit', commands)
+
+def run_batch(lines, out, group_adds=False):
+    """
+    Runs every command from an iterable of lines (e.g. a file or stdin)
+    and writes one response per command to `out`, without prompts. A
+    command that fails gets an error message as its response, and the
+    batch goes on. With group_adds, each run of consecutive `add`
+    commands is stored in a single transaction. Returns the number of
+    commands processed.
+    """
+    def is_add(command):
+        return group_adds and command_keyword(command) == "add"
+
+    count = 0
+    for adds, commands in itertools.groupby(_batch_commands(lines), key=is_add):
+        with calendar_store.bulk() if adds else contextlib.nullcontext():
+            for command in commands:
+                out.write(run_command(command))
+                out.write("\n")
+                count += 1
+    out.flush()
+    return count
+
+def main(argv=None):
+    """
+    Parses command-line options, opens the calendar store and runs the agent.
+    """
+    global calendar_store
+    parser = argparse.ArgumentParser(description="AI Calendar Agent")
+    parser.add_argument("--db", help="SQLite file to keep events in (default: in-memory only)")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Run commands from FILE ('-' for stdin) instead of prompting")
+    parser.add_argument("--output", metavar="FILE", help="Write batch responses to FILE (default: stdout)")
+    parser.add_argument("--group-adds", action="store_true",
+                        help="Store consecutive add commands in one transaction (batch mode)")
+    args = parser.parse_args(argv)
+
+    calendar_store = open_store(args.db)
+    try:
+        if args.batch:
+            with contextlib.ExitStack() as stack:
+                if args.batch == '-':
+                    lines = sys.stdin
+                else:
+                    lines = stack.enter_context(open(args.batch, encoding="utf-8"))
+                if args.output:
+                    out = stack.enter_context(open(args.output, "w", encoding="utf-8", buffering=1 << 16))
+                else:
+                    out = sys.stdout
+                run_batch(lines, out, group_adds=args.group_adds)
+        else:
+            run_agent()
+    finally:
+        calendar_store.close()
+
 if __name__ == "__main__":
-    run_agent()   # python calendar_agent.py
+    main()   # python calendar_agent.py [--db calendar.db] [--batch commands.txt]
 
 # Test with:
 
@@ -0,0 +1,240 @@
+import os
+import json
+import asyncio
+import logging
+import argparse
+import collections
+import urllib.parse
+
+from calendar_agent import EventStore, SQLiteEventStore, process_command
+
+# --- Multi-User Calendar Server ---
+# An asyncio server speaking a line protocol: each request is one line of
+# JSON, {"user": "...", "command": "..."} (plus an optional "id" that is
+# echoed back), and each reply is one line of JSON, {"response": "..."}
+# or {"error": "..."}.
+#
+# Every user gets their own calendar store and an asyncio.Lock. Commands
+# for one user run one at a time in arrival order. Commands for
+# different users interleave, and with SQLite storage they run on worker
+# threads so one user's disk I/O does not hold up the others.
+#
+# A SQLite store holds three file descriptors (the database, its WAL and
+# shared-memory files), so only the MAX_OPEN_STORES most recently used
+# SQLite stores are kept open; an idle user's store is closed and opened
+# again on their next command.
+
+MAX_LINE_BYTES = 64 * 1024
+LINE_TOO_LONG = f"Request is longer than {MAX_LINE_BYTES} bytes."
+# Pending-connection queue; the asyncio default of 100 stalls bursts of
+# thousands of clients connecting at once
+LISTEN_BACKLOG = 4096
+MAX_OPEN_STORES = 64
+
+logger = logging.getLogger(__name__)
+
+class UserCalendars:
+    """
+    Creates and holds one calendar store (and lock) per user.
+    Stores are in-memory, or one SQLite file per user under data_dir. At
+    most max_open SQLite stores are open at once: opening another one
+    closes the least recently used store whose user has no command running,
+    or waits until there is one.
+    """
+
+    def __init__(self, data_dir=None, max_open=MAX_OPEN_STORES):
+        self.data_dir = data_dir
+        self.max_open = max_open
+        self._sessions = {}  # user -> [store, lock]
+        self._open = collections.OrderedDict()  # Users with an open SQLite store, least recent first
+        self._store_idle = asyncio.Condition()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _open_store(self, user):
+        if self.data_dir is None:
+            return EventStore()
+        # Quote the user ID so any string maps to a distinct, safe file name
+        filename = urllib.parse.quote(user, safe="") + ".db"
+        # Access is serialized by the user's lock, so the store may move
+        # between worker threads
+        return SQLiteEventStore(os.path.join(self.data_dir, filename), check_same_thread=False)
+
+    def session(self, user):
+        """
+        Returns the [store, lock] pair for a user, creating it on first use.
+        The store is None until the user's first command opens it.
+        """
+        session = self._sessions.get(user)
+        if session is None:
+            session = self._sessions[user] = [None, asyncio.Lock()]
+        return session
+
+    async def run(self, user, command):
+        """
+        Runs one command against the user's calendar and returns the response.
+        """
+        session = self.session(user)
+        if self.data_dir is None:
+            async with session[1]:
+                if session[0] is None:
+                    session[0] = self._open_store(user)
+                # In-memory commands take microseconds; a thread hop would cost more
+                return process_command(command, session[0])
+        try:
+            async with session[1]:
+                if session[0] is None:
+                    await self._open_sqlite_store(user, session)
+                else:
+                    self._open.move_to_end(user)
+                return await asyncio.to_thread(process_command, command, session[0])
+        finally:
+            # The user's store is idle now; wake a user waiting for a free one
+            async with self._store_idle:
+                self._store_idle.notify()
+
+    async def _open_sqlite_store(self, user, session):
+        # Called with the user's lock held. Closes an idle store first if
+        # max_open are already open, or waits for one to become idle.
+        async with self._store_idle:
+            while len(self._open) >= self.max_open and not self._close_idle():
+                await self._store_idle.wait()
+            self._open[user] = None
+        try:
+            session[0] = await asyncio.to_thread(self._open_store, user)
+        except BaseException:
+            del self._open[user]
+            raise
+
+    def _close_idle(self):
+        # Closes the least recently used store whose user has no command
+        # running; False if every open store is in use. Stores commit each
+        # write (batch size 1), so closing one is quick enough for the loop.
+        for user in self._open:
+            session = self._sessions[user]
+            if not session[1].locked():
+                del self._open[user]
+                store, session[0] = session[0], None
+                store.close()
+                return True
+        return False
+
+    def open_stores(self):
+        """
+        Returns the number of SQLite stores currently open.
+        """
+        return len(self._open)
+
+    def close(self):
+        """
+        Closes every open store.
+        """
+        for store, _ in self._sessions.values():
+            if store is not None:
+                store.close()
+        self._sessions.clear()
+        self._open.clear()
+
+def _parse_request(line):
+    # Returns (request, None) or (None, error message)
+    try:
+        request = json.loads(line)
+    except ValueError:
+        return None, "Request is not valid JSON."
+    if not isinstance(request, dict):
+        return None, "Request must be a JSON object."
+    user, command = request.get("user"), request.get("command")
+    if not isinstance(user, str) or not user or not isinstance(command, str):
+        return None, "Request needs a non-empty string 'user' and a string 'command'."
+    return request, None
+
+async def handle_client(reader, writer, calendars):
+    """
+    Serves one connection: reads request lines and writes a reply for each,
+    in order, until the client disconnects.
+    """
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                # Line longer than MAX_LINE_BYTES; the rest of it cannot be
+                # told apart from the next request, so the connection ends
+                writer.write(json.dumps({"error": LINE_TOO_LONG}).encode() + b"\n")
+                await writer.drain()
+                break
+            if not line:
+                break
+            request, error = _parse_request(line)
+            if error:
+                reply = {"error": error}
+            else:
+                try:
+                    reply = {"response": await calendars.run(request["user"], request["command"])}
+                except Exception:
+                    # A failing command must not drop the connection
+                    logger.exception("Command %r for user %r failed", request["command"], request["user"])
+                    reply = {"error": "The command failed on the server."}
+                if "id" in request:
+                    reply["id"] = request["id"]
+            writer.write(json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+async def start_server(calendars, host="127.0.0.1", port=8765):
+    """
+    Starts listening and returns the asyncio.Server.
+    """
+    return await asyncio.start_server(
+        lambda reader, writer: handle_client(reader, writer, calendars),
+        host, port, limit=MAX_LINE_BYTES, backlog=LISTEN_BACKLOG
+    )
+
+async def serve(host, port, data_dir=None, max_open=MAX_OPEN_STORES):
+    """
+    Runs the server until it is cancelled.
+    """
+    calendars = UserCalendars(data_dir, max_open)
+    server = await start_server(calendars, host, port)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"AI Calendar Agent server listening on {addresses}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        calendars.close()
+
+def main(argv=None):
+    """
+    Parses command-line options and runs the server.
+    """
+    parser = argparse.ArgumentParser(description="Multi-user AI Calendar Agent server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data-dir", help="Keep one SQLite calendar per user in this directory "
+                                           "(default: in-memory only)")
+    parser.add_argument("--max-open", type=int, default=MAX_OPEN_STORES,
+                        help=f"SQLite calendars kept open at once (default: {MAX_OPEN_STORES})")
+    args = parser.parse_args(argv)
+
+    if args.data_dir:
+        os.makedirs(args.data_dir, exist_ok=True)
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args.host, args.port, args.data_dir, args.max_open))
+    except KeyboardInterrupt:
+        print("Goodbye!")
+
+if __name__ == "__main__":
+    main()   # python calendar_server.py [--port 8765] [--data-dir calendars/]
+
+# Try it with:
+# printf '{"user": "alice", "command": "add standup today at 09:00"}\n' | nc localhost 8765
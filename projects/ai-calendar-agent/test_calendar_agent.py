@@ -0,0 +1,352 @@
+"""
+Tests for the calendar stores and commands in calendar_agent.py.
+
+Run with:
+    python -m pytest -q
+"""
+
+import io
+import os
+import sys
+import random
+import datetime
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import calendar_agent
+from calendar_agent import (
+    EventStore, SQLiteEventStore, SortedKeys, Recurrence, MAX_DAY, MAX_UPCOMING_PAGE_SIZE, HELP_TEXT,
+    find_conflicts, find_free_slots, process_command, run_batch, upcoming_events_page,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """Provide an empty store of each backend."""
+    store = EventStore() if request.param == "memory" else SQLiteEventStore(str(tmp_path / "calendar.db"))
+    yield store
+    store.close()
+
+
+def day(offset):
+    """The date `offset` days from today, as YYYY-MM-DD."""
+    return (datetime.date.today() + datetime.timedelta(days=offset)).isoformat()
+
+
+def random_commands(count, rng):
+    """A random mix of every kind of command over the next few weeks."""
+    commands = []
+    for i in range(count):
+        when = day(rng.randrange(-2, 20))
+        at = f"{rng.randrange(24):02d}:{rng.choice(['00', '15', '30', '45'])}"
+        roll = rng.random()
+        if roll < 0.35:
+            commands.append(f"add event {i} on {when} at {at} for {rng.randrange(15, 300)} minutes")
+        elif roll < 0.4:
+            commands.append(f"add holiday {i} on {when}")
+        elif roll < 0.45:
+            commands.append(f"add series {i} every {rng.randrange(1, 8)} days from {when} at {at} "
+                            f"for {rng.randrange(1, 10)} times")
+        elif roll < 0.55:
+            commands.append(f"view events on {when}")
+        elif roll < 0.65:
+            commands.append(f"show next {rng.randrange(1, 15)} events")
+        elif roll < 0.75:
+            commands.append(f"delete event {rng.randrange(1, i + 2)}")
+        elif roll < 0.85:
+            commands.append(f"check conflicts on {when} at {at} for {rng.randrange(15, 240)} minutes")
+        elif roll < 0.95:
+            commands.append(f"find free slots on {when}")
+        else:
+            commands.append("view all events")
+    return commands
+
+
+class TestSortedKeys:
+    """Test the chunked sorted list behind EventStore's date index."""
+
+    def test_matches_a_sorted_list(self, monkeypatch):
+        """Test adds, removes and range scans against a plain sorted list."""
+        monkeypatch.setattr(SortedKeys, "CHUNK_SIZE", 4)
+        rng = random.Random(0)
+        keys, expected = SortedKeys(), []
+        for step in range(3000):
+            if expected and rng.random() < 0.45:
+                key = expected.pop(rng.randrange(len(expected)))
+                keys.remove(key)
+            else:
+                key = (rng.randrange(30), rng.randrange(-1, 20), step)
+                expected.append(key)
+                expected.sort()
+                keys.add(key)
+            if step % 100 == 0:
+                assert list(keys) == expected and len(keys) == len(expected)
+                lo, hi = (rng.randrange(30),), (rng.randrange(30), rng.randrange(20))
+                assert list(keys.irange(lo, hi)) == [key for key in expected if lo <= key < hi]
+                if expected:
+                    after = rng.choice(expected)
+                    assert list(keys.irange(after, inclusive=False)) == [key for key in expected if key > after]
+
+
+class TestUpcomingPages:
+    """Test paging through the upcoming view with page tokens."""
+
+    def test_pages_cover_every_occurrence_once(self, store):
+        """Test that following the tokens lists each event once, in order."""
+        today = datetime.date.today()
+        process_command(f"add standup daily from {day(0)} at 09:30 for 40 times", store)
+        process_command(f"add review every 3 days from {day(1)} at 09:30 for 12 times", store)
+        for offset in range(0, 40, 4):
+            process_command(f"add meeting {offset} on {day(offset)} at 09:30", store)
+            process_command(f"add holiday {offset} on {day(offset)}", store)
+
+        seen, token = [], None
+        while True:
+            events, token = upcoming_events_page(7, token, store)
+            seen.extend(events)
+            if token is None:
+                break
+        assert [event.sort_key() for event in seen] == [event.sort_key() for event in store.upcoming(today)]
+        assert len(seen) == 40 + 12 + 20
+        assert len({(event.id, event.day) for event in seen}) == len(seen)
+
+    def test_next_page_hint_resumes_the_view(self, store):
+        """Test that the command printed under a page shows the next page."""
+        process_command(f"add standup daily from {day(0)} at 09:30 for 5 times", store)
+        first = process_command("show next 3 events", store)
+        hint = first.splitlines()[-1].removeprefix("More: `").removesuffix("`")
+        second = process_command(hint, store)
+        assert first.count("standup") == 3 and second.count("standup") == 2
+        assert "More:" not in second
+
+    def test_page_token_outside_the_date_range(self, store):
+        """Test that a token with an impossible day is rejected."""
+        assert process_command("show next 3 events after 99999999:0:0", store) == (
+            "Invalid page token '99999999:0:0'.")
+        assert process_command("show next 3 events after -5:0:0", store) == "Invalid page token '-5:0:0'."
+        for token in ("739599:99999999999999999999:1", "739599:1440:1", "739599:-2:1",
+                      "739599:600:99999999999999999999", "739599:600:-9223372036854775809"):
+            assert process_command(f"show next 3 events after {token}", store) == f"Invalid page token '{token}'."
+        assert process_command("show next 3 events after 739599:-1:9223372036854775807", store) != (
+            "Invalid page token '739599:-1:9223372036854775807'.")
+
+    def test_page_size_is_capped(self, store):
+        """Test that asking for more than a page shows one full page and says so."""
+        process_command(f"add standup daily from {day(0)} at 09:30", store)
+        lines = process_command("show next 100000 events", store).splitlines()
+        assert lines[0] == f"Showing {MAX_UPCOMING_PAGE_SIZE} events, the most a page can hold."
+        assert len([line for line in lines if line.startswith("- ")]) == MAX_UPCOMING_PAGE_SIZE
+        assert lines[-1].startswith(f"More: `show next {MAX_UPCOMING_PAGE_SIZE} events after ")
+
+
+class TestRecurringCommands:
+    """Test which add commands create a recurring series."""
+
+    @pytest.mark.parametrize("command, title", [
+        ("add standup weekly on 2030-01-01", "standup weekly"),
+        ("add standup daily 2030-01-01 at 09:30", "standup daily"),
+        ("add standup daily on 2030-01-01 at 09:30", "standup daily"),
+    ])
+    def test_bare_frequency_word_adds_one_event(self, store, command, title):
+        """Test that daily/weekly without 'from' stays part of a single event's title."""
+        assert process_command(command, store).startswith(f"Event '{title}' added for 2030-01-01")
+        assert [event.title for event in store.upcoming(datetime.date(2030, 1, 1))] == [title]
+
+    @pytest.mark.parametrize("command", [
+        "add standup weekly from 2030-01-01",
+        "add standup daily starting 2030-01-01 at 09:30",
+        "add standup every week on 2030-01-01",
+        "add standup every 7 days 2030-01-01",
+    ])
+    def test_explicit_forms_add_a_series(self, store, command):
+        """Test that 'daily|weekly from' and 'every ...' still add a series."""
+        assert process_command(command, store).startswith("Recurring event 'standup' added")
+        assert len(store.upcoming(datetime.date(2030, 1, 1), until=datetime.date(2030, 1, 15))) >= 3
+
+
+class TestOverflow:
+    """Test inputs that reach past the dates datetime.date can represent."""
+
+    def test_recurrence_count_is_cut_at_the_last_date(self, store):
+        """Test that a huge occurrence count ends the series on 9999-12-31."""
+        response = process_command("add x every 365 days from 2025-01-01 for 100000 times", store)
+        assert response.endswith("until 9999-12-31.")
+        rule = Recurrence.from_datetime(1, "x", datetime.date(2025, 1, 1), None, 365, count=100000)
+        assert rule.last_day == MAX_DAY
+
+    def test_series_stop_at_the_last_date(self, store):
+        """Test that open-ended series and huge intervals never pass 9999-12-31."""
+        process_command("add z daily from 9999-12-30 at 23:30", store)
+        process_command("add y every 99999999999999999999 days from 9999-12-30 at 23:00", store)
+        response = process_command("check conflicts on 9999-12-31 at 23:45", store)
+        assert response.splitlines()[1:] == ["- [9999-12-31 23:30] z"]
+        assert [event.day for event in store.upcoming(datetime.date(9999, 12, 30))] == [MAX_DAY - 1] * 2 + [MAX_DAY]
+
+
+class TestBackendParity:
+    """Test that the in-memory and SQLite stores answer every command alike."""
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_random_command_stream(self, tmp_path, seed):
+        """Test that both backends give the same response to each command."""
+        commands = random_commands(300, random.Random(seed))
+        memory, sqlite = EventStore(), SQLiteEventStore(str(tmp_path / "calendar.db"))
+        try:
+            for command in commands:
+                assert process_command(command, memory) == process_command(command, sqlite), command
+            assert len(memory) == len(sqlite)
+        finally:
+            sqlite.close()
+
+    @pytest.mark.parametrize("event_id", [2 ** 63 - 1, 2 ** 63, 99999999999999999999999])
+    def test_huge_id_is_not_found(self, store, event_id):
+        """Test that an ID past SQLite's integer range is simply not found."""
+        process_command(f"add meeting on {day(1)} at 10:00", store)
+        assert process_command(f"delete event {event_id}", store) == f"No event found with ID {event_id}."
+        assert store.get(event_id) is None and len(store) == 1
+
+
+class TestConflictsAcrossMidnight:
+    """Test overlaps of events that run past midnight."""
+
+    def test_late_event_conflicts_with_the_next_morning(self, store):
+        """Test that an event ending after midnight blocks the next day's start."""
+        date = datetime.date.today() + datetime.timedelta(days=5)
+        next_day = date + datetime.timedelta(days=1)
+        process_command(f"add party on {date.isoformat()} at 23:00 for 3 hours", store)
+        assert [event.title for event in find_conflicts(next_day, datetime.time(1, 0), store=store)] == ["party"]
+        assert find_conflicts(next_day, datetime.time(2, 0), store=store) == []
+        assert "[{} 23:00-02:00] party".format(date.isoformat()) in process_command(
+            f"check conflicts on {next_day.isoformat()} at 00:30", store)
+
+    def test_recurring_late_event_conflicts_each_night(self, store):
+        """Test that every occurrence of a late series reaches into the next day."""
+        date = datetime.date.today() + datetime.timedelta(days=5)
+        process_command(f"add night shift daily from {date.isoformat()} at 22:00 for 8 hours", store)
+        for offset in (1, 2, 3):
+            morning = date + datetime.timedelta(days=offset)
+            conflicts = find_conflicts(morning, datetime.time(5, 0), store=store)
+            assert [event.date for event in conflicts] == [morning - datetime.timedelta(days=1)]
+
+    def test_overnight_event_leaves_the_next_workday_free(self, store):
+        """Test that an event ending before 09:00 does not take working time."""
+        date = datetime.date.today() + datetime.timedelta(days=5)
+        next_day = date + datetime.timedelta(days=1)
+        process_command(f"add flight on {date.isoformat()} at 23:00 for 8 hours", store)
+        start = next_day.toordinal() * calendar_agent.MINUTES_PER_DAY
+        assert find_free_slots(next_day, next_day, store=store) == [(start + 9 * 60, start + 18 * 60)]
+        process_command(f"add redeye on {date.isoformat()} at 23:00 for 11 hours", store)
+        assert find_free_slots(next_day, next_day, store=store) == [(start + 10 * 60, start + 18 * 60)]
+
+
+class TestDispatch:
+    """Test which handler answers a command."""
+
+    @pytest.mark.parametrize("command", ["hi view all events", "help view all events", "hello show my schedule"])
+    def test_upcoming_phrase_after_a_greeting(self, store, command):
+        """Test that an upcoming-view phrase anywhere in the command still lists events."""
+        process_command(f"add meeting on {day(1)} at 10:00", store)
+        assert process_command(command, store).startswith("Upcoming Events:")
+
+    @pytest.mark.parametrize("command", ["help", "hi", "hello"])
+    def test_help_words(self, store, command):
+        """Test that a help word on its own shows the help text."""
+        assert process_command(command, store) == HELP_TEXT
+
+
+class TestBatch:
+    """Test batch mode and bulk() transactions."""
+
+    @pytest.fixture
+    def sqlite_calendar(self, tmp_path, monkeypatch):
+        """Make a SQLite store the global calendar, as `--db` does."""
+        path = str(tmp_path / "calendar.db")
+        store = SQLiteEventStore(path)
+        monkeypatch.setattr(calendar_agent, "calendar_store", store)
+        yield path, store
+        store.close()
+
+    def test_responses_stop_at_exit(self, sqlite_calendar):
+        """Test one response line per command, skipping blanks and stopping at 'exit'."""
+        lines = [f"add a on {day(1)}\n", "\n", f"view events on {day(1)}\n", "exit\n", f"add b on {day(1)}\n"]
+        out = io.StringIO()
+        assert run_batch(lines, out) == 2
+        responses = out.getvalue().splitlines()
+        assert responses[0].startswith("Event 'a' added") and responses[-1].endswith("a")
+        assert len(sqlite_calendar[1]) == 1
+
+    def test_failing_command_does_not_end_the_batch(self, sqlite_calendar, monkeypatch):
+        """Test that a command that raises is reported on its line and its group is still committed."""
+        add = calendar_agent.add_event_to_calendar
+
+        def add_or_fail(title, *args, **kwargs):
+            if title == "boom":
+                raise RuntimeError("disk on fire")
+            return add(title, *args, **kwargs)
+
+        monkeypatch.setattr(calendar_agent, "add_event_to_calendar", add_or_fail)
+        lines = [f"add a on {day(1)}", f"add boom on {day(1)}", f"add b on {day(1)}", "view all events"]
+        out = io.StringIO()
+        assert run_batch(lines, out, group_adds=True) == 4
+        responses = out.getvalue().splitlines()
+        assert responses[1] == "The command failed (RuntimeError: disk on fire)."
+        assert responses[2].startswith("Event 'b' added")
+
+        reopened = SQLiteEventStore(sqlite_calendar[0])
+        assert [event.title for event in reopened.upcoming(datetime.date.today())] == ["a", "b"]
+        reopened.close()
+
+    def test_bulk_commits_once_and_rolls_back_on_error(self, tmp_path):
+        """Test that bulk() writes are invisible until the block ends, and dropped if it raises."""
+        path = str(tmp_path / "calendar.db")
+        store, reader = SQLiteEventStore(path), SQLiteEventStore(path)
+        date = datetime.date.today()
+        with store.bulk():
+            store.add("a", date)
+            store.add("b", date)
+            assert len(reader) == 0
+        assert len(reader) == 2
+        with pytest.raises(RuntimeError):
+            with store.bulk():
+                store.add("c", date)
+                raise RuntimeError
+        assert len(store) == len(reader) == 2
+        reader.close()
+        store.close()
+
+
+class TestIds:
+    """Test that event IDs only ever increase."""
+
+    def test_deleted_ids_are_not_reused(self, store):
+        """Test that deleting the newest event does not free its ID."""
+        date = datetime.date.today()
+        first, second = store.add("a", date), store.add("b", date)
+        assert store.delete(second.id)
+        assert store.add("c", date).id == second.id + 1
+        assert store.delete(first.id)
+        assert store.add_recurring("d", date, None, 1).id == second.id + 2
+
+    @pytest.mark.parametrize("batch_size", [1, 100])
+    def test_ids_keep_increasing_after_reopening(self, tmp_path, batch_size):
+        """Test that a reopened SQLite file continues after the last ID ever given out."""
+        path = str(tmp_path / "calendar.db")
+        date = datetime.date.today()
+        store = SQLiteEventStore(path, batch_size=batch_size)
+        ids = [store.add(title, date).id for title in "abc"]
+        store.delete(ids[-1])
+        store.close()
+
+        store = SQLiteEventStore(path, batch_size=batch_size)
+        assert store.add("d", date).id == ids[-1] + 1
+        rule = store.add_recurring("e", date, None, 7)
+        store.delete(rule.id)
+        store.close()
+
+        store = SQLiteEventStore(path)
+        assert store.add("f", date).id == rule.id + 1
+        assert sorted(event.title for event in store.upcoming(date)) == ["a", "b", "d", "f"]
+        store.close()
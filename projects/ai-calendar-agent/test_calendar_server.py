@@ -0,0 +1,147 @@
+"""
+Tests for the multi-user server in calendar_server.py.
+
+Run with:
+    python -m pytest -q
+"""
+
+import os
+import sys
+import json
+import asyncio
+import datetime
+import threading
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import calendar_server
+from calendar_server import MAX_LINE_BYTES, LINE_TOO_LONG, UserCalendars, start_server
+
+TOMORROW = (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+
+
+@pytest.fixture
+def gated_commands(monkeypatch):
+    """Make the command 'wait' block its worker thread until the returned event is set."""
+    gate = threading.Event()
+    process_command = calendar_server.process_command
+
+    def gated(command, store=None):
+        if command == "wait":
+            gate.wait(5)
+            return "done waiting"
+        if command == "boom":
+            raise RuntimeError("disk on fire")
+        return process_command(command, store)
+
+    monkeypatch.setattr(calendar_server, "process_command", gated)
+    yield gate
+    gate.set()
+
+
+async def until(condition, timeout=5.0):
+    """Yield to the event loop until condition() is true."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+class TestUserCalendars:
+    """Test the per-user stores and the cap on open SQLite stores."""
+
+    def test_least_recently_used_store_is_closed(self, tmp_path):
+        """Test that a new user's store replaces the least recently used idle one."""
+        async def scenario():
+            calendars = UserCalendars(str(tmp_path), max_open=2)
+            try:
+                for user in ("alice", "bob"):
+                    await calendars.run(user, f"add {user} meeting on {TOMORROW} at 10:00")
+                await calendars.run("alice", f"view events on {TOMORROW}")  # bob is now least recent
+                await calendars.run("carol", f"view events on {TOMORROW}")
+                assert calendars.open_stores() == 2
+                assert calendars.session("bob")[0] is None and calendars.session("alice")[0] is not None
+                # bob's store is opened again, with his event still in it
+                assert "bob meeting" in await calendars.run("bob", f"view events on {TOMORROW}")
+                assert calendars.open_stores() == 2
+            finally:
+                calendars.close()
+
+        asyncio.run(scenario())
+
+    def test_new_user_waits_while_every_store_is_busy(self, tmp_path, gated_commands):
+        """Test that with max_open=1 a second user waits until the first user's command ends."""
+        async def scenario():
+            calendars = UserCalendars(str(tmp_path), max_open=1)
+            try:
+                alice = asyncio.create_task(calendars.run("alice", "wait"))
+                await until(lambda: calendars.open_stores() == 1)
+                bob = asyncio.create_task(calendars.run("bob", f"add call on {TOMORROW}"))
+                await asyncio.sleep(0.05)
+                assert not bob.done() and calendars.session("bob")[0] is None
+
+                gated_commands.set()
+                assert await alice == "done waiting"
+                assert (await bob).startswith("Event 'call' added")
+                assert calendars.open_stores() == 1 and calendars.session("alice")[0] is None
+            finally:
+                calendars.close()
+
+        asyncio.run(scenario())
+
+    @pytest.mark.parametrize("sqlite", [False, True])
+    def test_one_users_commands_run_in_arrival_order(self, tmp_path, sqlite):
+        """Test that concurrent commands for one user are applied in the order they arrive."""
+        async def scenario():
+            calendars = UserCalendars(str(tmp_path) if sqlite else None, max_open=1)
+            try:
+                commands = [f"add event {i} on {TOMORROW} at 10:00" for i in range(20)]
+                runs = [calendars.run("alice", command) for command in commands]
+                runs += [calendars.run("bob", command) for command in commands[:3]]
+                await asyncio.gather(*runs)
+                # Events at the same time are listed by ID, i.e. in the order they were added
+                listed = (await calendars.run("alice", f"view events on {TOMORROW}")).splitlines()[1:]
+                assert listed == [f"- [{TOMORROW} 10:00] event {i}" for i in range(20)]
+            finally:
+                calendars.close()
+
+        asyncio.run(scenario())
+
+
+class TestHandleClient:
+    """Test the line protocol over a real connection."""
+
+    def test_bad_requests_and_failing_commands_keep_the_connection(self, gated_commands):
+        """Test that errors are answered in order and the connection stays usable."""
+        async def scenario():
+            calendars = UserCalendars()
+            server = await start_server(calendars, port=0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+            async def send(line):
+                writer.write(line.encode() + b"\n")
+                await writer.drain()
+                return json.loads(await reader.readline())
+
+            try:
+                assert await send("not json") == {"error": "Request is not valid JSON."}
+                assert "error" in await send('{"user": "", "command": "help"}')
+                assert await send('{"user": "alice", "command": "boom", "id": 7}') == {
+                    "error": "The command failed on the server.", "id": 7}
+                reply = await send(json.dumps({"user": "alice", "command": f"add lunch on {TOMORROW}", "id": 8}))
+                assert reply["id"] == 8 and reply["response"].startswith("Event 'lunch' added")
+
+                assert await send('{"user": "alice", "command": "' + "x" * MAX_LINE_BYTES + '"}') == {
+                    "error": LINE_TOO_LONG}
+                assert await reader.readline() == b""
+            finally:
+                writer.close()
+                server.close()
+                await server.wait_closed()
+                calendars.close()
+
+        asyncio.run(scenario())
@@ -1,37 +1,55 @@
 import os
+import copy
+import json
+import time
+import hashlib
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from dotenv import load_dotenv
-from crewai import Agent, Task, Crew, Process
-from crewai_tools import SerperDevTool
+
+from cache import ContentCache, InMemoryCacheBackend, open_content_cache
+from metrics import Counter, Gauge, Histogram
+
+# crewai and crewai_tools take seconds to import, so they are loaded on the
+# first crew run rather than when this module (and so main) is imported.
+# See _load_crewai(); names already set here are kept, which lets tests
+# patch them. With CONTENT_BACKEND=fake they come from fake_llm instead.
+Agent = Task = Crew = Process = None
+SerperDevTool = None
 
 # Load environment variables from .env file
 load_dotenv()
 
+# The LLM backend: "crewai" (the default) runs the real crew against
+# OpenAI. "fake" runs fake_llm's local stand-in, which needs no API keys
+# and answers deterministically, for load tests and benchmarks.
+BACKENDS = ("crewai", "fake")
+CONTENT_BACKEND = os.getenv("CONTENT_BACKEND", "crewai")
+if CONTENT_BACKEND not in BACKENDS:
+    raise ValueError(f"Unknown CONTENT_BACKEND {CONTENT_BACKEND!r}; use one of {', '.join(BACKENDS)}.")
+
 # Check if necessary API keys are set
 # It's a good practice to validate keys at the start.
-if "OPENAI_API_KEY" not in os.environ:
-    raise ValueError("OPENAI_API_KEY not found in .env file. Please add it.")
-if "SERPER_API_KEY" not in os.environ:
-    print("Warning: SERPER_API_KEY not found. Web search capabilities will be limited.")
-    # You can decide to raise an error or continue with limited functionality.
-    search_tool = None
-else:
-    search_tool = SerperDevTool()
+if CONTENT_BACKEND == "crewai":
+    if "OPENAI_API_KEY" not in os.environ:
+        raise ValueError("OPENAI_API_KEY not found in .env file. Please add it.")
+    if "SERPER_API_KEY" not in os.environ:
+        print("Warning: SERPER_API_KEY not found. Web search capabilities will be limited.")
+        # You can decide to raise an error or continue with limited functionality.
 
-# 1. Define the Agents
-# This agent is responsible for researching the given topic.
-researcher = Agent(
+# Agent and task prompts. They are kept as plain data so that
+# crew_config_fingerprint() can tell when they change.
+RESEARCHER_CONFIG = dict(
   role='Senior Research Analyst',
   goal='Uncover groundbreaking technologies and trends about {topic}',
   backstory="""You are a world-class research analyst. Your expertise lies in
   identifying emerging trends and gathering in-depth information. You are
   known for your meticulous work and ability to provide concise, relevant data.""",
-  verbose=True,
-  allow_delegation=False,
-  tools=[search_tool] if search_tool else []
 )
 
-# Content Writer Agent - Takes researcher output and creates blog posts
-content_writer = Agent(
+CONTENT_WRITER_CONFIG = dict(
   role='Senior Content Writer',
   goal='Transform research findings into compelling, SEO-optimized blog posts about {topic}',
   backstory="""You are an expert content writer with over 10 years of experience in 
@@ -40,51 +58,523 @@ content_writer = Agent(
   You understand SEO best practices, content structure, and how to craft compelling 
   narratives that keep readers engaged from start to finish. Your writing style is 
   clear, authoritative, and accessible to both technical and non-technical audiences.""",
-  verbose=True,
-  allow_delegation=False
 )
 
-# 2. Define a function to create and run the crew
-def create_content_crew(topic: str):
+RESEARCH_TASK_CONFIG = dict(
+  description="""Conduct a comprehensive analysis of the latest trends
+      and key information about {topic}. Identify key players, innovations, and
+      potential future developments. Your final answer must be a full analysis report.""",
+  expected_output="A detailed report summarizing the key findings about {topic}.",
+)
+
+WRITING_TASK_CONFIG = dict(
+  description="""Using the research report from the researcher, write an engaging and SEO-optimized
+      blog post about {topic}. The post should be easy to read, informative, and
+      have a clear structure with a catchy title, introduction, main body, and a conclusion.
+      It should be at least 500 words long and incorporate the research findings naturally.""",
+  expected_output="A well-written blog post about {topic} in markdown format.",
+)
+
+# Appended to the writing task: style instructions when a request has
+# them, and the research report when it comes from the research cache
+# instead of the researcher's task in the same crew.
+WRITING_STYLE_TEMPLATE = """
+      Follow these instructions on style and length: {style}"""
+
+WRITING_RESEARCH_TEMPLATE = """
+
+      Base the post on this research report:
+      {report}"""
+
+# Research fan-out. With RESEARCH_FANOUT above 1, the angles the research
+# task asks for are split into that many groups, each researched by its
+# own crew at the same time, and the reports are merged for the writer.
+RESEARCH_ANGLES = ["key players", "innovations", "potential future developments"]
+RESEARCH_FANOUT = int(os.getenv("RESEARCH_FANOUT", "1"))
+RESEARCH_MAX_WORKERS = int(os.getenv("RESEARCH_MAX_WORKERS", "12"))
+
+RESEARCH_ANGLE_TEMPLATE = """
+      Focus only on these aspects of {topic}: {angles}. Other analysts cover the rest."""
+
+RESEARCH_MERGE_TEMPLATE = """## Research: {angles}
+
+{report}"""
+
+def research_angle_groups(fanout: int = None):
+    """
+    Splits RESEARCH_ANGLES round-robin into `fanout` groups (by default
+    RESEARCH_FANOUT, at most one angle per group).
+    """
+    fanout = max(1, min(RESEARCH_FANOUT if fanout is None else fanout, len(RESEARCH_ANGLES)))
+    return [RESEARCH_ANGLES[i::fanout] for i in range(fanout)]
+
+def _fanout_config():
+    # Only part of the fingerprints when on, so existing caches stay valid
+    if RESEARCH_FANOUT <= 1:
+        return {}
+    return {"fanout": [research_angle_groups(), RESEARCH_ANGLE_TEMPLATE, RESEARCH_MERGE_TEMPLATE]}
+
+def _fingerprint(config):
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+def search_enabled() -> bool:
+    """Whether the researcher searches the web: only with the crewai backend and SERPER_API_KEY set."""
+    return CONTENT_BACKEND == "crewai" and "SERPER_API_KEY" in os.environ
+
+def _model_name():
+    if CONTENT_BACKEND == "fake":
+        import fake_llm
+        return fake_llm.model_name()
+    return os.getenv("OPENAI_MODEL_NAME", "")
+
+def crew_config_fingerprint():
+    """
+    Returns a short hash of everything besides the topic that shapes the
+    generated content: the prompts, the model and whether web search is on.
+    Cached content is only reused while the fingerprint stays the same.
+    """
+    return _fingerprint({
+        "agents": [RESEARCHER_CONFIG, CONTENT_WRITER_CONFIG],
+        "tasks": [RESEARCH_TASK_CONFIG, WRITING_TASK_CONFIG, WRITING_STYLE_TEMPLATE, WRITING_RESEARCH_TEMPLATE],
+        "model": _model_name(),
+        "search": search_enabled(),
+        **_fanout_config(),
+    })
+
+def research_config_fingerprint():
+    """
+    Like crew_config_fingerprint(), but only for what shapes the research
+    report, so changing the writer keeps the cached research.
+    """
+    return _fingerprint({
+        "agent": RESEARCHER_CONFIG,
+        "task": RESEARCH_TASK_CONFIG,
+        "model": _model_name(),
+        "search": search_enabled(),
+        **_fanout_config(),
+    })
+
+# Research is the slow, search-heavy half of a crew run, and one report
+# serves every writing style, so reports are cached by topic on their own.
+# RESEARCH_CACHE_PATH names a SQLite file (in memory when unset);
+# RESEARCH_CACHE_TTL is in seconds, and 0 turns the cache off.
+_research_cache = None
+_research_cache_lock = threading.Lock()
+
+def get_research_cache():
+    """
+    Returns the research report cache, opening it on first use.
+    """
+    global _research_cache
+    with _research_cache_lock:
+        if _research_cache is None:
+            _research_cache = open_content_cache(
+                os.getenv("RESEARCH_CACHE_PATH"),
+                max_entries=int(os.getenv("RESEARCH_CACHE_MAX_ENTRIES", "1000")),
+                ttl_seconds=float(os.getenv("RESEARCH_CACHE_TTL", "86400")),
+                config_fingerprint=research_config_fingerprint(),
+            )
+        return _research_cache
+
+def close_research_cache():
+    """
+    Closes the research cache; the next get_research_cache() call reopens it.
+    """
+    global _research_cache
+    with _research_cache_lock:
+        if _research_cache is not None:
+            _research_cache.close()
+            _research_cache = None
+
+# Web search results, shared by every crew in the process: an identical
+# query within SEARCH_MEMO_TTL seconds is answered without calling Serper.
+search_memo = ContentCache(
+    InMemoryCacheBackend(int(os.getenv("SEARCH_MEMO_MAX_ENTRIES", "1000"))),
+    ttl_seconds=float(os.getenv("SEARCH_MEMO_TTL", "3600")),
+)
+
+def memoize_search(tool_class):
+    """
+    Returns a subclass of a search tool class whose results are memoized
+    in search_memo, keyed by the query arguments.
+    """
+    class MemoizedSearchTool(tool_class):
+        def _run(self, **kwargs):
+            key = json.dumps({**kwargs, "n_results": getattr(self, "n_results", None)},
+                             sort_keys=True, default=str)
+            result = search_memo.get(key)
+            if result is None:
+                result = super()._run(**kwargs)
+                search_memo.set(key, result)
+            # Each caller gets its own copy of the shared result
+            return copy.deepcopy(result)
+
+    MemoizedSearchTool.__name__ = MemoizedSearchTool.__qualname__ = f"Memoized{tool_class.__name__}"
+    return MemoizedSearchTool
+
+def _output_text(output):
+    # The text of a crewai TaskOutput: `raw`, or `raw_output` in older crewai
+    text = getattr(output, "raw", None) or getattr(output, "raw_output", None)
+    return text if isinstance(text, str) else None
+
+# Progress reporting: a caller that wants to follow a crew run sets this
+# to a callable taking (event, data) before calling create_content_crew.
+# Events: "research_started", then "research_done" with the report and
+# "writing_started" once the researcher's task has finished.
+crew_progress = contextvars.ContextVar("crew_progress", default=None)
+
+def report_research_done(output):
+    """Task callback for the research task: reports its output to the listener."""
+    report = crew_progress.get()
+    if report is not None:
+        report("research_done", {"report": _output_text(output) or str(output)})
+        report("writing_started", {})
+
+# Crew metrics, served by main's /metrics endpoint. The stages are the
+# crew's tasks, "research" and "writing", and "total" for the whole run.
+crew_runs = Counter("crew_runs_total", "Crew runs, by outcome and whether the research report was cached.",
+                    ["outcome", "research"])
+crews_running = Gauge("crew_runs_running", "Crews currently running.")
+crew_stage_seconds = Histogram("crew_stage_duration_seconds", "Duration of each crew stage.", ["stage"],
+                               buckets=(1, 2.5, 5, 10, 20, 30, 60, 90, 120, 180, 300, 600))
+crew_stage_output_chars = Histogram("crew_stage_output_chars", "Characters of output produced by each crew stage.",
+                                    ["stage"], buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000))
+
+def _task_seconds(task):
+    # How long a finished crewai task ran, if crewai recorded it
+    start, end = getattr(task, "start_time", None), getattr(task, "end_time", None)
+    if isinstance(start, datetime) and isinstance(end, datetime):
+        return (end - start).total_seconds()
+    return None
+
+def record_crew_timings(crew, result, seconds: float, research=None) -> dict:
+    """
+    Records the duration and output size of each stage of a finished crew
+    run, and returns them as {stage: {"seconds": ..., "chars": ...}}.
+    Values crewai did not record are None. `research` is the (seconds,
+    report) of research fanned out to other crews before this one.
+    """
+    outputs = {}  # stage -> (seconds, output text)
+    if research is not None:
+        outputs["research"] = research
+    tasks = getattr(crew, "tasks", None)
+    if isinstance(tasks, list):
+        stages = (["research"] if len(tasks) > 1 else []) + ["writing"]
+        for stage, task in zip(stages, tasks):
+            outputs[stage] = (_task_seconds(task), _output_text(getattr(task, "output", None)))
+    outputs["total"] = (seconds, result if isinstance(result, str) else _output_text(result))
+    timings = {}
+    for stage, (stage_seconds, text) in outputs.items():
+        timings[stage] = {"seconds": stage_seconds, "chars": len(text) if text is not None else None}
+        if stage_seconds is not None:
+            crew_stage_seconds.labels(stage=stage).observe(stage_seconds)
+        if text is not None:
+            crew_stage_output_chars.labels(stage=stage).observe(len(text))
+    return timings
+
+_load_lock = threading.Lock()
+
+def _load_crewai():
+    """Imports crewai and crewai_tools, or the fake backend, on first use."""
+    global Agent, Task, Crew, Process, SerperDevTool
+    with _load_lock:
+        if None in (Agent, Task, Crew, Process):
+            if CONTENT_BACKEND == "fake":
+                import fake_llm as crewai
+            else:
+                import crewai
+            Agent = crewai.Agent if Agent is None else Agent
+            Task = crewai.Task if Task is None else Task
+            Crew = crewai.Crew if Crew is None else Crew
+            Process = crewai.Process if Process is None else Process
+        if SerperDevTool is None and search_enabled():
+            from crewai_tools import SerperDevTool as serper_dev_tool
+            SerperDevTool = memoize_search(serper_dev_tool)
+
+# The search tool only holds configuration (its results are memoized in
+# search_memo), so one instance is shared
+search_tool = None
+
+def get_search_tool():
+    """
+    Returns the web search tool, creating it on first use, or None if
+    search is off (see search_enabled()).
+    """
+    global search_tool
+    if not search_enabled():
+        return None
+    _load_crewai()
+    with _load_lock:
+        if search_tool is None:
+            search_tool = SerperDevTool()
+        return search_tool
+
+# 1. Define the Agents
+def make_agents(**overrides):
+    """
+    Builds a new researcher and content writer. Keyword arguments (e.g.
+    llm, verbose, max_iter) override the defaults for both agents.
+
+    Returns:
+        tuple: (researcher, content_writer)
+    """
+    _load_crewai()
+    search = get_search_tool()
+    # This agent is responsible for researching the given topic.
+    new_researcher = Agent(**{
+      **RESEARCHER_CONFIG,
+      "verbose": True,
+      "allow_delegation": False,
+      "tools": [search] if search else [],
+      **overrides,
+    })
+
+    # Content Writer Agent - Takes researcher output and creates blog posts
+    new_content_writer = Agent(**{
+      **CONTENT_WRITER_CONFIG,
+      "verbose": True,
+      "allow_delegation": False,
+      **overrides,
+    })
+    return new_researcher, new_content_writer
+
+# Fixed agents. When set, every crew uses them instead of the cached ones.
+researcher = None
+content_writer = None
+
+# Agents are built once per crew worker thread and reused by every crew
+# that thread runs. They are not shared between threads: a crewai agent
+# keeps the executor of the task it is running on itself, so two crews
+# running the same agent at once would interfere.
+_thread_agents = threading.local()
+_agents_generation = 0
+
+def get_agents():
+    """
+    Returns the (researcher, content_writer) pair for the calling thread,
+    building it on first use.
+    """
+    if researcher is not None and content_writer is not None:
+        return researcher, content_writer
+    cached = getattr(_thread_agents, "agents", None)
+    if cached is None or _thread_agents.generation != _agents_generation:
+        cached = make_agents()
+        _thread_agents.agents, _thread_agents.generation = cached, _agents_generation
+    return (researcher if researcher is not None else cached[0],
+            content_writer if content_writer is not None else cached[1])
+
+def reset_agents():
+    """
+    Drops the cached agents, search tool and search results; every thread
+    builds new ones on its next crew run. Call this after changing the
+    configuration.
+    """
+    global _agents_generation, search_tool
+    with _load_lock:
+        _agents_generation += 1
+        search_tool = None
+    search_memo.clear()
+
+# 2. Define functions to build and run the crew
+def build_crew(topic: str, agents=None, style=None, research=None, **overrides):
+    """
+    Builds the crew for a topic. `agents` is a (researcher, content_writer)
+    pair and defaults to the cached agents; `style` adds instructions for
+    the writer. Given a `research` report, the crew only has the writing
+    task. Other keyword arguments override the Crew defaults.
+    """
+    _load_crewai()
+    task_researcher, task_writer = agents if agents is not None else get_agents()
+    report = crew_progress.get()
+
+    writing_description = WRITING_TASK_CONFIG["description"].format(topic=topic)
+    if style:
+        writing_description += WRITING_STYLE_TEMPLATE.format(style=style)
+    if research is not None:
+        writing_description += WRITING_RESEARCH_TEMPLATE.format(report=research)
+
+    # Define Tasks for the agents
+    tasks = []
+    if research is None:
+        tasks.append(Task(
+          description=RESEARCH_TASK_CONFIG["description"].format(topic=topic),
+          expected_output=RESEARCH_TASK_CONFIG["expected_output"].format(topic=topic),
+          agent=task_researcher,
+          # Only set when someone listens, so plain runs build the same Task as before
+          **({"callback": report_research_done} if report is not None else {})
+        ))
+
+    tasks.append(Task(
+      description=writing_description,
+      expected_output=WRITING_TASK_CONFIG["expected_output"].format(topic=topic),
+      agent=task_writer
+    ))
+
+    # 3. Instantiate the Crew
+    return Crew(**{
+      "agents": [task_researcher, task_writer] if research is None else [task_writer],
+      "tasks": tasks,
+      "process": Process.sequential,  # Tasks will be executed one after the other
+      "verbose": True, # Verbosity level for logging
+      **overrides,
+    })
+
+def _research_report(crew):
+    # The researcher's report from a finished two-task crew, if it has one
+    tasks = getattr(crew, "tasks", None)
+    if not isinstance(tasks, list) or len(tasks) < 2:
+        return None
+    text = _output_text(getattr(tasks[0], "output", None))
+    return text if text and text.strip() else None
+
+# Fanned-out research runs on its own thread pool, so a crew worker
+# waiting for its angles never holds up the angles of another crew.
+_research_executor = None
+_research_executor_lock = threading.Lock()
+
+def get_research_executor():
+    """
+    Returns the thread pool that researches angles, creating it on first use.
+    """
+    global _research_executor
+    with _research_executor_lock:
+        if _research_executor is None:
+            _research_executor = ThreadPoolExecutor(max_workers=RESEARCH_MAX_WORKERS,
+                                                    thread_name_prefix="research")
+        return _research_executor
+
+def shutdown_research_executor():
+    """
+    Stops the research thread pool, dropping angles that have not started yet.
+    """
+    global _research_executor
+    with _research_executor_lock:
+        if _research_executor is not None:
+            _research_executor.shutdown(wait=False, cancel_futures=True)
+            _research_executor = None
+
+def build_research_crew(topic: str, angles, agents=None, **overrides):
+    """
+    Builds a crew whose researcher only covers the given angles of a topic.
+    `agents` and other keyword arguments are as for build_crew().
+    """
+    _load_crewai()
+    task_researcher = (agents if agents is not None else get_agents())[0]
+    task = Task(
+      description=RESEARCH_TASK_CONFIG["description"].format(topic=topic)
+        + RESEARCH_ANGLE_TEMPLATE.format(topic=topic, angles=", ".join(angles)),
+      expected_output=RESEARCH_TASK_CONFIG["expected_output"].format(topic=topic),
+      agent=task_researcher
+    )
+    return Crew(**{
+      "agents": [task_researcher],
+      "tasks": [task],
+      "process": Process.sequential,
+      "verbose": True,
+      **overrides,
+    })
+
+def _research_angles(topic: str, angles):
+    # Runs on the research pool, whose threads keep their own agents
+    crew = build_research_crew(topic, angles)
+    crews_running.inc()
+    try:
+        result = crew.kickoff()
+    finally:
+        crews_running.dec()
+    text = result if isinstance(result, str) else _output_text(result)
+    return text if text is not None else str(result)
+
+def research_in_parallel(topic: str) -> str:
+    """
+    Researches each group of research_angle_groups() in its own crew, all
+    at once, and returns their reports merged into one. Reports a
+    "research_progress" event as each group finishes.
+    """
+    groups = research_angle_groups()
+    report = crew_progress.get()
+    executor = get_research_executor()
+    futures = {executor.submit(_research_angles, topic, group): index for index, group in enumerate(groups)}
+    reports = [None] * len(groups)
+    try:
+        for done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            reports[index] = future.result()
+            if report is not None:
+                report("research_progress", {"angles": groups[index], "done": done, "total": len(groups)})
+    except Exception:
+        for future in futures:
+            future.cancel()
+        raise
+    return "\n\n".join(RESEARCH_MERGE_TEMPLATE.format(angles=", ".join(group), report=text.strip())
+                       for group, text in zip(groups, reports))
+
+def create_content_crew(topic: str, style: str = None):
     """
     Creates and kicks off the CrewAI crew to generate a blog post.
     
     Args:
         topic (str): The topic for the blog post.
+        style (str): Optional instructions for the writer, e.g. tone or
+            length. Research is cached by topic alone, so a new style
+            for a recent topic only reruns the writer.
 
     Returns:
         str: The generated blog post content.
     """
-    # Define Tasks for the agents
-    task1 = Task(
-      description=f"""Conduct a comprehensive analysis of the latest trends
-      and key information about {topic}. Identify key players, innovations, and
-      potential future developments. Your final answer must be a full analysis report.""",
-      expected_output=f"A detailed report summarizing the key findings about {topic}.",
-      agent=researcher
-    )
+    research_cache = get_research_cache()
+    research = research_cache.get(topic)
+    research_label = "fresh" if research is None else "cached"
+    report = crew_progress.get()
+    fanned_out = None  # (seconds, report) of research fanned out to other crews
 
-    task2 = Task(
-      description=f"""Using the research report from the researcher, write an engaging and SEO-optimized
-      blog post about {topic}. The post should be easy to read, informative, and
-      have a clear structure with a catchy title, introduction, main body, and a conclusion.
-      It should be at least 500 words long and incorporate the research findings naturally.""",
-      expected_output=f"A well-written blog post about {topic} in markdown format.",
-      agent=content_writer
-    )
+    if research is None and RESEARCH_FANOUT > 1:
+        # 3. Research the topic's angles in parallel; the crew only writes
+        print(f"🔎 Researching {topic} from {len(research_angle_groups())} angles in parallel")
+        if report is not None:
+            report("research_started", {"topic": topic, "angles": research_angle_groups()})
+        start = time.perf_counter()
+        try:
+            research = research_in_parallel(topic)
+        except Exception:
+            crew_runs.labels(outcome="failed", research=research_label).inc()
+            raise
+        fanned_out = (time.perf_counter() - start, research)
+        research_cache.set(topic, research)
+        if report is not None:
+            report("research_done", {"report": research})
+            report("writing_started", {})
 
-    # 3. Instantiate the Crew
-    crew = Crew(
-      agents=[researcher, content_writer],
-      tasks=[task1, task2],
-      process=Process.sequential,  # Tasks will be executed one after the other
-      verbose=True # Verbosity level for logging
-    )
+    crew = build_crew(topic, style=style, research=research)
 
     # 4. Kick off the crew's work
     print(f"🚀 Kicking off the content creation crew for topic: {topic}")
-    result = crew.kickoff()
+    if report is not None and fanned_out is None:
+        if research is None:
+            report("research_started", {"topic": topic})
+        else:
+            report("research_done", {"report": research, "cached": True})
+            report("writing_started", {})
+    start = time.perf_counter()
+    crews_running.inc()
+    try:
+        result = crew.kickoff()
+    except Exception:
+        crew_runs.labels(outcome="failed", research=research_label).inc()
+        raise
+    finally:
+        crews_running.dec()
+    crew_runs.labels(outcome="succeeded", research=research_label).inc()
     print("✅ Crew execution finished.")
+    seconds = time.perf_counter() - start + (fanned_out[0] if fanned_out else 0)
+    timings = record_crew_timings(crew, result, seconds, research=fanned_out)
+    print("⏱️ Crew stages: " + ", ".join(
+        f"{stage} {timing['seconds']:.1f}s" for stage, timing in timings.items() if timing["seconds"] is not None))
+    if research is None:
+        # The research came from this crew's first task
+        new_research = _research_report(crew)
+        if new_research is not None:
+            research_cache.set(topic, new_research)
     return result
 
 # Example of how to run it directly (for testing)
@@ -0,0 +1,250 @@
+"""
+Archive of every generated blog post, with full-text search.
+
+The content cache only keeps a post for its TTL. The archive keeps the
+posts the crew generates in a SQLite database with an FTS5 index over the
+topic and the body, so editors can search and retrieve past posts, and a
+new request for a topic already written about can be answered from the
+archive instead of running the crew again.
+
+The index is an external-content FTS5 table: the text is stored once, in
+the posts table, and triggers keep the index in step with it. Search
+terms are matched after Porter stemming ("agents" finds "agent"), and
+results are ranked by BM25 with topic matches weighted above body
+matches. Reusing a post for the same topic in other words is an indexed
+lookup of the topic's sorted terms; only lower similarity thresholds
+need the full-text index.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from cache import normalize_topic
+
+# Words ignored when comparing topics, so "The Future of AI" and
+# "future AI" count as the same topic. Question words are kept: "How to
+# learn Rust" and "Why learn Rust" are different posts.
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the to with your".split()
+)
+
+# BM25 weights of the topic and content columns
+TOPIC_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+
+# Archived posts considered per lookup before comparing topics
+_CANDIDATES = 20
+
+
+def _words(text: str) -> List[str]:
+    # Hyphenated words stay whole, so "client-1 topic 10" and
+    # "client-10 topic 1" do not share all of their terms
+    return re.findall(r"\w+(?:-\w+)*", text.casefold())
+
+
+def topic_terms(topic: str) -> frozenset:
+    """The words of a topic that matter when comparing it with another."""
+    words = _words(topic)
+    return frozenset(word for word in words if word not in STOPWORDS) or frozenset(words)
+
+
+def topic_key(topic: str) -> str:
+    """A topic's terms in a canonical order: topics with the same key have a similarity of 1.0."""
+    return " ".join(sorted(topic_terms(topic)))
+
+
+def topic_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of two topics' terms: 1.0 for the same words in any order or case."""
+    terms_a, terms_b = topic_terms(a), topic_terms(b)
+    if not terms_a or not terms_b:
+        return 0.0
+    return len(terms_a & terms_b) / len(terms_a | terms_b)
+
+
+def fts_query(text: str, any_term: bool = False) -> str:
+    """
+    Turns free text into an FTS5 query that cannot be a syntax error: each
+    word becomes a quoted term. Terms are all required, or with
+    `any_term` any one of them is enough.
+    """
+    return (" OR " if any_term else " ").join(f'"{word}"' for word in _words(text))
+
+
+@dataclass
+class ArchivedPost:
+    """A generated post kept in the archive."""
+    id: int
+    topic: str
+    style: str
+    content: str
+    created_at: float
+
+
+@dataclass
+class ArchiveHit:
+    """A search result: a post without its body, with a snippet of the matching text."""
+    id: int
+    topic: str
+    style: str
+    created_at: float
+    snippet: str
+    score: float
+
+
+class ContentArchive:
+    """
+    Keeps posts in a SQLite database, in memory when no path is given.
+    Posts are stored with the crew configuration fingerprint they were
+    generated under, so lookups only reuse posts the current crew would
+    have written. With `max_posts`, only the newest `max_posts` posts are
+    kept; 0 keeps them all.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS posts ("
+        " id INTEGER PRIMARY KEY,"
+        " topic TEXT NOT NULL,"
+        " topic_key TEXT NOT NULL,"
+        " style TEXT NOT NULL,"
+        " style_key TEXT NOT NULL,"
+        " config_fingerprint TEXT NOT NULL,"
+        " content TEXT NOT NULL,"
+        " created_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_posts_topic_key"
+        " ON posts (topic_key, style_key, config_fingerprint, created_at)",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+        " topic, content, content='posts', content_rowid='id', tokenize='porter unicode61')",
+        # Ranks results by BM25 with the column weights, as FTS5's built-in rank
+        f"INSERT INTO posts_fts (posts_fts, rank) VALUES ('rank', 'bm25({TOPIC_WEIGHT}, {CONTENT_WEIGHT})')",
+        "CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN"
+        " INSERT INTO posts_fts (rowid, topic, content) VALUES (new.id, new.topic, new.content); END",
+        "CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN"
+        " INSERT INTO posts_fts (posts_fts, rowid, topic, content)"
+        " VALUES ('delete', old.id, old.topic, old.content); END",
+    )
+    _INSERT = (
+        "INSERT INTO posts (topic, topic_key, style, style_key, config_fingerprint, content, created_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)"
+    )
+    _SELECT = "SELECT id, topic, style, content, created_at FROM posts WHERE id = ?"
+    # The page is ranked first, so that snippets are only made for the
+    # posts returned rather than for every match
+    _SEARCH = (
+        "SELECT p.id, p.topic, p.style, p.created_at, snippet(posts_fts, 1, '**', '**', '…', 16), -page.rank"
+        " FROM (SELECT rowid, rank FROM posts_fts WHERE posts_fts MATCH ?1 ORDER BY rank LIMIT ?2 OFFSET ?3) page"
+        " JOIN posts_fts ON posts_fts.rowid = page.rowid JOIN posts p ON p.id = page.rowid"
+        " WHERE posts_fts MATCH ?1 ORDER BY page.rank"
+    )
+    _SAME_TOPIC = (
+        "SELECT id, topic, style, content, created_at FROM posts"
+        " WHERE topic_key = ? AND style_key = ? AND config_fingerprint = ? AND created_at >= ?"
+        " ORDER BY created_at DESC, id DESC LIMIT 1"
+    )
+    _CANDIDATES = (
+        "SELECT p.id, p.topic, p.style, p.content, p.created_at"
+        " FROM posts_fts JOIN posts p ON p.id = posts_fts.rowid"
+        " WHERE posts_fts MATCH ? AND p.style_key = ? AND p.config_fingerprint = ? AND p.created_at >= ?"
+        f" ORDER BY rank LIMIT {_CANDIDATES}"
+    )
+    _COUNT = "SELECT COUNT(*) FROM posts"
+    # IDs only grow and only the oldest posts are ever deleted, so the
+    # posts past max_posts are the ones with the lowest IDs
+    _TRIM = "DELETE FROM posts WHERE id <= ?"
+
+    def __init__(self, path: Optional[str] = None, max_posts: int = 0):
+        # One connection shared by the worker threads, guarded by a lock
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        self.max_posts = max_posts
+        self.reused = 0
+        self.lookups = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self._SCHEMA:
+                self._conn.execute(statement)
+            self._conn.commit()
+        # A search for a common word ranks most of the archive and can take
+        # tens of milliseconds, while lookups run on the request path. With
+        # a file, searches get a connection of their own, which WAL lets
+        # read alongside the writes and lookups on the main one.
+        if path:
+            self._search_conn = sqlite3.connect(path, check_same_thread=False)
+            self._search_lock = threading.Lock()
+        else:
+            self._search_conn, self._search_lock = self._conn, self._lock
+
+    def add(self, topic: str, content: str, style: str = "", config_fingerprint: str = "") -> int:
+        """Archive a generated post; returns its ID."""
+        with self._lock:
+            cursor = self._conn.execute(self._INSERT, (topic, topic_key(topic), style, normalize_topic(style),
+                                                       config_fingerprint, content, time.time()))
+            if self.max_posts > 0:
+                self._conn.execute(self._TRIM, (cursor.lastrowid - self.max_posts,))
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def get(self, post_id: int) -> Optional[ArchivedPost]:
+        with self._lock:
+            row = self._conn.execute(self._SELECT, (post_id,)).fetchone()
+        return ArchivedPost(*row) if row else None
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[ArchiveHit]:
+        """
+        Posts whose topic or body contains every word of the query, best
+        matches first.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        with self._search_lock:
+            rows = self._search_conn.execute(self._SEARCH, (match, limit, offset)).fetchall()
+        return [ArchiveHit(*row) for row in rows]
+
+    def find(self, topic: str, style: str = "", config_fingerprint: str = "",
+             max_age: float = 30 * 86400, min_similarity: float = 1.0) -> Optional[ArchivedPost]:
+        """
+        The newest post archived within `max_age` seconds, with the same
+        style and configuration, whose topic has a `topic_similarity` of
+        at least `min_similarity` to `topic`; None if there is none.
+        """
+        filters = (normalize_topic(style), config_fingerprint, time.time() - max_age)
+        if min_similarity >= 1.0:
+            with self._lock:
+                row = self._conn.execute(self._SAME_TOPIC, (topic_key(topic),) + filters).fetchone()
+            post = ArchivedPost(*row) if row else None
+        else:
+            post = self._find_similar(topic, filters, min_similarity)
+        with self._lock:
+            self.lookups += 1
+            if post is not None:
+                self.reused += 1
+        return post
+
+    def _find_similar(self, topic: str, filters: tuple, min_similarity: float) -> Optional[ArchivedPost]:
+        # The best ranked posts sharing a word with the topic, compared by topic_similarity
+        match = fts_query(" ".join(topic_terms(topic)), any_term=True)
+        if not match:
+            return None
+        with self._lock:
+            rows = self._conn.execute(self._CANDIDATES, (f"topic : ({match})",) + filters).fetchall()
+        # The most similar post; the newest among equally similar ones
+        ranked = [(topic_similarity(topic, post.topic), post.created_at, post.id, post)
+                  for post in (ArchivedPost(*row) for row in rows)]
+        ranked = [entry for entry in ranked if entry[0] >= min_similarity]
+        return max(ranked, key=lambda entry: entry[:3])[3] if ranked else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            posts = self._conn.execute(self._COUNT).fetchone()[0]
+        return {"posts": posts, "lookups": self.lookups, "reused": self.reused}
+
+    def close(self):
+        with self._search_lock:
+            self._search_conn.close()
+        with self._lock:
+            self._conn.close()
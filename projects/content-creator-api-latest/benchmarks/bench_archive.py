@@ -0,0 +1,106 @@
+"""
+Measures the content archive at the scale of tens of thousands of posts.
+
+Fills a file-backed ContentArchive with --posts synthetic posts, then
+times full-text searches, the topic lookup run before each crew run
+(ContentArchive.find) and fetching posts by ID. Each post is built from
+paragraphs of the blog's own articles (posts/ at the top of the
+repository) under a topic made of words from their titles, so the index
+sees a realistic vocabulary.
+
+Usage:
+    python benchmarks/bench_archive.py
+    python benchmarks/bench_archive.py --posts 50000 --chars 6000 --lookups 2000
+"""
+
+import os
+import sys
+import glob
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POSTS_DIR = os.path.join(PROJECT_DIR, "..", "..", "posts")
+
+# Add the project root to the Python path
+sys.path.insert(0, PROJECT_DIR)
+
+from archive import ContentArchive, topic_terms
+
+QUERIES = ["agents", "machine learning", "error messages", "fine tuning models", "kubernetes"]
+
+
+def load_corpus():
+    """Paragraphs and title words of the blog's posts."""
+    paragraphs, words = [], set()
+    for path in sorted(glob.glob(os.path.join(POSTS_DIR, "*.md"))):
+        with open(path, encoding="utf-8") as f:
+            paragraphs += [p.strip() for p in f.read().split("\n\n") if len(p.strip()) > 80]
+        words |= topic_terms(os.path.basename(path)[:-3])
+    return paragraphs, sorted(words)
+
+
+def describe(latencies):
+    """p50, p99 and max of a list of seconds, in milliseconds."""
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return f"p50 {cuts[49] * 1e3:7.3f} ms   p99 {cuts[98] * 1e3:7.3f} ms   max {max(latencies) * 1e3:7.3f} ms"
+
+
+def timed(fn, args_list):
+    """Calls fn(*args) for each args; returns (latencies, results)."""
+    latencies, results = [], []
+    for args in args_list:
+        start = time.perf_counter()
+        results.append(fn(*args))
+        latencies.append(time.perf_counter() - start)
+    return latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the content archive")
+    parser.add_argument("--posts", type=int, default=20000, help="Posts to archive")
+    parser.add_argument("--chars", type=int, default=4000, help="Approximate characters per post")
+    parser.add_argument("--lookups", type=int, default=1000, help="Searches, finds and gets to time")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    paragraphs, words = load_corpus()
+    topics = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "archive.db")
+        archive = ContentArchive(path)
+        start = time.perf_counter()
+        for _ in range(args.posts):
+            topic = " ".join(rng.sample(words, rng.randint(2, 5))).title()
+            body = []
+            while sum(map(len, body)) < args.chars:
+                body.append(rng.choice(paragraphs))
+            archive.add(topic, f"# {topic}\n\n" + "\n\n".join(body))
+            topics.append(topic)
+        elapsed = time.perf_counter() - start
+        size = sum(os.path.getsize(p) for p in glob.glob(path + "*"))
+        print(f"archived {args.posts:,} posts of ~{args.chars:,} chars in {elapsed:.1f} s "
+              f"({args.posts / elapsed:,.0f} posts/s); database {size / 1e6:.0f} MB")
+
+        for query in QUERIES:
+            matches = len(archive.search(query, limit=10 ** 9))
+            latencies, _ = timed(archive.search, [(query,)] * (args.lookups // 10))
+            print(f"search {query!r:22} {matches:>7,} matches, top 20: {describe(latencies)}")
+
+        # Half repeat an archived topic in other words, half are new topics
+        requests = [(" ".join(reversed(rng.choice(topics).split())),) if i % 2 else
+                    (" ".join(rng.sample(words, 3)),) for i in range(args.lookups)]
+        latencies, found = timed(archive.find, requests)
+        print(f"find, {sum(p is not None for p in found):,} of {len(requests):,} reused:  {describe(latencies)}")
+
+        latencies, _ = timed(archive.get, [(rng.randint(1, args.posts),) for _ in range(args.lookups)])
+        print(f"get by id:                              {describe(latencies)}")
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
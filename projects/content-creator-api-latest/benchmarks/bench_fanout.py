@@ -0,0 +1,68 @@
+"""
+Measures what research fan-out saves, using the fake LLM backend.
+
+For each --fanout level, runs create_content_crew() for --topics new
+topics twice: once with the research pool limited to one thread, so the
+angle groups are researched one after another, and once in parallel.
+Both runs do the same work, so the difference is the wall-clock time
+fan-out saves. Research and total times are medians, taken from the
+crew's progress events.
+
+The fake LLM takes --latency seconds for any task, however broad, so
+this shows the effect of running the groups concurrently. It does not
+show how much faster a narrower task is than the single broad research
+task (fan-out 1), which depends on the real model and searches.
+
+Usage:
+    python benchmarks/bench_fanout.py
+    python benchmarks/bench_fanout.py --latency 1.0 --topics 3 --fanout 1 2 3
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def timed_run(agent, topic):
+    """Runs the crew for a topic; returns (research seconds, total seconds)."""
+    times = {}
+    token = agent.crew_progress.set(lambda event, data: times.setdefault(event, time.perf_counter()))
+    start = time.perf_counter()
+    try:
+        agent.create_content_crew(topic)
+    finally:
+        agent.crew_progress.reset(token)
+    total = time.perf_counter() - start
+    return times["research_done"] - times["research_started"], total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark research fan-out with the fake LLM")
+    parser.add_argument("--fanout", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM seconds per task")
+    parser.add_argument("--topics", type=int, default=3, help="Runs per configuration")
+    args = parser.parse_args()
+
+    os.environ.update(CONTENT_BACKEND="fake", FAKE_LLM_LATENCY=str(args.latency), RESEARCH_CACHE_TTL="0")
+    import agent
+
+    print(f"fake LLM: {args.latency}s per task; median of {args.topics} runs")
+    print(f"{'fanout':>6} {'workers':>8} {'research s':>11} {'total s':>8}")
+    for fanout in args.fanout:
+        for workers in ([1, fanout] if fanout > 1 else [1]):
+            with patch.object(agent, "RESEARCH_FANOUT", fanout), patch.object(agent, "RESEARCH_MAX_WORKERS", workers):
+                agent.shutdown_research_executor()
+                runs = [timed_run(agent, f"Fan-out {fanout}/{workers} topic {i}") for i in range(args.topics)]
+            agent.shutdown_research_executor()
+            research, total = (statistics.median(values) for values in zip(*runs))
+            print(f"{fanout:>6} {workers:>8} {research:>11.2f} {total:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measures what importing the API costs, using `python -X importtime`.
+
+Importing main should not load crewai: agent.py imports it on the first
+crew run. For comparison the script also times importing crewai and
+crewai_tools themselves, which is what every worker (and every test
+collection) paid at startup before.
+
+Each import runs in a fresh interpreter, so nothing is already cached in
+sys.modules. The figures are medians over --runs runs.
+
+Usage:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --runs 10 --top 15
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATEMENTS = [
+    ("import main", "import main"),
+    ("import agent", "import agent"),
+    ("import crewai, crewai_tools", "import crewai, crewai_tools"),
+]
+
+
+def import_times(statement):
+    """
+    Runs `statement` under -X importtime in a fresh interpreter; returns
+    {module: cumulative microseconds} and whether crewai got loaded.
+    """
+    code = f"{statement}\nimport sys\nprint('crewai' in sys.modules)"
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "bench")}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_DIR,
+                            env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented below the module that imported them
+        times[name[1:].rstrip()] = int(cumulative)
+    return times, result.stdout.splitlines()[-1] == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import times")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports of main to list")
+    args = parser.parse_args()
+
+    print(f"{'statement':<30} {'median (ms)':>12} {'loads crewai':>13}")
+    for label, statement in STATEMENTS:
+        runs = [import_times(statement) for _ in range(args.runs)]
+        # Top-level modules are the ones without a leading indent
+        totals = [sum(us for name, us in times.items() if not name.startswith(" ")) for times, _ in runs]
+        print(f"{label:<30} {statistics.median(totals) / 1000:>12.1f} {str(runs[0][1]):>13}")
+
+    times, _ = import_times("import main")
+    # Modules imported directly by main (or by other top-level imports)
+    direct = sorted(((us, name.strip()) for name, us in times.items()
+                     if name.startswith("  ") and not name.startswith("   ")), reverse=True)
+    print("\nSlowest modules imported by `import main`:")
+    for us, name in direct[:args.top]:
+        print(f"  {name:<40} {us / 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Measures the payload size and server time of /create-content responses.
+
+For each --chars post size, serves one post from the content cache
+through the whole app (middleware, routing, serialization, compression)
+in every combination of format (the JSON envelope, or markdown with
+Accept: text/markdown) and encoding (none, gzip, br), calling the ASGI
+app directly so that no HTTP client or socket time is counted. Reports
+the body size and the median time per request.
+
+A second table times serialization alone: FastAPI's encoding of a
+returned dict followed by JSONResponse (how /create-content answered
+before), JSONResponse on its own (how it answers now) and the markdown
+response.
+
+The posts are cut from the blog's own posts (posts/ at the top of the
+repository), real articles that compress like a generated post would.
+With --fake they come from the fake LLM backend instead, whose small
+vocabulary compresses far better than real text.
+
+Usage:
+    python benchmarks/bench_payload.py
+    python benchmarks/bench_payload.py --chars 4000 20000 80000 --repeat 500
+    python benchmarks/bench_payload.py --fake
+"""
+
+import os
+import sys
+import glob
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+import timeit
+from unittest.mock import patch
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POSTS_DIR = os.path.join(PROJECT_DIR, "..", "..", "posts")
+
+# Add the project root to the Python path
+sys.path.insert(0, PROJECT_DIR)
+os.environ.update(CONTENT_BACKEND="fake", FAKE_LLM_LATENCY="0", RATE_LIMIT_PER_MINUTE="0")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+import main
+from compression import available_encodings
+from fake_llm import fake_completion
+
+logging.disable(logging.INFO)
+
+FORMATS = {"json": "application/json", "markdown": "text/markdown"}
+
+
+def sample_post(chars, fake=False):
+    """A markdown post of `chars` characters."""
+    if fake:
+        return fake_completion("Payload benchmark", chars)
+    paths = sorted(glob.glob(os.path.join(POSTS_DIR, "*.md")))
+    text = "\n".join(open(path, encoding="utf-8").read() for path in paths)
+    return (text * (chars // len(text) + 1))[:chars]
+
+
+async def serve(topic, accept, accept_encoding):
+    """Sends one POST /create-content through the app; returns the response body."""
+    body = ('{"topic": "%s"}' % topic).encode()
+    chunks = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/create-content", "raw_path": b"/create-content", "query_string": b"",
+        "root_path": "", "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+        "headers": [(b"host", b"localhost"), (b"content-type", b"application/json"),
+                    (b"accept", accept.encode()), (b"accept-encoding", accept_encoding.encode())],
+    }
+    await main.app(scope, receive, send)
+    return b"".join(chunks)
+
+
+async def time_requests(topic, accept, accept_encoding, repeat):
+    """Returns (body bytes, median milliseconds) over `repeat` requests."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = await serve(topic, accept, accept_encoding)
+        times.append(time.perf_counter() - start)
+    return len(body), statistics.median(times) * 1e3
+
+
+def time_serialization(post, repeat):
+    """Median microseconds to build each kind of response for a post."""
+    candidates = {
+        "dict + encoder": lambda: JSONResponse(jsonable_encoder({"content": post})),
+        "JSONResponse": lambda: JSONResponse({"content": post}),
+        "markdown": lambda: Response(post, media_type=main.MARKDOWN_MEDIA_TYPE),
+    }
+    return {name: statistics.median(timeit.repeat(fn, number=1, repeat=repeat)) * 1e6
+            for name, fn in candidates.items()}
+
+
+def main_():
+    parser = argparse.ArgumentParser(description="Benchmark response payload size and serialization time")
+    parser.add_argument("--chars", type=int, nargs="+", default=[4000, 20000, 80000], help="Post sizes")
+    parser.add_argument("--repeat", type=int, default=200, help="Requests per combination")
+    parser.add_argument("--fake", action="store_true", help="Use fake LLM text instead of the blog's posts")
+    args = parser.parse_args()
+
+    encodings = ("identity",) + available_encodings()
+    print(f"posts from {'the fake LLM' if args.fake else 'posts/'}; median of {args.repeat} requests")
+    print(f"{'chars':>7} {'format':>9} {'encoding':>9} {'bytes':>8} {'ratio':>6} {'ms':>7}")
+    for chars in args.chars:
+        post = sample_post(chars, args.fake)
+        topic = f"Payload {chars}"
+        with patch.object(main, "create_content_crew", lambda topic: post):
+            asyncio.run(serve(topic, "application/json", "identity"))  # Fills the content cache
+            for name, accept in FORMATS.items():
+                baseline = None
+                for encoding in encodings:
+                    size, ms = asyncio.run(time_requests(topic, accept, encoding, args.repeat))
+                    baseline = baseline or size
+                    print(f"{chars:>7} {name:>9} {encoding:>9} {size:>8,} {size / baseline:>6.2f} {ms:>7.2f}")
+
+    print()
+    print(f"{'chars':>7} {'dict + encoder':>15} {'JSONResponse':>13} {'markdown':>9}   (microseconds)")
+    for chars in args.chars:
+        times = time_serialization(sample_post(chars, args.fake), args.repeat)
+        print(f"{chars:>7} {times['dict + encoder']:>15.1f} {times['JSONResponse']:>13.1f} {times['markdown']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main_()
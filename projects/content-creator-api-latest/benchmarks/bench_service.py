@@ -0,0 +1,119 @@
+"""
+Benchmarks the API's own overhead with the fake LLM backend.
+
+Starts `uvicorn main:app` in a child process with CONTENT_BACKEND=fake,
+so every crew run costs FAKE_LLM_LATENCY seconds per task and nothing
+else, then drives POST /create-content at each --concurrency level with
+a closed loop: each of N clients sends its next request as soon as the
+previous one is answered. Reports throughput and tail latency.
+
+With the default --latency 0 the figures are those of the service layer
+alone: HTTP handling, admission control, the caches, single-flight,
+the crew thread pool and building the crew. A fresh server is started
+for each level, with rate limits off and the caches (and reuse of
+archived posts) disabled unless --cache is given, so every request runs
+a (fake) crew.
+
+Usage:
+    python benchmarks/bench_service.py
+    python benchmarks/bench_service.py --concurrency 1 16 64 --requests 2000
+    python benchmarks/bench_service.py --latency 0.2 --workers 8 --chars 8000
+"""
+
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import statistics
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import free_port, request
+
+
+def start_server(port, args):
+    """Starts the API with the fake backend and waits until it accepts connections."""
+    env = {
+        **os.environ,
+        "CONTENT_BACKEND": "fake",
+        "FAKE_LLM_LATENCY": str(args.latency),
+        "FAKE_LLM_OUTPUT_CHARS": str(args.chars),
+        "CREW_MAX_WORKERS": str(args.workers),
+        "CREW_MAX_QUEUE": str(args.requests),
+        "RATE_LIMIT_PER_MINUTE": "0",
+    }
+    if not args.cache:
+        env.update(CONTENT_CACHE_TTL="0", RESEARCH_CACHE_TTL="0", CONTENT_ARCHIVE_REUSE_MAX_AGE="0")
+    env.pop("CONTENT_CACHE_PATH", None)
+    env.pop("RESEARCH_CACHE_PATH", None)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning",
+         "--no-access-log"],
+        cwd=PROJECT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    sys.exit("The server did not start")
+
+
+async def run_level(port, concurrency, args):
+    """Sends args.requests requests from `concurrency` clients; returns (elapsed, latencies, errors)."""
+    latencies, errors = [], []
+    remaining = iter(range(args.requests))
+
+    async def client():
+        for i in remaining:
+            topic = f"Topic {i % args.topics if args.topics else i}"
+            start = time.perf_counter()
+            status, _ = await request(port, "POST", "/create-content", {"topic": topic})
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+
+    # Warm up: the first crew run loads the backend and builds the agents
+    await request(port, "POST", "/create-content", {"topic": "Warm-up"})
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the service layer with the fake LLM backend")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per concurrency level")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake LLM seconds per task")
+    parser.add_argument("--chars", type=int, default=4000, help="Fake LLM output characters per task")
+    parser.add_argument("--workers", type=int, default=4, help="CREW_MAX_WORKERS")
+    parser.add_argument("--topics", type=int, default=0,
+                        help="Cycle through this many topics (default: every request is a new topic)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Keep the content and research caches and archive reuse on")
+    args = parser.parse_args()
+
+    print(f"fake LLM: {args.latency}s per task, {args.chars} chars; {args.workers} workers; "
+          f"{args.topics or 'unique'} topics; caches {'on' if args.cache else 'off'}")
+    print(f"{'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    for concurrency in args.concurrency:
+        port = free_port()
+        process = start_server(port, args)
+        try:
+            elapsed, latencies, errors = asyncio.run(run_level(port, concurrency, args))
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+        cuts = [x * 1e3 for x in statistics.quantiles(latencies, n=100, method="inclusive")]
+        print(f"{concurrency:>7} {len(latencies) / elapsed:>8,.0f} {cuts[49]:>8.1f} {cuts[89]:>8.1f} "
+              f"{cuts[98]:>8.1f} {max(latencies) * 1e3:>8.1f} {len(errors):>7}")
+
+
+if __name__ == "__main__":
+    main()
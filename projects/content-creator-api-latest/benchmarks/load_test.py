@@ -0,0 +1,216 @@
+"""
+Load test for the content API's admission control and rate limits.
+
+Starts the API with uvicorn in a child process, with the crew replaced
+by one that just sleeps for --crew-seconds, and has many clients (each
+with its own API key) send /create-content requests for distinct topics,
+so nothing is coalesced, cached or reused from the archive. Meanwhile the health check is polled
+to check that the server stays responsive. The server runs in its own
+process so that the clients do not compete with it for the GIL, and the
+clients speak plain HTTP/1.1 over asyncio streams, one connection per
+request, to keep client overhead out of the latencies.
+
+With admission control, accepted requests keep a bounded latency, the
+rest are refused quickly with 429 or 503 and a Retry-After, and no more
+than CREW_MAX_WORKERS + CREW_MAX_QUEUE crews are ever in flight. With
+--no-limits every request is queued, and latency grows with the backlog.
+
+Usage:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --clients 200 --requests 5 --crew-seconds 1
+    python benchmarks/load_test.py --no-limits
+"""
+
+import os
+import sys
+import time
+import logging
+import json
+import signal
+import socket
+import asyncio
+import argparse
+import threading
+import statistics
+import subprocess
+from collections import Counter
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "load-test")
+
+import uvicorn
+
+import main as api
+
+# Every refused request logs a warning; keep the report readable
+logging.disable(logging.WARNING)
+
+
+class SleepingCrew:
+    """Stands in for create_content_crew, tracking how many runs overlap."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.running = 0
+        self.peak = 0
+        self.peak_in_flight = 0  # Runs queued or running
+        self.runs = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, topic, style=None):
+        with self._lock:
+            self.running += 1
+            self.runs += 1
+            self.peak = max(self.peak, self.running)
+            self.peak_in_flight = max(self.peak_in_flight, len(api.crew_flights))
+        time.sleep(self.seconds)
+        with self._lock:
+            self.running -= 1
+        return f"Content about {topic}"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def request(port, method, path, body=None, headers=None):
+    """Sends one request on a new connection; returns (status, Retry-After or None)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        payload = json.dumps(body).encode() if body is not None else b""
+        lines = [f"{method} {path} HTTP/1.1", "Host: 127.0.0.1", "Connection: close",
+                 "Content-Type: application/json", f"Content-Length: {len(payload)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + payload)
+        await writer.drain()
+        head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        await reader.read()
+    finally:
+        writer.close()
+    fields = dict(line.split(": ", 1) for line in head[1:] if ": " in line)
+    return int(head[0].split()[1]), {k.lower(): v for k, v in fields.items()}.get("retry-after")
+
+
+def client_names(count):
+    """The clients' API keys; the server lists them in API_KEYS so each gets its own bucket."""
+    return [f"client-{n}" for n in range(count)]
+
+
+async def run_client(port, client, count, results):
+    for i in range(count):
+        start = time.perf_counter()
+        status, retry_after = await request(port, "POST", "/create-content",
+                                            {"topic": f"{client} topic {i}"}, {"X-API-Key": client})
+        results.append((status, time.perf_counter() - start, retry_after))
+
+
+async def poll_health(port, stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await request(port, "GET", "/")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+
+
+async def run_load(args, port):
+    results, health = [], []
+    stop = asyncio.Event()
+    poller = asyncio.create_task(poll_health(port, stop, health))
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(port, client, args.requests, results)
+                           for client in client_names(args.clients)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await poller
+    return elapsed, results, health
+
+
+def describe(latencies):
+    if len(latencies) < 2:
+        return " ".join(f"{x * 1e3:.0f} ms" for x in latencies) or "-"
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return f"p50 {cuts[49] * 1e3:.0f} ms, p99 {cuts[98] * 1e3:.0f} ms, max {max(latencies) * 1e3:.0f} ms"
+
+
+def serve(args):
+    """
+    Runs the API with the sleeping crew and the given limits until
+    SIGTERM, then prints the crew's counters as JSON.
+    """
+    crew = SleepingCrew(args.crew_seconds)
+    limiter = api.RateLimiter(per_minute=0 if args.no_limits else args.per_minute, burst=args.burst)
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=args.serve,
+                                           log_level="warning", backlog=4096))
+    # uvicorn re-raises SIGTERM once it has shut down; ignore it so the counters get printed
+    signal.signal(signal.SIGTERM, lambda signum, frame: None)
+    with patch.object(api, "create_content_crew", crew), \
+            patch.object(api, "CREW_MAX_WORKERS", args.workers), \
+            patch.object(api.crew_flights, "max_flights", None if args.no_limits else args.workers + args.queue), \
+            patch.object(api, "rate_limiter", limiter), \
+            patch.object(api, "API_KEYS", frozenset(client_names(args.clients))), \
+            patch.object(api, "CONTENT_ARCHIVE_REUSE_MAX_AGE", 0):
+        server.run()
+    print(json.dumps({"runs": crew.runs, "peak": crew.peak, "peak_in_flight": crew.peak_in_flight}))
+
+
+def start_server(port):
+    """Starts this script in --serve mode and waits until it accepts connections."""
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port)] + sys.argv[1:],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    sys.exit("The server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test admission control and rate limits")
+    parser.add_argument("--clients", type=int, default=100, help="Concurrent clients, one API key each")
+    parser.add_argument("--requests", type=int, default=3, help="Requests per client, sent one after another")
+    parser.add_argument("--crew-seconds", type=float, default=0.5, help="How long each fake crew run takes")
+    parser.add_argument("--workers", type=int, default=api.CREW_MAX_WORKERS, help="Crew worker threads")
+    parser.add_argument("--queue", type=int, default=api.CREW_MAX_QUEUE, help="Crew runs allowed to wait")
+    parser.add_argument("--per-minute", type=float, default=api.rate_limiter.rate * 60)
+    parser.add_argument("--burst", type=float, default=api.rate_limiter.burst)
+    parser.add_argument("--no-limits", action="store_true", help="Turn admission control and rate limits off")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args)
+        return
+
+    port = free_port()
+    process = start_server(port)
+    try:
+        elapsed, results, health = asyncio.run(run_load(args, port))
+    finally:
+        process.send_signal(signal.SIGTERM)
+        crew = json.loads(process.communicate(timeout=30)[0].splitlines()[-1])
+
+    statuses = Counter(status for status, _, _ in results)
+    print(f"{args.clients} clients x {args.requests} requests in {elapsed:.2f}s, "
+          f"crew {args.crew_seconds}s, {args.workers} workers, "
+          f"{'no limits' if args.no_limits else f'queue {args.queue}, {args.per_minute:g}/min burst {args.burst:g}'}")
+    print("responses: " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+    for label, wanted in (("accepted (200)", {200}), ("refused (429/503)", {429, 503})):
+        print(f"{label:<18} {describe([t for status, t, _ in results if status in wanted])}")
+    retry_after = sorted({int(value) for _, _, value in results if value})
+    if retry_after:
+        print(f"Retry-After values: {retry_after[0]}..{retry_after[-1]} s")
+    print(f"crew runs {crew['runs']}, peak running {crew['peak']}, "
+          f"peak queued or running {crew['peak_in_flight']}"
+          + ("" if args.no_limits else f" (bound {args.workers + args.queue})"))
+    print(f"health check during load: {describe(health)}")
+
+
+if __name__ == "__main__":
+    main()
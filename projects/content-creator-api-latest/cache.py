@@ -0,0 +1,235 @@
+"""
+Content cache for generated blog posts.
+
+Crew runs cost minutes and LLM spend, and editors often resubmit the same
+topic. The cache maps a normalized topic plus the crew configuration
+fingerprint to the generated content, so repeat topics are answered
+without running the crew again.
+
+Entries expire after a TTL, and the least recently used entries are
+evicted once the cache is full. The storage backend is pluggable:
+
+- InMemoryCacheBackend: an LRU-ordered dictionary, per process.
+- SQLiteCacheBackend: a SQLite file, shared by processes and kept across
+  restarts.
+
+ContentCache counts hits, misses and evictions for monitoring. The same
+classes also hold the researcher's reports (keyed by topic alone, so
+every writing style reuses them) and, in memory, memoized web searches.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def normalize_topic(topic: str) -> str:
+    """Fold case and collapse whitespace, so near-identical topics match."""
+    return " ".join(topic.casefold().split())
+
+
+def make_cache_key(topic: str, config_fingerprint: str = "", variant: str = "") -> str:
+    """
+    Build the cache key for a topic under a given crew configuration. A
+    variant (e.g. writing style instructions) keeps its own entry.
+    """
+    raw = f"{config_fingerprint}\n{normalize_topic(topic)}"
+    if variant:
+        raw += f"\n{normalize_topic(variant)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class InMemoryCacheBackend:
+    """Keeps entries in an OrderedDict, least recently used first."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: str, expires_at: float) -> int:
+        """Store an entry; return the number of entries evicted to make room."""
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def close(self):
+        pass
+
+
+class SQLiteCacheBackend:
+    """
+    Keeps entries in a SQLite file, with the last use time for LRU eviction.
+
+    A hit only reads: its use time is held in memory and the held times
+    are written in one statement by the next set(), before it evicts, or
+    by close(). Lookups run on the request path, and an UPDATE and commit
+    per hit would serialize every reader behind a write.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS content_cache ("
+        " key TEXT PRIMARY KEY,"
+        " value TEXT NOT NULL,"
+        " expires_at REAL NOT NULL,"
+        " last_used REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_content_cache_last_used ON content_cache (last_used)",
+    )
+    _SELECT = "SELECT value, expires_at FROM content_cache WHERE key = ?"
+    _TOUCH = "UPDATE content_cache SET last_used = ? WHERE key = ?"
+    _DELETE = "DELETE FROM content_cache WHERE key = ?"
+    _UPSERT = "INSERT OR REPLACE INTO content_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)"
+    _COUNT = "SELECT COUNT(*) FROM content_cache"
+    _EVICT = (
+        "DELETE FROM content_cache WHERE key IN"
+        " (SELECT key FROM content_cache ORDER BY last_used LIMIT ?)"
+    )
+    _CLEAR = "DELETE FROM content_cache"
+
+    def __init__(self, path: str, max_entries: int = 1000):
+        self.max_entries = max_entries
+        # One connection shared by the worker threads, guarded by a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._touched = {}  # key -> last use not yet written
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # Lookups run on the request path; skip the fsync on each commit.
+            # A crash can lose the newest entries, which only costs a rerun.
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self._SCHEMA:
+                self._conn.execute(statement)
+            self._conn.commit()
+
+    def get(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(self._SELECT, (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._touched.pop(key, None)
+                self._conn.execute(self._DELETE, (key,))
+                self._conn.commit()
+                return None
+            self._touched[key] = now
+            return row[0]
+
+    def _write_touches(self):
+        # Called with the lock held; committed by the caller
+        if self._touched:
+            self._conn.executemany(self._TOUCH, ((used, key) for key, used in self._touched.items()))
+            self._touched.clear()
+
+    def set(self, key: str, value: str, expires_at: float) -> int:
+        """Store an entry; return the number of entries evicted to make room."""
+        with self._lock:
+            self._write_touches()
+            self._conn.execute(self._UPSERT, (key, value, expires_at, time.time()))
+            excess = self._conn.execute(self._COUNT).fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(self._EVICT, (excess,))
+            self._conn.commit()
+            return max(excess, 0)
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute(self._CLEAR)
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(self._COUNT).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._write_touches()
+            self._conn.commit()
+            self._conn.close()
+
+
+class ContentCache:
+    """
+    TTL cache of generated content in front of the crew, with hit/miss
+    counters.
+    """
+
+    def __init__(self, backend, ttl_seconds: float = 86400, config_fingerprint: str = ""):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.config_fingerprint = config_fingerprint
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._counter_lock = threading.Lock()
+
+    def get(self, topic: str, variant: str = "") -> Optional[str]:
+        """Return the cached content for a topic, or None."""
+        value = self.backend.get(make_cache_key(topic, self.config_fingerprint, variant), time.time())
+        with self._counter_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, topic: str, content: str, variant: str = ""):
+        """Cache the content generated for a topic."""
+        key = make_cache_key(topic, self.config_fingerprint, variant)
+        evicted = self.backend.set(key, content, time.time() + self.ttl_seconds)
+        if evicted:
+            with self._counter_lock:
+                self.evictions += evicted
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": len(self.backend),
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    def close(self):
+        self.backend.close()
+
+
+def open_content_cache(path: Optional[str] = None, max_entries: int = 1000,
+                       ttl_seconds: float = 86400, config_fingerprint: str = "") -> ContentCache:
+    """Return a ContentCache on SQLite if `path` is set, in memory otherwise."""
+    if path:
+        backend = SQLiteCacheBackend(path, max_entries)
+    else:
+        backend = InMemoryCacheBackend(max_entries)
+    return ContentCache(backend, ttl_seconds, config_fingerprint)
@@ -13,6 +13,8 @@ from fastapi.testclient import TestClient
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import agent
+import main
 from main import app
 
 
@@ -75,6 +77,20 @@ def setup_test_environment():
         del os.environ['TESTING']
 
 
+@pytest.fixture(autouse=True)
+def reset_app_state():
+    """Give each test fresh crew and research thread pools, job store, caches, archive, rate limits and agents."""
+    yield
+    main.shutdown_crew_executor()
+    main.close_job_store()
+    main.close_content_cache()
+    main.close_content_archive()
+    main.rate_limiter.reset()
+    agent.close_research_cache()
+    agent.shutdown_research_executor()
+    agent.reset_agents()
+
+
 @pytest.fixture
 def mock_search_tool():
     """Mock search tool for testing."""
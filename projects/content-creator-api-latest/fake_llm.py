@@ -0,0 +1,118 @@
+"""
+A local stand-in for the crewai classes agent.py uses, selected with
+CONTENT_BACKEND=fake.
+
+It makes no network calls and needs no API key. Each task sleeps for
+FAKE_LLM_LATENCY seconds and then answers with FAKE_LLM_OUTPUT_CHARS
+characters of markdown, derived from a hash of the task's description.
+The same task always gets the same answer. That makes it suitable for
+measuring the API's own overhead (caching, coalescing, streaming,
+admission control) without the cost and variance of real LLM calls.
+
+Only the parts of the crewai API that agent.py relies on are provided:
+Agent, Task (with callback, output, start_time and end_time), Crew with
+a sequential kickoff(), and Process.
+"""
+
+import os
+import time
+import random
+import hashlib
+from datetime import datetime
+
+# Seconds each task takes, and characters of output it produces
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0.5"))
+FAKE_LLM_OUTPUT_CHARS = int(os.getenv("FAKE_LLM_OUTPUT_CHARS", "4000"))
+
+_WORDS = (
+    "adoption analysis architecture automation benchmark cloud compliance cost data deployment "
+    "efficiency ecosystem evaluation framework governance growth infrastructure innovation insight "
+    "integration latency market model monitoring open-source pipeline platform privacy research "
+    "regulation reliability risk scale security strategy standard throughput tooling trend workflow"
+).split()
+
+
+def model_name() -> str:
+    """Identifies the fake model, and the output size that shapes its answers, for cache fingerprints."""
+    return f"fake-llm/{FAKE_LLM_OUTPUT_CHARS}"
+
+
+def fake_completion(prompt: str, chars: int = None) -> str:
+    """Deterministic markdown of `chars` characters (FAKE_LLM_OUTPUT_CHARS by default) for a prompt."""
+    chars = FAKE_LLM_OUTPUT_CHARS if chars is None else chars
+    rng = random.Random(hashlib.sha256(prompt.encode()).digest())
+    parts = [f"# {' '.join(rng.choice(_WORDS) for _ in range(4)).title()}\n"]
+    length = len(parts[0])
+    while length < chars:
+        paragraph = " ".join(rng.choice(_WORDS) for _ in range(60)).capitalize() + "."
+        parts.append("\n" + paragraph + "\n")
+        length += len(paragraph) + 2
+    return "".join(parts)[:chars]
+
+
+class Process:
+    sequential = "sequential"
+
+
+class Agent:
+    """Holds an agent's configuration; the fake LLM ignores everything but the role."""
+
+    def __init__(self, role: str, goal: str = "", backstory: str = "", **kwargs):
+        self.role = role
+        self.goal = goal
+        self.backstory = backstory
+        self.config = kwargs
+
+
+class TaskOutput:
+    def __init__(self, raw: str, description: str, agent: str):
+        self.raw = raw
+        self.description = description
+        self.agent = agent
+
+    def __str__(self):
+        return self.raw
+
+
+class Task:
+    def __init__(self, description: str, expected_output: str, agent: Agent = None, callback=None, **kwargs):
+        self.description = description
+        self.expected_output = expected_output
+        self.agent = agent
+        self.callback = callback
+        self.output = None
+        self.start_time = None
+        self.end_time = None
+
+    def execute(self) -> TaskOutput:
+        self.start_time = datetime.now()
+        if FAKE_LLM_LATENCY > 0:
+            time.sleep(FAKE_LLM_LATENCY)
+        self.output = TaskOutput(fake_completion(self.description + self.expected_output),
+                                 self.description, getattr(self.agent, "role", ""))
+        self.end_time = datetime.now()
+        if self.callback is not None:
+            self.callback(self.output)
+        return self.output
+
+
+class CrewOutput:
+    def __init__(self, tasks_output):
+        self.tasks_output = tasks_output
+        self.raw = tasks_output[-1].raw if tasks_output else ""
+
+    def __str__(self):
+        return self.raw
+
+
+class Crew:
+    """Runs its tasks one after the other, like a sequential crewai Crew."""
+
+    def __init__(self, agents, tasks, process=Process.sequential, verbose=False, **kwargs):
+        self.agents = agents
+        self.tasks = tasks
+        self.process = process
+        self.verbose = verbose
+
+    def kickoff(self, inputs=None) -> CrewOutput:
+        return CrewOutput([task.execute() for task in self.tasks])
@@ -0,0 +1,162 @@
+"""
+Job store for asynchronous content generation.
+
+A job records one crew run submitted through the job API: its topic,
+status, and the generated content or error once it finishes. Two
+interchangeable stores are provided:
+
+- InMemoryJobStore: fast, but jobs are lost when the server stops.
+- SQLiteJobStore: keeps jobs in a SQLite file so results survive restarts.
+
+Both stores are thread-safe; jobs are updated from the crew worker threads.
+"""
+
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Optional
+
+# Job statuses
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+
+@dataclass
+class Job:
+    """A content generation job and its outcome."""
+    id: str
+    topic: str
+    status: str = PENDING
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+
+def new_job(topic: str) -> Job:
+    """Create a pending job with a fresh random ID."""
+    now = time.time()
+    return Job(id=uuid.uuid4().hex, topic=topic, created_at=now, updated_at=now)
+
+
+class InMemoryJobStore:
+    """
+    Keeps jobs in a dictionary.
+
+    Once more than `max_jobs` jobs are held, the oldest finished jobs are
+    dropped, so a long-running server does not grow without bound.
+    """
+
+    def __init__(self, max_jobs: int = 10000):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()  # Insertion order is creation order
+        self._lock = threading.Lock()
+
+    def create(self, topic: str) -> Job:
+        job = new_job(topic)
+        with self._lock:
+            self._jobs[job.id] = job
+            if len(self._jobs) > self.max_jobs:
+                self._evict()
+            return replace(job)
+
+    def _evict(self):
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [job.id for job in self._jobs.values() if job.finished][:excess]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            # Hand out copies so callers never see a half-applied update
+            return replace(job) if job else None
+
+    def update(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.status, job.result, job.error = status, result, error
+                job.updated_at = time.time()
+
+    def close(self):
+        pass
+
+
+class SQLiteJobStore:
+    """
+    Keeps jobs in a SQLite database file.
+
+    Jobs still pending or running when the file is opened belonged to a
+    server that stopped before finishing them; they are marked as failed.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        " id TEXT PRIMARY KEY,"
+        " topic TEXT NOT NULL,"
+        " status TEXT NOT NULL,"
+        " result TEXT,"
+        " error TEXT,"
+        " created_at REAL NOT NULL,"
+        " updated_at REAL NOT NULL)"
+    )
+    _INSERT = (
+        "INSERT INTO jobs (id, topic, status, result, error, created_at, updated_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)"
+    )
+    _SELECT = "SELECT id, topic, status, result, error, created_at, updated_at FROM jobs WHERE id = ?"
+    _UPDATE = "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?"
+    _FAIL_UNFINISHED = (
+        "UPDATE jobs SET status = 'failed', error = 'Interrupted by a server restart.', updated_at = ?"
+        " WHERE status IN ('pending', 'running')"
+    )
+
+    def __init__(self, path: str):
+        # One connection shared by the worker threads, guarded by a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(self._SCHEMA)
+            self._conn.execute(self._FAIL_UNFINISHED, (time.time(),))
+            self._conn.commit()
+
+    def create(self, topic: str) -> Job:
+        job = new_job(topic)
+        with self._lock:
+            self._conn.execute(self._INSERT, (job.id, job.topic, job.status, job.result, job.error,
+                                              job.created_at, job.updated_at))
+            self._conn.commit()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(self._SELECT, (job_id,)).fetchone()
+        return Job(*row) if row else None
+
+    def update(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(self._UPDATE, (status, result, error, time.time(), job_id))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_job_store(path: Optional[str] = None):
+    """Return a SQLiteJobStore for `path`, or an InMemoryJobStore if it is empty."""
+    if path:
+        return SQLiteJobStore(path)
+    return InMemoryJobStore()
@@ -0,0 +1,110 @@
+"""
+Admission control and rate limiting for the content API.
+
+Every crew run costs minutes of a worker and LLM quota, so the API
+protects itself in two ways, both kept in process memory:
+
+- RateLimiter: a token bucket per client (API key or IP address). Each
+  request that has to start a crew takes a token; a client that runs
+  out gets RateLimited, telling it how long to wait (HTTP 429).
+- ServerBusy: raised when the crew queue is full (HTTP 503). The queue
+  itself is bounded by main.SingleFlight, which only counts distinct
+  crew runs, so cache hits and requests joining a run in flight are
+  always admitted.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class ServerBusy(Exception):
+    """Raised when no new crew run can be queued; retry after `retry_after` seconds."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("The server is busy. Please retry later.")
+        self.retry_after = retry_after
+
+
+class RateLimited(Exception):
+    """Raised when a client has used up its rate limit; retry after `retry_after` seconds."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Too many requests. Please slow down.")
+        self.retry_after = retry_after
+
+
+def retry_after_header(seconds: float) -> dict:
+    """Build a Retry-After header, in whole seconds (at least 1)."""
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+class TokenBucket:
+    """Holds up to `burst` tokens, refilled at `rate` tokens per second."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float, cost: float = 1.0) -> float:
+        """Take `cost` tokens; return 0 on success, or the seconds until they are available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    A token bucket per client. `per_minute` tokens are added each minute,
+    up to `burst`; a per_minute of 0 turns limiting off.
+
+    Buckets of the least recently seen clients are dropped beyond
+    `max_clients`, so memory stays bounded; a dropped client starts over
+    with a full bucket.
+    """
+
+    def __init__(self, per_minute: float = 30, burst: float = 10, max_clients: int = 10000):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_clients = max_clients
+        self.limited = 0    # Requests rejected so far
+        self._buckets = OrderedDict()  # client -> TokenBucket, least recently seen first
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def check(self, client: str, cost: float = 1.0) -> float:
+        """Charge a request to `client`; return 0 if allowed, or the seconds to wait."""
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, now)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+            wait = bucket.take(now, cost)
+            if wait:
+                self.limited += 1
+            return wait
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self.limited = 0
+
+    def __len__(self):
+        return len(self._buckets)
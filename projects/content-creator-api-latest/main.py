@@ -1,53 +1,860 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, field_validator
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+import asyncio
+import json
 import logging
+import math
+import os
+import threading
+import time
 
 # Import the crew creation function from our agent file
-from agent import create_content_crew
+from agent import (
+    close_research_cache, create_content_crew, crew_config_fingerprint, crew_progress,
+    get_research_cache, search_memo, shutdown_research_executor,
+)
+from archive import ContentArchive
+from cache import normalize_topic, open_content_cache
+from compression import CompressionMiddleware, parse_accept
+from jobs import FAILED, RUNNING, SUCCEEDED, open_job_store
+from limits import RateLimited, RateLimiter, ServerBusy, retry_after_header
+from metrics import REGISTRY, Counter, Gauge, Histogram, MetricsMiddleware
 
 # Set up basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Crew runs are synchronous and can take minutes, so they run on a bounded
+# thread pool instead of the event loop. CREW_MAX_WORKERS caps how many
+# crews run at once; further requests wait for a free worker.
+CREW_MAX_WORKERS = int(os.getenv("CREW_MAX_WORKERS", "4"))
+
+# Admission control: at most CREW_MAX_QUEUE crew runs wait for a worker.
+# Beyond that, requests that would start another run get a 503 with a
+# Retry-After of CREW_RETRY_AFTER seconds instead of piling up.
+CREW_MAX_QUEUE = int(os.getenv("CREW_MAX_QUEUE", "16"))
+CREW_RETRY_AFTER = float(os.getenv("CREW_RETRY_AFTER", "30"))
+
+_crew_executor = None
+_crew_executor_lock = threading.Lock()
+
+def get_crew_executor():
+    """
+    Returns the thread pool that runs crews, creating it on first use.
+    """
+    global _crew_executor
+    with _crew_executor_lock:
+        if _crew_executor is None:
+            _crew_executor = ThreadPoolExecutor(max_workers=CREW_MAX_WORKERS, thread_name_prefix="crew")
+        return _crew_executor
+
+def shutdown_crew_executor():
+    """
+    Stops the crew thread pool, dropping crews that have not started yet.
+    """
+    global _crew_executor
+    with _crew_executor_lock:
+        if _crew_executor is not None:
+            _crew_executor.shutdown(wait=False, cancel_futures=True)
+            _crew_executor = None
+    crew_flights.clear()
+
+# Time crew runs spend waiting for a free worker
+crew_queue_seconds = Histogram("crew_queue_wait_seconds", "Time crew runs wait for a worker.",
+                               buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600))
+
+class _Flight:
+    __slots__ = ("future", "submitted", "started", "on_start", "events", "listeners")
+
+    def __init__(self):
+        self.future = None
+        self.submitted = time.monotonic()
+        self.started = False
+        self.on_start = []
+        self.events = []     # Progress events reported so far, as (event, data)
+        self.listeners = []
+
+class SingleFlight:
+    """
+    Coalesces crew runs: while a run for a key is queued or running, further
+    requests for the same key share its future instead of starting another
+    crew. The key is dropped when the run finishes, so later requests start
+    afresh (and usually hit the content cache instead).
+
+    At most `max_flights` runs are queued or running at once; starting
+    another raises ServerBusy. Joining a run in flight is always allowed.
+    """
+
+    def __init__(self, max_flights=None, retry_after: float = 30):
+        self.max_flights = max_flights
+        self.retry_after = retry_after
+        self._flights = {}  # key -> _Flight
+        self._lock = threading.Lock()
+        self.joined = 0     # Requests that shared another request's run
+        self.rejected = 0   # Runs refused because the queue was full
+
+    def admit(self, key):
+        """
+        Raises ServerBusy if a request for `key` would be refused right now,
+        so endpoints can refuse before they start responding.
+        """
+        with self._lock:
+            self._admit(key)
+
+    def _admit(self, key):
+        if key in self._flights or self.max_flights is None or len(self._flights) < self.max_flights:
+            return
+        self.rejected += 1
+        raise ServerBusy(self.retry_after)
+
+    def run(self, key, fn, *args, on_start=None, on_event=None):
+        """
+        Returns the future of the run for `key`, submitting fn(*args) to the
+        crew thread pool if no run is in flight. `on_start` is called once
+        the run has started, or right away if it already has. `on_event` is
+        called with (event, data) for each progress event of the run,
+        starting with those already reported; it must not block.
+        Raises ServerBusy if a new run is needed and the queue is full.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                self._admit(key)
+                flight = _Flight()
+                # The run waits for this lock before starting, so it always
+                # finds the flight registered
+                flight.future = get_crew_executor().submit(self._execute, key, flight, fn, args)
+                self._flights[key] = flight
+            else:
+                self.joined += 1
+                logging.info(f"Joining the crew run in flight for: {key}")
+            call_now = flight.started
+            if on_start is not None and not call_now:
+                flight.on_start.append(on_start)
+            if on_event is not None:
+                # Replayed under the lock so no event is missed or reordered
+                for event, data in flight.events:
+                    on_event(event, data)
+                flight.listeners.append(on_event)
+        if on_start is not None and call_now:
+            on_start()
+        return flight.future
+
+    def _execute(self, key, flight, fn, args):
+        crew_queue_seconds.observe(time.monotonic() - flight.submitted)
+        with self._lock:
+            flight.started = True
+            callbacks, flight.on_start = flight.on_start, []
+        for callback in callbacks:
+            callback()
+        token = crew_progress.set(partial(self._publish, flight))
+        try:
+            return fn(*args)
+        finally:
+            crew_progress.reset(token)
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+    def _publish(self, flight, event, data):
+        with self._lock:
+            flight.events.append((event, data))
+            for listener in flight.listeners:
+                listener(event, data)
+
+    def __len__(self):
+        return len(self._flights)
+
+    def clear(self):
+        with self._lock:
+            self._flights.clear()
+            self.joined = 0
+            self.rejected = 0
+
+# Concurrent requests for the same normalized topic share one crew run,
+# and at most CREW_MAX_WORKERS + CREW_MAX_QUEUE runs are admitted at once
+crew_flights = SingleFlight(CREW_MAX_WORKERS + CREW_MAX_QUEUE, CREW_RETRY_AFTER)
+
+# Requests that have to start a crew are rate limited per client: each
+# takes a token from the client's bucket, which refills at
+# RATE_LIMIT_PER_MINUTE tokens a minute up to RATE_LIMIT_BURST. Topics
+# answered from the cache or the archive are free, on every endpoint.
+# RATE_LIMIT_PER_MINUTE=0 turns rate limiting off.
+rate_limiter = RateLimiter(
+    per_minute=float(os.getenv("RATE_LIMIT_PER_MINUTE", "30")),
+    burst=float(os.getenv("RATE_LIMIT_BURST", "10")),
+)
+
+# X-API-Key values that get a bucket of their own (comma-separated).
+# Other keys are ignored: a client could otherwise send a new key with
+# every request to get a fresh bucket each time.
+API_KEYS = frozenset(key.strip() for key in os.getenv("API_KEYS", "").split(",") if key.strip())
+
+def client_id(request: Request) -> str:
+    """
+    Identifies the caller for rate limiting: its X-API-Key header if the
+    key is listed in API_KEYS, otherwise its IP address.
+    """
+    api_key = request.headers.get("X-API-Key")
+    if api_key and api_key in API_KEYS:
+        return f"key:{api_key}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+def rate_limit(client: str):
+    """
+    Charges a request that missed the cache to its client's bucket.
+    Raises RateLimited when the bucket is empty.
+    """
+    wait = rate_limiter.check(client)
+    if wait:
+        logging.warning(f"Rate limited {client} for {wait:.1f}s")
+        raise RateLimited(wait)
+
+def rate_limited(e: RateLimited) -> HTTPException:
+    """
+    The 429 response for a request refused by the client's rate limit.
+    """
+    return HTTPException(status_code=429, detail=str(e), headers=retry_after_header(e.retry_after))
+
+def server_busy(e: ServerBusy) -> HTTPException:
+    """
+    The 503 response for a request refused by admission control.
+    """
+    logging.warning("Crew queue full, refusing a new crew run")
+    return HTTPException(status_code=503, detail=str(e), headers=retry_after_header(e.retry_after))
+
+# Generated posts are cached by normalized topic and crew configuration,
+# in memory or in the SQLite file named by CONTENT_CACHE_PATH.
+# CONTENT_CACHE_TTL is in seconds; 0 turns caching off. The cache is
+# reached from worker threads as well as the event loop, so it is opened
+# under a lock.
+_content_cache = None
+_content_cache_lock = threading.Lock()
+
+def get_content_cache():
+    """
+    Returns the content cache, opening it on first use.
+    """
+    global _content_cache
+    with _content_cache_lock:
+        if _content_cache is None:
+            _content_cache = open_content_cache(
+                os.getenv("CONTENT_CACHE_PATH"),
+                max_entries=int(os.getenv("CONTENT_CACHE_MAX_ENTRIES", "1000")),
+                ttl_seconds=float(os.getenv("CONTENT_CACHE_TTL", "86400")),
+                config_fingerprint=crew_config_fingerprint(),
+            )
+        return _content_cache
+
+def close_content_cache():
+    """
+    Closes the content cache; the next get_content_cache() call reopens it.
+    """
+    global _content_cache
+    with _content_cache_lock:
+        if _content_cache is not None:
+            _content_cache.close()
+            _content_cache = None
+
+# Every generated post is also archived, with a full-text index, in
+# memory or in the SQLite file named by CONTENT_ARCHIVE_PATH. The
+# in-memory archive keeps the newest CONTENT_ARCHIVE_MAX_POSTS posts
+# (1000 by default); a file keeps every post unless it is set.
+# Reuse is opt-in: with CONTENT_ARCHIVE_REUSE_MAX_AGE set, a post
+# archived in the last that many seconds for the same topic (see
+# archive.topic_similarity), style and crew configuration is served
+# instead of running the crew. CONTENT_CACHE_TTL=0 turns reuse off too.
+CONTENT_ARCHIVE_REUSE_MAX_AGE = float(os.getenv("CONTENT_ARCHIVE_REUSE_MAX_AGE", "0"))
+CONTENT_ARCHIVE_REUSE_MIN_SIMILARITY = float(os.getenv("CONTENT_ARCHIVE_REUSE_MIN_SIMILARITY", "1.0"))
+
+_content_archive = None
+_content_archive_lock = threading.Lock()
+
+def get_content_archive():
+    """
+    Returns the content archive, opening it on first use.
+    """
+    global _content_archive
+    with _content_archive_lock:
+        if _content_archive is None:
+            path = os.getenv("CONTENT_ARCHIVE_PATH")
+            max_posts = int(os.getenv("CONTENT_ARCHIVE_MAX_POSTS", "0" if path else "1000"))
+            _content_archive = ContentArchive(path, max_posts)
+        return _content_archive
+
+def close_content_archive():
+    """
+    Closes the content archive; the next get_content_archive() call reopens it.
+    """
+    global _content_archive
+    with _content_archive_lock:
+        if _content_archive is not None:
+            _content_archive.close()
+            _content_archive = None
+
+def lookup_content(topic: str, style: Optional[str] = None):
+    """
+    Returns the content already generated for a topic, from the content
+    cache or else from the archive, or None if the crew has to run.
+    Posts found in the archive are put back in the cache. Both are SQLite
+    lookups, so callers on the event loop run this on a thread.
+    """
+    cache = get_content_cache()
+    content = cache.get(topic, variant=style or "")
+    if content is not None or CONTENT_ARCHIVE_REUSE_MAX_AGE <= 0 or cache.ttl_seconds <= 0:
+        return content
+    post = get_content_archive().find(topic, style or "", crew_config_fingerprint(),
+                                      max_age=CONTENT_ARCHIVE_REUSE_MAX_AGE,
+                                      min_similarity=CONTENT_ARCHIVE_REUSE_MIN_SIMILARITY)
+    if post is None:
+        return None
+    logging.info(f"Reusing archived post {post.id} ({post.topic!r}) for topic: {topic}")
+    cache.set(topic, post.content, variant=style or "")
+    return post.content
+
+def generate_content(topic: str, style: Optional[str] = None):
+    """
+    Runs the crew for a topic, and caches and archives the content it
+    produces. Returns the content, or None if the crew produced nothing.
+    """
+    if style:
+        result = create_content_crew(topic, style=style)
+    else:
+        result = create_content_crew(topic)
+    if not result:
+        return None
+    content = str(result)
+    get_content_cache().set(topic, content, variant=style or "")
+    try:
+        get_content_archive().add(topic, content, style or "", crew_config_fingerprint())
+    except Exception as e:
+        # The post is still returned and cached; only its archive copy is lost
+        logging.error(f"Could not archive the post for topic {topic!r}: {e!r}")
+    return content
+
+def content_key(topic: str, style: Optional[str] = None) -> str:
+    """
+    The single-flight key of a topic: its normalized form, plus the
+    normalized style if there is one.
+    """
+    key = normalize_topic(topic)
+    if style:
+        key += "\n" + normalize_topic(style)
+    return key
+
+def start_content(topic: str, on_start=None, on_event=None, style: Optional[str] = None):
+    """
+    Returns the future of the crew run for the topic, joining the run
+    already in flight for the same normalized topic (and style) if there
+    is one. Raises ServerBusy if the crew queue is full.
+    """
+    return crew_flights.run(content_key(topic, style), generate_content, topic, style,
+                            on_start=on_start, on_event=on_event)
+
+async def run_crew(topic: str, style: Optional[str] = None):
+    """
+    Runs generate_content on the crew thread pool (or joins the run in
+    flight for the topic) and waits for the result without blocking the
+    event loop.
+    """
+    # Shielded so that one caller disconnecting does not cancel a run
+    # other callers are waiting for
+    return await asyncio.shield(asyncio.wrap_future(start_content(topic, style=style)))
+
+async def get_content(topic: str, style: Optional[str] = None, client: Optional[str] = None):
+    """
+    Returns cached or archived content for the topic, or runs the crew for
+    it. With a client, a crew run is charged to its rate limit first.
+    """
+    content = await asyncio.to_thread(lookup_content, topic, style)
+    if content is not None:
+        logging.info(f"Serving cached content for topic: {topic}")
+        return content
+    if client is not None:
+        rate_limit(client)
+    return await run_crew(topic, style)
+
+# Jobs submitted through the job API are kept in memory, or in the
+# SQLite file named by JOB_STORE_PATH so they survive restarts.
+_job_store = None
+_job_store_lock = threading.Lock()
+
+def get_job_store():
+    """
+    Returns the job store, opening it on first use.
+    """
+    global _job_store
+    with _job_store_lock:
+        if _job_store is None:
+            _job_store = open_job_store(os.getenv("JOB_STORE_PATH"))
+        return _job_store
+
+def close_job_store():
+    """
+    Closes the job store; the next get_job_store() call reopens it.
+    """
+    global _job_store
+    with _job_store_lock:
+        if _job_store is not None:
+            _job_store.close()
+            _job_store = None
+
+def finish_job(store, job_id: str, topic: str, future):
+    """
+    Records the outcome of a job's crew run in the job store.
+    """
+    try:
+        content = future.result()
+    except Exception as e:
+        logging.error(f"Job {job_id} failed: {e!r}")
+        store.update(job_id, FAILED, error=str(e) or type(e).__name__)
+        return
+    if not content:
+        logging.error(f"Job {job_id} failed. The crew returned an empty result.")
+        store.update(job_id, FAILED, error="Content creation failed, received no output from the agent.")
+        return
+    logging.info(f"Job {job_id} finished for topic: {topic}")
+    store.update(job_id, SUCCEEDED, result=content)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_crew_executor()
+    shutdown_research_executor()
+    close_job_store()
+    close_content_cache()
+    close_content_archive()
+    close_research_cache()
+
 # Initialize the FastAPI app
 app = FastAPI(
     title="Content Creator Agent API",
     description="An API to trigger a CrewAI agent for content creation.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+# Compression runs inside the metrics middleware, so request durations include it
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Define the request body model using Pydantic
 # This ensures the input data is validated
 class ContentRequest(BaseModel):
     topic: str
+    # Optional instructions for the writer, e.g. tone or length. Research
+    # is cached by topic alone, so restyling a recent topic skips it.
+    style: Optional[str] = None
+
+# --- Response formats ---
+# Posts are returned as JSON, {"content": "..."}, unless the client's
+# Accept header prefers text/markdown: then the post itself is the body,
+# without the JSON envelope and the escaping of its quotes and newlines.
+
+MARKDOWN_MEDIA_TYPE = "text/markdown; charset=utf-8"
+
+def wants_markdown(accept: Optional[str]) -> bool:
+    """Whether an Accept header asks for markdown at least as much as for JSON."""
+    weights = parse_accept(accept)
+    markdown = weights.get("text/markdown", 0.0)
+    return markdown > 0 and markdown >= weights.get("application/json", 0.0)
+
+def content_response(content: str, accept: Optional[str], **fields) -> Response:
+    """
+    The post as markdown or as JSON, with `fields` added to the JSON. Both
+    carry "Vary: Accept", so caches keep the two formats apart.
+    """
+    headers = {"Vary": "Accept"}
+    if wants_markdown(accept):
+        return Response(content, media_type=MARKDOWN_MEDIA_TYPE, headers=headers)
+    return JSONResponse({**fields, "content": content}, headers=headers)
 
 # Define the API endpoint
 @app.post("/create-content", summary="Create Content", description="Trigger the CrewAI agent to create a blog post on a given topic.")
-async def create_content(request: ContentRequest):
+async def create_content(request: ContentRequest, http_request: Request, accept: Optional[str] = Header(default=None)):
     """
     This endpoint receives a topic, triggers the CrewAI agent,
-    and returns the generated content.
+    and returns the generated content, as JSON or as markdown.
     """
     try:
         logging.info(f"Received request to create content for topic: {request.topic}")
         
-        # Call the synchronous crew function
-        # In a real production app, you might run this in a separate thread
-        # or use a task queue like Celery to avoid blocking.
-        result = create_content_crew(request.topic)
+        # Serve from the content cache, or run the synchronous crew function
+        # on the crew thread pool so the event loop keeps serving meanwhile
+        result = await get_content(request.topic, request.style, client_id(http_request))
         
         if not result:
             logging.error("Content creation failed. The crew returned an empty result.")
             raise HTTPException(status_code=500, detail="Content creation failed, received no output from the agent.")
             
         logging.info(f"Successfully generated content for topic: {request.topic}")
-        return {"content": result}
+        return content_response(result, accept)
 
+    except ServerBusy as e:
+        raise server_busy(e)
+    except RateLimited as e:
+        raise rate_limited(e)
     except Exception as e:
         # Catch any other exceptions and log them
         logging.error(f"An unexpected error occurred: {e}", exc_info=True)
         # Return a generic 500 Internal Server Error
         raise HTTPException(status_code=500, detail=f"An internal server error occurred: {str(e)}")
 
+# --- Streaming ---
+# Server-Sent Events for clients that want to show progress while the crew
+# runs: "queued" at once, "research_started", "research_done" with the
+# research report, "writing_started", then the post as "content" chunks
+# and a final "done" (or "error").
+
+# Seconds between keep-alive comments while the crew is quiet, so proxies
+# do not drop the connection
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("STREAM_KEEPALIVE_SECONDS", "15"))
+
+def format_sse(event: str, data: dict) -> str:
+    """
+    Formats one Server-Sent Event with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def split_content(content: str):
+    """
+    Splits a post into chunks at paragraph breaks; joined, they give back
+    the post unchanged.
+    """
+    chunks = content.split("\n\n")
+    return [chunk + "\n\n" for chunk in chunks[:-1]] + [chunks[-1]]
+
+def _content_sse(content: str):
+    for chunk in split_content(content):
+        yield format_sse("content", {"text": chunk})
+    yield format_sse("done", {})
+
+async def stream_content_events(topic: str, style: Optional[str] = None, cached: Optional[str] = None):
+    """
+    Yields the Server-Sent Events for a topic's crew run, joining the run
+    in flight for the topic if there is one. `cached` is the topic's
+    cached content, if the caller has already looked it up.
+    """
+    if cached is not None:
+        logging.info(f"Streaming cached content for topic: {topic}")
+        yield format_sse("cached", {"topic": topic})
+        for message in _content_sse(cached):
+            yield message
+        return
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def forward(item):
+        # Called from the crew thread; the client may have left and its
+        # event loop closed by the time the crew reports progress
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            pass
+
+    yield format_sse("queued", {"topic": topic})
+    try:
+        future = start_content(topic, on_event=lambda event, data: forward((event, data)), style=style)
+    except ServerBusy as e:
+        # The queue filled up after the endpoint's admission check
+        yield format_sse("error", {"detail": str(e), "retry_after": e.retry_after})
+        return
+    future.add_done_callback(lambda f: forward(None))
+
+    while True:
+        try:
+            item = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            yield ": keep-alive\n\n"
+            continue
+        if item is None:
+            break
+        yield format_sse(*item)
+
+    try:
+        content = future.result()
+    except Exception as e:
+        logging.error(f"Streaming crew run failed for topic {topic}: {e!r}")
+        yield format_sse("error", {"detail": f"An internal server error occurred: {str(e)}"})
+        return
+    if not content:
+        logging.error("Content creation failed. The crew returned an empty result.")
+        yield format_sse("error", {"detail": "Content creation failed, received no output from the agent."})
+        return
+    logging.info(f"Successfully streamed content for topic: {topic}")
+    for message in _content_sse(content):
+        yield message
+
+@app.post("/create-content/stream", summary="Stream Content", description="Create a blog post on a given topic, streaming progress as Server-Sent Events.")
+async def create_content_stream(request: ContentRequest, http_request: Request):
+    """
+    Streams the crew's progress and then the generated post. A client
+    that disconnects stops the stream, but not the crew run: its content
+    is still cached for the next request.
+    """
+    logging.info(f"Received request to stream content for topic: {request.topic}")
+    cached = await asyncio.to_thread(lookup_content, request.topic, request.style)
+    if cached is None:
+        # Refuse before the stream starts, while a 429 or 503 can still be sent
+        try:
+            rate_limit(client_id(http_request))
+            crew_flights.admit(content_key(request.topic, request.style))
+        except RateLimited as e:
+            raise rate_limited(e)
+        except ServerBusy as e:
+            raise server_busy(e)
+    return StreamingResponse(
+        stream_content_events(request.topic, request.style, cached),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- Batch ---
+# Content calendars submit dozens of topics at once. A batch runs its
+# topics on the crew thread pool, at most BATCH_MAX_PARALLEL at a time so
+# one batch cannot queue up ahead of every other request, and streams a
+# result line per topic as NDJSON as soon as that topic finishes.
+BATCH_MAX_TOPICS = int(os.getenv("BATCH_MAX_TOPICS", "200"))
+BATCH_MAX_PARALLEL = int(os.getenv("BATCH_MAX_PARALLEL", str(max(1, CREW_MAX_WORKERS // 2))))
+
+class BatchContentRequest(BaseModel):
+    topics: List[str]
+    style: Optional[str] = None  # Applied to every topic
+
+    @field_validator("topics")
+    @classmethod
+    def check_batch_size(cls, topics):
+        if not topics:
+            raise ValueError("At least one topic is required.")
+        if len(topics) > BATCH_MAX_TOPICS:
+            raise ValueError(f"At most {BATCH_MAX_TOPICS} topics can be submitted at once.")
+        return topics
+
+async def _batch_item(index: int, topic: str, style: Optional[str], slots: asyncio.Semaphore,
+                      client: Optional[str] = None):
+    # The outcome of one topic as a result line; errors stay with the topic.
+    # Each topic that needs the crew is charged to the client's bucket.
+    async with slots:
+        try:
+            cached = await asyncio.to_thread(lookup_content, topic, style)
+            if cached is None and client is not None:
+                rate_limit(client)
+            content = cached if cached is not None else await run_crew(topic, style)
+        except RateLimited as e:
+            logging.warning(f"Batch topic {topic!r} refused: {client} is rate limited")
+            return {"index": index, "topic": topic, "status": FAILED, "error": str(e),
+                    "retry_after": max(1, math.ceil(e.retry_after))}
+        except ServerBusy as e:
+            logging.warning(f"Batch topic {topic!r} refused: the crew queue is full")
+            return {"index": index, "topic": topic, "status": FAILED, "error": str(e),
+                    "retry_after": e.retry_after}
+        except Exception as e:
+            logging.error(f"Batch topic {topic!r} failed: {e!r}")
+            return {"index": index, "topic": topic, "status": FAILED, "error": str(e) or type(e).__name__}
+    if not content:
+        logging.error(f"Batch topic {topic!r} failed. The crew returned an empty result.")
+        return {"index": index, "topic": topic, "status": FAILED,
+                "error": "Content creation failed, received no output from the agent."}
+    return {"index": index, "topic": topic, "status": SUCCEEDED, "content": content,
+            "cached": cached is not None}
+
+async def batch_content_lines(topics, style: Optional[str] = None, client: Optional[str] = None):
+    """
+    Yields one NDJSON line per topic in the order the topics finish, then
+    a summary line. Results carry the topic's index in the request. With
+    a client, each topic that misses the cache takes one of its tokens.
+    """
+    slots = asyncio.Semaphore(BATCH_MAX_PARALLEL)
+    pending = [asyncio.ensure_future(_batch_item(i, topic, style, slots, client))
+               for i, topic in enumerate(topics)]
+    succeeded = 0
+    try:
+        for next_done in asyncio.as_completed(pending):
+            result = await next_done
+            succeeded += result["status"] == SUCCEEDED
+            yield json.dumps(result) + "\n"
+    finally:
+        # The client went away: stop the topics that have not started yet.
+        # Crew runs already under way finish and fill the cache.
+        for task in pending:
+            task.cancel()
+    logging.info(f"Batch finished: {succeeded} of {len(topics)} topics succeeded")
+    yield json.dumps({"done": True, "succeeded": succeeded, "failed": len(topics) - succeeded}) + "\n"
+
+@app.post("/create-content/batch", summary="Create Content in Batch", description="Create blog posts for a list of topics, streaming one NDJSON result line per topic as it finishes.")
+async def create_content_batch(request: BatchContentRequest, http_request: Request):
+    """
+    Runs a batch of topics with bounded parallelism. A failed topic gets a
+    "failed" line with its error; the other topics carry on. Rate limits
+    are charged per topic that has to be generated, so a topic refused
+    for the client's rate limit fails with a retry_after.
+    """
+    logging.info(f"Received batch of {len(request.topics)} topics")
+    return StreamingResponse(batch_content_lines(request.topics, request.style, client_id(http_request)),
+                             media_type="application/x-ndjson")
+
+# --- Job API ---
+# For callers that cannot hold a connection open for a whole crew run:
+# submit a job, then poll its status and fetch the result when it is done.
+
+def _job_status(job):
+    status = {
+        "job_id": job.id,
+        "topic": job.topic,
+        "status": job.status,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+    if job.error:
+        status["error"] = job.error
+    return status
+
+def _get_job_or_404(job_id: str):
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return job
+
+@app.post("/jobs", status_code=202, summary="Submit Content Job", description="Queue a blog post on a given topic and return a job ID immediately.")
+def submit_job(request: ContentRequest, http_request: Request):
+    """
+    Queues a crew run on the crew thread pool and returns its job ID with
+    the URLs to poll. Answers 429 instead if a topic that is not cached
+    is over the client's rate limit, or 503 if the crew queue is full.
+    """
+    cached = lookup_content(request.topic, request.style)
+    if cached is None:
+        try:
+            rate_limit(client_id(http_request))
+            crew_flights.admit(content_key(request.topic, request.style))
+        except RateLimited as e:
+            raise rate_limited(e)
+        except ServerBusy as e:
+            raise server_busy(e)
+    store = get_job_store()
+    job = store.create(request.topic)
+    if cached is not None:
+        # Cached topics finish at once, without taking a crew worker
+        store.update(job.id, SUCCEEDED, result=cached)
+        job = store.get(job.id)
+        logging.info(f"Job {job.id} served from the content cache for topic: {request.topic}")
+    else:
+        try:
+            future = start_content(request.topic, on_start=partial(store.update, job.id, RUNNING),
+                                   style=request.style)
+        except ServerBusy as e:
+            # The queue filled up after the admission check above
+            store.update(job.id, FAILED, error=str(e))
+            raise server_busy(e)
+        future.add_done_callback(partial(finish_job, store, job.id, request.topic))
+        logging.info(f"Queued job {job.id} for topic: {request.topic}")
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "result_url": f"/jobs/{job.id}/result",
+    }
+
+@app.get("/jobs/{job_id}", summary="Job Status", description="Check the status of a content job.")
+def get_job_status(job_id: str):
+    return _job_status(_get_job_or_404(job_id))
+
+@app.get("/jobs/{job_id}/result", summary="Job Result", description="Fetch the content generated by a finished job.")
+def get_job_result(job_id: str, accept: Optional[str] = Header(default=None)):
+    """
+    Returns the generated content once the job has succeeded, as JSON or
+    as markdown. While it is still pending or running, returns 202 with
+    the job status instead.
+    """
+    job = _get_job_or_404(job_id)
+    if job.status == SUCCEEDED:
+        return content_response(job.result, accept, job_id=job.id)
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {job.error}")
+    return JSONResponse(status_code=202, content=_job_status(job))
+
+@app.get("/cache/stats", summary="Cache Statistics", description="Content cache hits, misses and size.")
+def get_cache_stats():
+    """
+    Returns the content cache statistics, with those of the research
+    cache, the web search memo and the content archive under "research",
+    "search" and "archive".
+    """
+    return {
+        **get_content_cache().stats(),
+        "research": get_research_cache().stats(),
+        "search": search_memo.stats(),
+        "archive": get_content_archive().stats(),
+    }
+
+# --- Archive ---
+# Every generated post, searchable by the words of its topic and body.
+
+@app.get("/archive/search", summary="Search Archive", description="Full-text search over every generated post.")
+def search_archive(q: str = Query(..., min_length=1, description="Words that must all appear in the topic or body"),
+                   limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0)):
+    """
+    Returns the matching posts, best matches first, each with a snippet
+    of its body. Fetch a post's content from /archive/{post_id}.
+    """
+    hits = get_content_archive().search(q, limit=limit, offset=offset)
+    return {
+        "query": q,
+        "results": [
+            {"id": hit.id, "topic": hit.topic, "style": hit.style or None, "created_at": hit.created_at,
+             "snippet": hit.snippet, "score": hit.score, "url": f"/archive/{hit.id}"}
+            for hit in hits
+        ],
+    }
+
+@app.get("/archive/{post_id}", summary="Archived Post", description="Fetch a generated post from the archive.")
+def get_archived_post(post_id: int, accept: Optional[str] = Header(default=None)):
+    """
+    Returns an archived post, as JSON with its topic, style and creation
+    time, or as markdown.
+    """
+    post = get_content_archive().get(post_id)
+    if post is None:
+        raise HTTPException(status_code=404, detail=f"Archived post {post_id} not found.")
+    return content_response(post.content, accept, id=post.id, topic=post.topic, style=post.style or None,
+                            created_at=post.created_at)
+
+# Metrics read at scrape time from the statistics kept above
+Gauge("crew_runs_in_flight", "Crew runs queued or running.", function=lambda: len(crew_flights))
+Counter("crew_runs_joined_total", "Requests that shared a crew run already in flight.",
+        function=lambda: crew_flights.joined)
+Counter("crew_runs_rejected_total", "Crew runs refused because the crew queue was full.",
+        function=lambda: crew_flights.rejected)
+Counter("rate_limited_requests_total", "Requests refused by the per-client rate limits.",
+        function=lambda: rate_limiter.limited)
+
+def _cache_metrics(prefix: str, name: str, stats):
+    """Exports the statistics of a ContentCache, read by `stats()`, as metrics."""
+    Counter(f"{prefix}_hits_total", f"Lookups answered by the {name}.", function=lambda: stats()["hits"])
+    Counter(f"{prefix}_misses_total", f"Lookups the {name} could not answer.", function=lambda: stats()["misses"])
+    Counter(f"{prefix}_evictions_total", f"Entries evicted from the {name}.", function=lambda: stats()["evictions"])
+    Gauge(f"{prefix}_entries", f"Entries in the {name}.", function=lambda: stats()["size"])
+
+_cache_metrics("content_cache", "content cache", lambda: get_content_cache().stats())
+_cache_metrics("research_cache", "research cache", lambda: get_research_cache().stats())
+_cache_metrics("search_memo", "web search memo", lambda: search_memo.stats())
+Gauge("content_archive_posts", "Posts in the content archive.", function=lambda: get_content_archive().stats()["posts"])
+Counter("content_archive_reused_total", "Requests answered with a post from the content archive.",
+        function=lambda: get_content_archive().reused)
+
+@app.get("/metrics", summary="Metrics", description="Request, crew and cache metrics in the Prometheus text format.")
+def get_metrics():
+    """
+    Renders every metric for Prometheus to scrape, including the duration
+    and output size of each crew stage recorded by agent.py.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 # Add a root endpoint for health checks
 @app.get("/", summary="Health Check", description="Check if the API is running.")
 def read_root():
@@ -0,0 +1,262 @@
+"""
+Prometheus-style metrics for the content API.
+
+A small, dependency-free subset of prometheus_client: counters, gauges
+and histograms, optionally with labels, rendered in the Prometheus text
+exposition format by `REGISTRY.render()` (served at GET /metrics).
+Gauges and counters can also read their value from a function at scrape
+time, which is how existing statistics (cache hits, queue depth) are
+exported without being counted twice.
+
+MetricsMiddleware records request counts, latencies and in-flight
+requests for every route.
+"""
+
+import math
+import threading
+import time
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Registry:
+    """The metrics to render. Registering a name again replaces the old metric."""
+
+    def __init__(self):
+        self._metrics = {}  # name -> metric, in registration order
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.pop(metric.name, None)
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """The text exposition format (version 0.0.4) of every metric."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), function=None, registry=REGISTRY):
+        if function is not None and labelnames:
+            raise ValueError("A metric read from a function cannot have labels")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self._children = {}  # label values -> child
+        self._lock = threading.Lock()
+        if not self.labelnames and function is None:
+            self.labels()  # Reported as 0 until first updated
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, **labels):
+        """The child metric for the given label values."""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            return child
+
+    def _unlabelled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels; use .labels()")
+        return self.labels()
+
+    def _items(self):
+        with self._lock:
+            return [(tuple(zip(self.labelnames, key)), child) for key, child in self._children.items()]
+
+    def samples(self):
+        if self.function is not None:
+            return [f"{self.name} {_format_value(self.function())}"]
+        return [f"{self.name}{_format_labels(pairs)} {_format_value(child.value)}"
+                for pairs, child in self._items()]
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+
+class Counter(_Metric):
+    """A total that only goes up."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        if amount < 0:
+            raise ValueError("Counters can only go up")
+        self._unlabelled().inc(amount)
+
+
+class Gauge(_Metric):
+    """A value that goes up and down."""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._unlabelled().dec(amount)
+
+    def set(self, value: float):
+        self._unlabelled().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class Histogram(_Metric):
+    """Counts observations (e.g. durations) in cumulative buckets."""
+
+    kind = "histogram"
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS,
+                 registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets)) + ((math.inf,) if math.inf not in buckets else ())
+        super().__init__(name, documentation, labelnames, registry=registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._unlabelled().observe(value)
+
+    def samples(self):
+        lines = []
+        for pairs, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + (('le', _format_value(float(bound))),))} "
+                             f"{cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {cumulative}")
+        return lines
+
+
+# HTTP metrics, recorded by MetricsMiddleware
+http_requests = Counter("http_requests_total", "HTTP requests handled.", ["method", "path", "status"])
+http_request_seconds = Histogram(
+    "http_request_duration_seconds", "Time from receiving a request to finishing its response.",
+    ["method", "path"], buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests being handled.")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording every HTTP request in the metrics above.
+    Requests are labelled with their route's path template (e.g.
+    /jobs/{job_id}), so job IDs do not create new series; requests that
+    match no route are labelled "unmatched". A streamed response counts
+    until its last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        start = time.perf_counter()
+        http_in_flight.inc()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_requests.labels(method=scope["method"], path=path, status=status).inc()
+            http_request_seconds.labels(method=scope["method"], path=path).observe(time.perf_counter() - start)
@@ -7,6 +7,9 @@ including agent creation, task definition, and crew execution.
 
 import pytest
 import os
+import subprocess
+import threading
+from datetime import datetime, timedelta
 from unittest.mock import Mock, patch, MagicMock
 import sys
 
@@ -14,7 +17,11 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Import the agent module
-from agent import create_content_crew
+import agent
+from agent import (
+    build_crew, create_content_crew, crew_progress, get_agents, get_research_cache,
+    make_agents, memoize_search, record_crew_timings, reset_agents, search_memo,
+)
 
 
 class TestAgentInitialization:
@@ -33,12 +40,13 @@ class TestAgentInitialization:
         mock_agent_instance = Mock()
         mock_agent_class.return_value = mock_agent_instance
         
-        # Import and test agent creation
-        from agent import researcher, content_writer
+        # Agents are built on first use
+        researcher, content_writer = get_agents()
         
         # Verify that agents were created
         assert researcher is not None
         assert content_writer is not None
+        assert mock_agent_class.call_args_list[0].kwargs['tools'] == [mock_search_tool]
     
     @patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}, clear=True)
     @patch('agent.Agent')
@@ -48,12 +56,13 @@ class TestAgentInitialization:
         mock_agent_instance = Mock()
         mock_agent_class.return_value = mock_agent_instance
         
-        # Import and test agent creation
-        from agent import researcher, content_writer
+        # Agents are built on first use
+        researcher, content_writer = get_agents()
         
         # Verify that agents were created
         assert researcher is not None
         assert content_writer is not None
+        assert mock_agent_class.call_args_list[0].kwargs['tools'] == []
     
     def test_missing_openai_key_raises_error(self):
         """Test that missing OpenAI API key raises ValueError."""
@@ -213,12 +222,12 @@ class TestAgentRoles:
         mock_agent_instance = Mock()
         mock_agent_class.return_value = mock_agent_instance
         
-        # Import the researcher agent
-        from agent import researcher
+        # Build the agents
+        get_agents()
         
         # Verify agent creation was called with correct parameters
         mock_agent_class.assert_called()
-        call_args = mock_agent_class.call_args
+        call_args = mock_agent_class.call_args_list[0]
         
         # Check that the researcher agent has the correct role
         assert 'role' in call_args.kwargs
@@ -231,8 +240,8 @@ class TestAgentRoles:
         mock_agent_instance = Mock()
         mock_agent_class.return_value = mock_agent_instance
         
-        # Import the content writer agent
-        from agent import content_writer
+        # Build the agents
+        get_agents()
         
         # Verify agent creation was called with correct parameters
         mock_agent_class.assert_called()
@@ -330,6 +339,461 @@ class TestCrewProcess:
         # Note: We can't directly test the Process.sequential enum, but we can verify it's set
 
 
+
+class TestProgressReporting:
+    """Test the progress events reported while a crew runs."""
+    
+    @patch('agent.Crew')
+    @patch('agent.Task')
+    @patch('agent.researcher')
+    @patch('agent.content_writer')
+    def test_events_reported_to_listener(self, mock_content_writer, mock_researcher,
+                                         mock_task_class, mock_crew_class):
+        """Test that research start, research report and writing start are reported."""
+        mock_task_class.side_effect = [Mock(), Mock()]
+        mock_crew_instance = Mock()
+        mock_crew_class.return_value = mock_crew_instance
+        
+        def kickoff():
+            # The researcher's task finishing triggers its callback
+            research_callback = mock_task_class.call_args_list[0].kwargs['callback']
+            research_callback(Mock(raw="Research report"))
+            return "Generated blog post"
+        mock_crew_instance.kickoff.side_effect = kickoff
+        
+        events = []
+        token = crew_progress.set(lambda event, data: events.append((event, data)))
+        try:
+            result = create_content_crew("AI in Healthcare")
+        finally:
+            crew_progress.reset(token)
+        
+        assert result == "Generated blog post"
+        assert events == [
+            ("research_started", {"topic": "AI in Healthcare"}),
+            ("research_done", {"report": "Research report"}),
+            ("writing_started", {}),
+        ]
+    
+    @patch('agent.Crew')
+    @patch('agent.Task')
+    @patch('agent.researcher')
+    @patch('agent.content_writer')
+    def test_no_callback_without_listener(self, mock_content_writer, mock_researcher,
+                                          mock_task_class, mock_crew_class):
+        """Test that tasks get no callback when nobody listens."""
+        mock_task_class.side_effect = [Mock(), Mock()]
+        mock_crew_class.return_value.kickoff.return_value = "Test result"
+        
+        create_content_crew("AI in Healthcare")
+        
+        assert 'callback' not in mock_task_class.call_args_list[0].kwargs
+
+
+
+class TestLazyAgents:
+    """Test that crewai and the agents are only loaded when needed."""
+    
+    def test_importing_main_does_not_import_crewai(self):
+        """Test that importing the API leaves crewai unloaded."""
+        code = "import sys, main; print('crewai' in sys.modules, 'crewai_tools' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env={**os.environ, "OPENAI_API_KEY": "test_key"},
+            capture_output=True, text=True, timeout=60,
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.splitlines()[-1] == "False False"
+    
+    @patch('agent.Agent')
+    def test_agents_reused_within_a_thread(self, mock_agent_class):
+        """Test that the agents are built once and then reused."""
+        mock_agent_class.side_effect = lambda **kwargs: Mock()
+        
+        first = get_agents()
+        second = get_agents()
+        
+        assert first == second
+        assert mock_agent_class.call_count == 2
+    
+    @patch('agent.Agent')
+    def test_agents_not_shared_between_threads(self, mock_agent_class):
+        """Test that each thread gets its own agents."""
+        mock_agent_class.side_effect = lambda **kwargs: Mock()
+        results = []
+        
+        thread = threading.Thread(target=lambda: results.append(get_agents()))
+        thread.start()
+        thread.join(timeout=5)
+        
+        assert results[0] != get_agents()
+    
+    @patch('agent.Agent')
+    def test_reset_rebuilds_agents(self, mock_agent_class):
+        """Test that reset_agents() drops the cached agents."""
+        mock_agent_class.side_effect = lambda **kwargs: Mock()
+        
+        first = get_agents()
+        reset_agents()
+        
+        assert get_agents() != first
+    
+    @patch('agent.Agent')
+    def test_make_agents_overrides(self, mock_agent_class):
+        """Test that keyword arguments override the agent defaults."""
+        make_agents(verbose=False, max_iter=3)
+        
+        for call in mock_agent_class.call_args_list:
+            assert call.kwargs['verbose'] is False
+            assert call.kwargs['max_iter'] == 3
+    
+    @patch('agent.Crew')
+    @patch('agent.Task')
+    def test_build_crew_with_given_agents_and_overrides(self, mock_task_class, mock_crew_class):
+        """Test building a crew from given agents with Crew overrides."""
+        agents = (Mock(), Mock())
+        
+        build_crew("AI in Healthcare", agents=agents, verbose=False)
+        
+        assert mock_task_class.call_args_list[0].kwargs['agent'] is agents[0]
+        assert mock_task_class.call_args_list[1].kwargs['agent'] is agents[1]
+        assert mock_crew_class.call_args.kwargs['agents'] == list(agents)
+        assert mock_crew_class.call_args.kwargs['verbose'] is False
+
+
+
+def fake_crew(**kwargs):
+    """A mock crew that keeps its tasks, like a real Crew."""
+    crew = Mock(tasks=kwargs['tasks'])
+    crew.kickoff.return_value = "Generated blog post"
+    return crew
+
+
+class TestFakeBackend:
+    """Test the CONTENT_BACKEND=fake stand-in for crewai."""
+    
+    def run_python(self, code, **env):
+        """Run code in a fresh interpreter with the given environment changes; return its result."""
+        environ = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+        return subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env={**environ, **env},
+            capture_output=True, text=True, timeout=60,
+        )
+    
+    def test_runs_without_api_key_or_crewai(self):
+        """Test that the fake backend needs no OpenAI key and never imports crewai."""
+        code = ("import sys, agent; content = str(agent.create_content_crew('AI'));"
+                "print(len(content), 'crewai' in sys.modules)")
+        result = self.run_python(code, CONTENT_BACKEND="fake", FAKE_LLM_LATENCY="0",
+                                 FAKE_LLM_OUTPUT_CHARS="1500")
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.splitlines()[-1] == "1500 False"
+    
+    def test_unknown_backend_is_rejected(self):
+        """Test that a misspelt CONTENT_BACKEND fails at import."""
+        result = self.run_python("import agent", CONTENT_BACKEND="openia", OPENAI_API_KEY="test_key")
+        assert result.returncode != 0
+        assert "Unknown CONTENT_BACKEND 'openia'" in result.stderr
+    
+    def test_backend_is_part_of_the_fingerprint(self):
+        """Test that fake content is never served from the cache as real content."""
+        real = agent.crew_config_fingerprint()
+        with patch('agent.CONTENT_BACKEND', 'fake'):
+            assert agent.crew_config_fingerprint() != real
+            assert agent.get_search_tool() is None
+
+
+class TestResearchCache:
+    """Test that research reports are cached and reused by the writer."""
+    
+    @patch('agent.Crew', side_effect=fake_crew)
+    @patch('agent.Task')
+    @patch('agent.researcher')
+    @patch('agent.content_writer')
+    def test_research_reused_for_new_style(self, mock_content_writer, mock_researcher,
+                                           mock_task_class, mock_crew_class):
+        """Test that a second run for a topic only runs the writer."""
+        mock_task_class.side_effect = lambda **kwargs: Mock(output=Mock(raw="Research report"))
+        
+        create_content_crew("AI in Healthcare")
+        assert get_research_cache().get("ai in healthcare") == "Research report"
+        
+        mock_task_class.reset_mock()
+        create_content_crew("AI in Healthcare", style="Short and casual")
+        
+        # Only the writing task, with the cached report and the style
+        assert mock_task_class.call_count == 1
+        description = mock_task_class.call_args.kwargs['description']
+        assert "Research report" in description
+        assert "Short and casual" in description
+        assert mock_task_class.call_args.kwargs['agent'] == mock_content_writer
+        assert mock_crew_class.call_args.kwargs['agents'] == [mock_content_writer]
+    
+    @patch('agent.Crew', side_effect=fake_crew)
+    @patch('agent.Task')
+    @patch('agent.researcher')
+    @patch('agent.content_writer')
+    def test_cached_research_is_reported(self, mock_content_writer, mock_researcher,
+                                         mock_task_class, mock_crew_class):
+        """Test that a cached report is sent to the progress listener."""
+        get_research_cache().set("AI", "Research report")
+        events = []
+        token = crew_progress.set(lambda event, data: events.append((event, data)))
+        try:
+            create_content_crew("AI")
+        finally:
+            crew_progress.reset(token)
+        
+        assert events == [
+            ("research_done", {"report": "Research report", "cached": True}),
+            ("writing_started", {}),
+        ]
+    
+    @patch('agent.Crew', side_effect=fake_crew)
+    @patch('agent.Task')
+    @patch('agent.researcher')
+    @patch('agent.content_writer')
+    def test_missing_report_is_not_cached(self, mock_content_writer, mock_researcher,
+                                          mock_task_class, mock_crew_class):
+        """Test that a research task without output text caches nothing."""
+        mock_task_class.side_effect = lambda **kwargs: Mock(output=None)
+        
+        create_content_crew("AI")
+        
+        assert get_research_cache().get("AI") is None
+
+
+class TestCrewMetrics:
+    """Test the stage timings recorded around crew.kickoff()."""
+    
+    def timed_task(self, seconds, output):
+        """A mock task that ran for `seconds` and produced `output`."""
+        start = datetime(2024, 1, 1, 12, 0, 0)
+        return Mock(start_time=start, end_time=start + timedelta(seconds=seconds), output=Mock(raw=output))
+    
+    def stage_count(self, stage):
+        """How many durations have been recorded for a stage."""
+        counts, _ = agent.crew_stage_seconds.labels(stage=stage).snapshot()
+        return sum(counts)
+    
+    def test_records_each_stage(self):
+        """Test that task durations, output sizes and the total are returned and recorded."""
+        crew = Mock(tasks=[self.timed_task(40, "r" * 1200), self.timed_task(15, "w" * 3000)])
+        before = {stage: self.stage_count(stage) for stage in ("research", "writing", "total")}
+        
+        timings = record_crew_timings(crew, "w" * 3000, 56.5)
+        
+        assert timings == {
+            "research": {"seconds": 40, "chars": 1200},
+            "writing": {"seconds": 15, "chars": 3000},
+            "total": {"seconds": 56.5, "chars": 3000},
+        }
+        for stage in before:
+            assert self.stage_count(stage) == before[stage] + 1
+    
+    def test_writer_only_crew(self):
+        """Test that a crew reusing cached research only has a writing stage."""
+        crew = Mock(tasks=[self.timed_task(15, "Post")])
+        
+        timings = record_crew_timings(crew, "Post", 15.2)
+        
+        assert set(timings) == {"writing", "total"}
+    
+    def test_missing_times_are_none(self):
+        """Test that tasks without recorded times still report their output size."""
+        crew = Mock(tasks=[Mock(start_time=None, end_time=None, output=Mock(raw="Report")),
+                           Mock(start_time=None, end_time=None, output=None)])
+        
+        timings = record_crew_timings(crew, Mock(raw="Post"), 1.0)
+        
+        assert timings["research"] == {"seconds": None, "chars": 6}
+        assert timings["writing"] == {"seconds": None, "chars": None}
+        assert timings["total"] == {"seconds": 1.0, "chars": 4}
+    
+    @patch('agent.Crew', side_effect=fake_crew)
+    @patch('agent.Task')
+    @patch('agent.researcher')
+    @patch('agent.content_writer')
+    def test_runs_are_counted(self, mock_content_writer, mock_researcher,
+                              mock_task_class, mock_crew_class):
+        """Test that create_content_crew counts runs by outcome and research source."""
+        mock_task_class.side_effect = lambda **kwargs: self.timed_task(1, "Research report")
+        succeeded = agent.crew_runs.labels(outcome="succeeded", research="fresh")
+        cached = agent.crew_runs.labels(outcome="succeeded", research="cached")
+        before = succeeded.value, cached.value
+        
+        create_content_crew("AI")
+        create_content_crew("AI", style="Casual")
+        
+        assert (succeeded.value, cached.value) == (before[0] + 1, before[1] + 1)
+        assert agent.crews_running.labels().value == 0
+    
+    @patch('agent.Crew')
+    @patch('agent.Task')
+    @patch('agent.researcher')
+    @patch('agent.content_writer')
+    def test_failed_runs_are_counted(self, mock_content_writer, mock_researcher,
+                                     mock_task_class, mock_crew_class):
+        """Test that a crew that raises is counted as failed."""
+        mock_crew_class.return_value.kickoff.side_effect = Exception("LLM quota exceeded")
+        failed = agent.crew_runs.labels(outcome="failed", research="fresh")
+        before = failed.value
+        
+        with pytest.raises(Exception, match="LLM quota exceeded"):
+            create_content_crew("AI")
+        
+        assert failed.value == before + 1
+        assert agent.crews_running.labels().value == 0
+
+
+class TestResearchFanout:
+    """Test researching a topic's angles in parallel."""
+    
+    def fanout_crew(self, barrier=None, fail=None):
+        """A Crew stand-in: angle crews report on their angles (meeting at `barrier`), the writer writes."""
+        def make(**kwargs):
+            description = kwargs['tasks'][0].description
+            crew = Mock(tasks=kwargs['tasks'])
+            if "Focus only on" not in description:
+                crew.kickoff.return_value = "Generated blog post"
+                return crew
+            angles = description.split("Focus only on these aspects of AI: ")[1].split(". ")[0]
+            
+            def kickoff():
+                if barrier is not None:
+                    barrier.wait()
+                if fail and fail in angles:
+                    raise Exception("Search quota exceeded")
+                return f"Report on {angles}"
+            crew.kickoff.side_effect = kickoff
+            return crew
+        return make
+    
+    def test_angle_groups(self):
+        """Test that the angles are split round-robin and capped at one per group."""
+        assert agent.research_angle_groups(1) == [agent.RESEARCH_ANGLES]
+        assert agent.research_angle_groups(2) == [["key players", "potential future developments"],
+                                                  ["innovations"]]
+        assert agent.research_angle_groups(10) == [[angle] for angle in agent.RESEARCH_ANGLES]
+        assert agent.research_angle_groups(0) == [agent.RESEARCH_ANGLES]
+    
+    @patch('agent.RESEARCH_FANOUT', 3)
+    @patch('agent.Crew')
+    @patch('agent.Task', side_effect=lambda **kwargs: Mock(description=kwargs['description'], output=None))
+    @patch('agent.researcher')
+    @patch('agent.content_writer')
+    def test_angles_run_in_parallel_and_are_merged(self, mock_content_writer, mock_researcher,
+                                                   mock_task_class, mock_crew_class):
+        """Test that every angle is researched at once and the writer gets the merged report."""
+        # Each angle crew waits for the other two, so this only passes if they overlap
+        mock_crew_class.side_effect = self.fanout_crew(barrier=threading.Barrier(3, timeout=5))
+        events = []
+        token = crew_progress.set(lambda event, data: events.append((event, data)))
+        try:
+            result = create_content_crew("AI")
+        finally:
+            crew_progress.reset(token)
+        
+        assert result == "Generated blog post"
+        assert mock_crew_class.call_count == 4
+        merged = get_research_cache().get("AI")
+        for angle in agent.RESEARCH_ANGLES:
+            assert f"## Research: {angle}\n\nReport on {angle}" in merged
+        writer_crew = mock_crew_class.call_args_list[-1].kwargs
+        assert writer_crew['agents'] == [mock_content_writer]
+        assert merged in writer_crew['tasks'][0].description
+        assert [event for event, _ in events] == (
+            ["research_started"] + ["research_progress"] * 3 + ["research_done", "writing_started"])
+        assert events[3][1]["done"] == 3
+    
+    @patch('agent.RESEARCH_FANOUT', 2)
+    @patch('agent.Crew')
+    @patch('agent.Task', side_effect=lambda **kwargs: Mock(description=kwargs['description'], output=None))
+    @patch('agent.researcher')
+    @patch('agent.content_writer')
+    def test_failed_angle_fails_the_run(self, mock_content_writer, mock_researcher,
+                                        mock_task_class, mock_crew_class):
+        """Test that an angle that fails fails the run, and nothing is cached or written."""
+        mock_crew_class.side_effect = self.fanout_crew(fail="innovations")
+        failed = agent.crew_runs.labels(outcome="failed", research="fresh")
+        before = failed.value
+        
+        with pytest.raises(Exception, match="Search quota exceeded"):
+            create_content_crew("AI")
+        
+        assert mock_crew_class.call_count == 2
+        assert get_research_cache().get("AI") is None
+        assert failed.value == before + 1
+    
+    def test_fanout_is_part_of_the_fingerprints(self):
+        """Test that merged reports are not mixed up with single-task ones in the caches."""
+        crew, research = agent.crew_config_fingerprint(), agent.research_config_fingerprint()
+        with patch('agent.RESEARCH_FANOUT', 3):
+            assert agent.crew_config_fingerprint() != crew
+            assert agent.research_config_fingerprint() != research
+
+
+class FakeSearchTool:
+    """Stands in for SerperDevTool, counting the searches it makes."""
+    n_results = 10
+    
+    def __init__(self):
+        self.searches = []
+    
+    def _run(self, **kwargs):
+        self.searches.append(kwargs["search_query"])
+        return {"organic": [{"title": kwargs["search_query"]}]}
+
+
+class TestSearchMemo:
+    """Test the memoized search tool."""
+    
+    def test_identical_queries_search_once(self):
+        """Test that repeated queries are answered from the memo."""
+        tool = memoize_search(FakeSearchTool)()
+        
+        first = tool._run(search_query="AI in Healthcare")
+        second = tool._run(search_query="ai in  healthcare")
+        
+        assert tool.searches == ["AI in Healthcare"]
+        assert first == second
+        assert first is not second
+    
+    def test_memo_shared_between_tools(self):
+        """Test that the memo is shared by every tool instance."""
+        memoized = memoize_search(FakeSearchTool)
+        first_tool, second_tool = memoized(), memoized()
+        
+        first_tool._run(search_query="AI")
+        second_tool._run(search_query="AI")
+        
+        assert first_tool.searches == ["AI"]
+        assert second_tool.searches == []
+    
+    def test_different_queries_search_separately(self):
+        """Test that different queries are not deduplicated."""
+        tool = memoize_search(FakeSearchTool)()
+        
+        tool._run(search_query="AI")
+        tool._run(search_query="Blockchain")
+        
+        assert tool.searches == ["AI", "Blockchain"]
+    
+    def test_results_expire(self):
+        """Test that a query is searched again after the TTL."""
+        tool = memoize_search(FakeSearchTool)()
+        
+        with patch('cache.time.time', return_value=1000.0):
+            tool._run(search_query="AI")
+        with patch('cache.time.time', return_value=1000.0 + search_memo.ttl_seconds + 1):
+            tool._run(search_query="AI")
+        
+        assert tool.searches == ["AI", "AI"]
+
+
 if __name__ == "__main__":
     # Run the tests
     pytest.main([__file__, "-v"])
@@ -0,0 +1,151 @@
+"""
+Unit tests for the content archive in archive.py.
+"""
+
+import pytest
+import os
+import sys
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from archive import ContentArchive, fts_query, topic_similarity, topic_terms
+
+
+@pytest.fixture
+def archive():
+    """Provide an empty in-memory archive."""
+    archive = ContentArchive()
+    yield archive
+    archive.close()
+
+
+class TestTopics:
+    """Test topic comparison and query building."""
+
+    def test_topic_terms_ignore_case_punctuation_and_stopwords(self):
+        """Test that only the meaningful words of a topic are compared."""
+        assert topic_terms("The Future of AI, in Healthcare!") == {"future", "ai", "healthcare"}
+        assert topic_terms("To be") == {"to", "be"}
+
+    @pytest.mark.parametrize("a, b", [
+        ("How to learn Rust", "Why learn Rust"),
+        ("client-1 topic 10", "client-10 topic 1"),
+    ])
+    def test_different_topics_with_shared_words(self, a, b):
+        """Test that question words and hyphenated words keep topics apart."""
+        assert topic_similarity(a, b) < 1.0
+
+    @pytest.mark.parametrize("a, b, expected", [
+        ("AI in Healthcare", "healthcare AI", 1.0),
+        ("AI in Healthcare", "The future of AI in healthcare", 2 / 3),
+        ("AI in Healthcare", "Quantum computing", 0.0),
+        ("AI", "", 0.0),
+    ])
+    def test_topic_similarity(self, a, b, expected):
+        """Test the Jaccard similarity of topic terms."""
+        assert topic_similarity(a, b) == pytest.approx(expected)
+
+    def test_fts_query_quotes_every_word(self):
+        """Test that FTS5 syntax in user input is treated as plain words."""
+        assert fts_query('AI: "agents" NOT (rag*)') == '"ai" "agents" "not" "rag"'
+        assert fts_query("ai agents", any_term=True) == '"ai" OR "agents"'
+        assert fts_query("!!!") == ""
+
+
+class TestArchive:
+    """Test storing, retrieving and searching posts."""
+
+    def test_add_and_get(self, archive):
+        """Test that an archived post can be fetched by its ID."""
+        post_id = archive.add("AI in Healthcare", "# AI in Healthcare\n\nBody.", style="Casual")
+        post = archive.get(post_id)
+        assert (post.id, post.topic, post.style) == (post_id, "AI in Healthcare", "Casual")
+        assert post.content == "# AI in Healthcare\n\nBody."
+        assert archive.get(post_id + 1) is None
+        assert archive.stats()["posts"] == 1
+
+    def test_search_ranks_topic_matches_first(self, archive):
+        """Test that posts about a term outrank posts that only mention it."""
+        mention = archive.add("Cloud costs", "Agents are mentioned once in this post about budgets.")
+        about = archive.add("Autonomous agents", "How software agents plan and act.")
+        archive.add("Quantum computing", "Qubits and error correction.")
+        hits = archive.search("agents")
+        assert [hit.id for hit in hits] == [about, mention]
+        assert hits[0].score > hits[1].score
+        assert "**agents**" in hits[0].snippet
+
+    def test_search_stems_and_requires_every_word(self, archive):
+        """Test that word forms match and that every query word must appear."""
+        archive.add("Agentic workflows", "An agent plans its tasks.")
+        archive.add("Task planning", "Planning without any helpers.")
+        assert [hit.topic for hit in archive.search("agents planned")] == ["Agentic workflows"]
+        assert archive.search('"unbalanced (query') == []
+        assert archive.search("") == []
+
+    def test_search_pages(self, archive):
+        """Test limit and offset."""
+        for i in range(5):
+            archive.add(f"Robotics part {i}", "Robots.")
+        first, second = archive.search("robotics", limit=3), archive.search("robotics", limit=3, offset=3)
+        assert len(first) == 3 and len(second) == 2
+        assert not {hit.id for hit in first} & {hit.id for hit in second}
+
+    def test_max_posts_drops_the_oldest(self):
+        """Test that a capped archive keeps only its newest posts, in the index too."""
+        archive = ContentArchive(max_posts=2)
+        first = archive.add("Robotics part 1", "Robots.")
+        archive.add("Robotics part 2", "Robots.")
+        third = archive.add("Robotics part 3", "Robots.")
+        assert archive.stats()["posts"] == 2
+        assert archive.get(first) is None and archive.get(third) is not None
+        assert len(archive.search("robots")) == 2
+        archive.close()
+
+    def test_survives_reopening(self, tmp_path):
+        """Test that a file-backed archive keeps its posts and index."""
+        path = str(tmp_path / "archive.db")
+        archive = ContentArchive(path)
+        archive.add("Edge computing", "Latency at the edge.")
+        archive.close()
+        archive = ContentArchive(path)
+        assert [hit.topic for hit in archive.search("latency")] == ["Edge computing"]
+        archive.add("Edge networks", "Latency again.")
+        assert len(archive.search("latency")) == 2
+        archive.close()
+
+
+class TestFind:
+    """Test looking up a post to reuse for a new request."""
+
+    def test_same_topic_in_other_words(self, archive):
+        """Test that the newest post with the same topic terms is found."""
+        archive.add("AI in healthcare", "Old post.")
+        newest = archive.add("Healthcare AI", "New post.")
+        archive.add("AI in finance", "Other topic.")
+        assert archive.find("The AI in Healthcare").id == newest
+        assert archive.stats() == {"posts": 3, "lookups": 1, "reused": 1}
+
+    def test_similar_topics_need_a_lower_threshold(self, archive):
+        """Test that a topic with extra words is only reused below 1.0."""
+        post_id = archive.add("The future of AI in healthcare", "Post.")
+        assert archive.find("AI in healthcare") is None
+        assert archive.find("AI in healthcare", min_similarity=0.6).id == post_id
+        assert archive.stats()["reused"] == 1
+
+    def test_style_and_configuration_must_match(self, archive):
+        """Test that posts written in another style or configuration are not reused."""
+        archive.add("Edge computing", "Casual post.", style="Casual", config_fingerprint="v1")
+        assert archive.find("Edge computing", style="casual ", config_fingerprint="v1") is not None
+        assert archive.find("Edge computing", style="Formal", config_fingerprint="v1") is None
+        assert archive.find("Edge computing", style="Casual", config_fingerprint="v2") is None
+        assert archive.find("Edge computing", config_fingerprint="v1") is None
+
+    def test_old_posts_are_not_reused(self, archive):
+        """Test that posts older than max_age are ignored."""
+        with patch('archive.time.time', return_value=1000.0):
+            archive.add("Edge computing", "Post.")
+        with patch('archive.time.time', return_value=1000.0 + 3600):
+            assert archive.find("Edge computing", max_age=3600) is not None
+            assert archive.find("Edge computing", max_age=3599) is None
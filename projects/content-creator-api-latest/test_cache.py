@@ -0,0 +1,152 @@
+"""
+Unit tests for the content cache in cache.py.
+"""
+
+import pytest
+import itertools
+import os
+import sys
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cache import (
+    ContentCache, InMemoryCacheBackend, SQLiteCacheBackend,
+    make_cache_key, normalize_topic, open_content_cache,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    """Provide a factory for each cache backend in turn."""
+    backends = []
+
+    def factory(max_entries=1000):
+        if request.param == "sqlite":
+            backend = SQLiteCacheBackend(str(tmp_path / f"cache-{len(backends)}.db"), max_entries)
+        else:
+            backend = InMemoryCacheBackend(max_entries)
+        backends.append(backend)
+        return backend
+
+    yield factory
+    for backend in backends:
+        backend.close()
+
+
+class TestCacheKey:
+    """Test topic normalization and cache keys."""
+
+    def test_normalize_folds_case_and_whitespace(self):
+        """Test that case and whitespace differences are ignored."""
+        assert normalize_topic("  AI in\tHealthcare \n") == "ai in healthcare"
+
+    def test_equivalent_topics_share_a_key(self):
+        """Test that near-identical topics map to the same key."""
+        assert make_cache_key("AI in Healthcare") == make_cache_key("ai  in healthcare ")
+
+    def test_different_topics_have_different_keys(self):
+        """Test that different topics map to different keys."""
+        assert make_cache_key("AI in Healthcare") != make_cache_key("AI in Finance")
+
+    def test_variant_is_part_of_the_key(self):
+        """Test that variants of a topic get their own keys."""
+        assert make_cache_key("AI", variant="Short") != make_cache_key("AI")
+        assert make_cache_key("AI", variant="Short") == make_cache_key("ai", variant=" short")
+
+    def test_configuration_is_part_of_the_key(self):
+        """Test that a configuration change invalidates cached topics."""
+        assert make_cache_key("AI", "config-a") != make_cache_key("AI", "config-b")
+
+
+class TestContentCache:
+    """Test the cache behaviour shared by both backends."""
+
+    def test_miss_then_hit(self, make_backend):
+        """Test that stored content is returned for the same topic."""
+        cache = ContentCache(make_backend())
+        assert cache.get("AI in Healthcare") is None
+
+        cache.set("AI in Healthcare", "Generated content")
+
+        assert cache.get("ai in healthcare") == "Generated content"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_entries_expire(self, make_backend):
+        """Test that entries are dropped once their TTL has passed."""
+        cache = ContentCache(make_backend(), ttl_seconds=60)
+        with patch('cache.time.time', return_value=1000.0):
+            cache.set("AI", "Generated content")
+        with patch('cache.time.time', return_value=1059.0):
+            assert cache.get("AI") == "Generated content"
+        with patch('cache.time.time', return_value=1061.0):
+            assert cache.get("AI") is None
+        assert cache.stats()["size"] == 0
+
+    def test_zero_ttl_disables_caching(self, make_backend):
+        """Test that a TTL of 0 never serves cached content."""
+        cache = ContentCache(make_backend(), ttl_seconds=0)
+        cache.set("AI", "Generated content")
+        assert cache.get("AI") is None
+
+    def test_least_recently_used_entry_is_evicted(self, make_backend):
+        """Test LRU eviction once the cache is full."""
+        cache = ContentCache(make_backend(max_entries=2))
+        # A clock that ticks one second per call, so every use is ordered
+        with patch('cache.time.time', side_effect=itertools.count(1000.0)):
+            cache.set("First", "1")
+            cache.set("Second", "2")
+            # Using "First" makes "Second" the least recently used entry
+            assert cache.get("First") == "1"
+            cache.set("Third", "3")
+
+            assert cache.get("Second") is None
+            assert cache.get("First") == "1"
+            assert cache.get("Third") == "3"
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["size"] == 2
+
+    def test_clear(self, make_backend):
+        """Test that clear() empties the cache."""
+        cache = ContentCache(make_backend())
+        cache.set("AI", "Generated content")
+        cache.clear()
+        assert cache.get("AI") is None
+
+
+def test_sqlite_hits_do_not_write(tmp_path):
+    """Test that a hit's use time is only written with the next set() or close()."""
+    path = str(tmp_path / "cache.db")
+    backend = SQLiteCacheBackend(path)
+    backend.set("key", "value", expires_at=10000.0)
+    with patch.object(backend, "_conn", wraps=backend._conn) as conn:
+        assert backend.get("key", now=500.0) == "value"
+        conn.commit.assert_not_called()
+    backend.close()
+
+    reopened = SQLiteCacheBackend(path)
+    assert reopened._conn.execute("SELECT last_used FROM content_cache").fetchone()[0] == 500.0
+    reopened.close()
+
+
+def test_sqlite_cache_survives_reopening(tmp_path):
+    """Test that the SQLite backend keeps entries across restarts."""
+    path = str(tmp_path / "cache.db")
+    cache = open_content_cache(path, config_fingerprint="config")
+    cache.set("AI in Healthcare", "Generated content")
+    cache.close()
+
+    reopened = open_content_cache(path, config_fingerprint="config")
+    assert reopened.get("AI in Healthcare") == "Generated content"
+    reopened.close()
+
+
+def test_open_content_cache_backends(tmp_path):
+    """Test choosing the backend from a path."""
+    assert isinstance(open_content_cache().backend, InMemoryCacheBackend)
+    cache = open_content_cache(str(tmp_path / "cache.db"))
+    assert isinstance(cache.backend, SQLiteCacheBackend)
+    cache.close()
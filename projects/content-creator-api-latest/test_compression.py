@@ -0,0 +1,142 @@
+"""
+Unit tests for content negotiation and compression in compression.py.
+"""
+
+import pytest
+import asyncio
+import gzip
+import os
+import sys
+import zlib
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import compression
+from compression import CompressionMiddleware, make_compressor, negotiate_encoding, parse_accept
+
+needs_brotli = pytest.mark.skipif(compression.brotli is None, reason="brotli is not installed")
+
+
+def chunked_app(chunks, content_type=b"application/x-ndjson"):
+    """An ASGI app sending `chunks` as one streamed response body."""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", content_type)]})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+    return app
+
+
+def call(app, accept_encoding):
+    """Runs an ASGI app on a GET request; returns the messages it sent."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding)]}
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+
+class TestNegotiation:
+    """Test Accept and Accept-Encoding parsing."""
+
+    def test_parse_accept(self):
+        """Test that values map to their q-values, 1 by default."""
+        assert parse_accept("gzip, br;q=0.5, *;q=0") == {"gzip": 1.0, "br": 0.5, "*": 0.0}
+        assert parse_accept("text/markdown;charset=utf-8;q=0.8") == {"text/markdown": 0.8}
+        assert parse_accept("gzip;q=high") == {"gzip": 0.0}
+        assert parse_accept(None) == {}
+
+    @pytest.mark.parametrize("header, expected", [
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("*", "br"),
+        ("br;q=0, *", "gzip"),
+        ("identity", None),
+        ("gzip;q=0", None),
+        ("", None),
+    ])
+    def test_negotiate_encoding(self, header, expected):
+        """Test that the client's q-values, then the server's preference, pick the encoding."""
+        assert negotiate_encoding(header, available=("br", "gzip")) == expected
+
+    def test_brotli_is_optional(self):
+        """Test that only gzip is offered without the brotli package."""
+        with patch('compression.brotli', None):
+            assert negotiate_encoding("br, gzip") == "gzip"
+            assert negotiate_encoding("br") is None
+
+
+class TestCompressors:
+    """Test the streaming compressors."""
+
+    @pytest.mark.parametrize("encoding", ["gzip", pytest.param("br", marks=needs_brotli)])
+    def test_round_trip(self, encoding):
+        """Test that chunks compressed one by one decode to the whole body."""
+        compressor = make_compressor(encoding)
+        chunks = [b"first line\n", b"second line\n" * 100, b"last line\n"]
+        body = b"".join(compressor.compress(chunk, final=i == len(chunks) - 1) for i, chunk in enumerate(chunks))
+        decoded = gzip.decompress(body) if encoding == "gzip" else compression.brotli.decompress(body)
+        assert decoded == b"".join(chunks)
+
+    def test_unknown_encoding(self):
+        """Test that an unsupported encoding is refused."""
+        with pytest.raises(ValueError):
+            make_compressor("zstd")
+
+
+class TestCompressionMiddleware:
+    """Test the ASGI middleware."""
+
+    def test_each_chunk_is_flushed(self):
+        """Test that every streamed chunk can be decoded as soon as it arrives."""
+        lines = [b'{"index": 0}\n' * 50, b'{"index": 1}\n' * 50, b'{"done": true}\n']
+        start, *bodies = call(CompressionMiddleware(chunked_app(lines)), b"gzip")
+        headers = dict(start["headers"])
+        assert headers[b"content-encoding"] == b"gzip"
+        assert headers[b"vary"] == b"Accept-Encoding"
+        assert b"content-length" not in headers
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        assert [decoder.decompress(body["body"]) for body in bodies] == lines
+        assert decoder.eof
+
+    def test_existing_vary_is_kept(self):
+        """Test that Accept-Encoding is added to a Vary header the app already set."""
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", b"text/markdown"), (b"vary", b"Accept")]})
+            await send({"type": "http.response.body", "body": b"# Post\n" * 200})
+
+        for minimum_size in (0, 10000):
+            start, _ = call(CompressionMiddleware(app, minimum_size=minimum_size), b"gzip")
+            assert [value for key, value in start["headers"] if key == b"vary"] == [b"Accept, Accept-Encoding"]
+
+    def test_small_body_is_sent_as_is(self):
+        """Test that a body under the minimum size is not compressed."""
+        start, body = call(CompressionMiddleware(chunked_app([b"tiny"]), minimum_size=500), b"gzip")
+        headers = dict(start["headers"])
+        assert b"content-encoding" not in headers
+        assert headers[b"content-length"] == b"4"
+        assert body["body"] == b"tiny"
+
+    def test_event_streams_are_sent_as_is(self):
+        """Test that Server-Sent Events are never compressed."""
+        chunks = [b"event: queued\ndata: {}\n\n" * 50, b"event: done\ndata: {}\n\n"]
+        start, *bodies = call(CompressionMiddleware(chunked_app(chunks, b"text/event-stream")), b"gzip")
+        assert b"content-encoding" not in dict(start["headers"])
+        assert [body["body"] for body in bodies] == chunks
+
+    def test_no_accepted_encoding(self):
+        """Test that the response is untouched when the client accepts no compression."""
+        chunks = [b"x" * 1000]
+        start, body = call(CompressionMiddleware(chunked_app(chunks)), b"identity")
+        assert b"vary" not in dict(start["headers"])
+        assert body["body"] == chunks[0]
@@ -0,0 +1,79 @@
+"""
+Unit tests for the fake LLM backend in fake_llm.py.
+"""
+
+import pytest
+import os
+import sys
+from unittest.mock import Mock, patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_llm
+from fake_llm import Agent, Crew, Process, Task, fake_completion
+
+
+@pytest.fixture(autouse=True)
+def no_latency():
+    """Run the fake tasks without sleeping, unless a test says otherwise."""
+    with patch('fake_llm.FAKE_LLM_LATENCY', 0):
+        yield
+
+
+def make_crew():
+    """A two-task crew like the one agent.build_crew() makes."""
+    researcher = Agent(role="Researcher", goal="Research", backstory="", tools=[])
+    writer = Agent(role="Writer", goal="Write", backstory="", allow_delegation=False)
+    tasks = [Task(description="Research AI", expected_output="A report", agent=researcher),
+             Task(description="Write about AI", expected_output="A post", agent=writer)]
+    return Crew(agents=[researcher, writer], tasks=tasks, process=Process.sequential, verbose=True)
+
+
+class TestFakeCompletion:
+    """Test the generated text."""
+
+    def test_deterministic(self):
+        """Test that the same prompt always gets the same answer."""
+        assert fake_completion("Write about AI") == fake_completion("Write about AI")
+        assert fake_completion("Write about AI") != fake_completion("Write about blockchain")
+
+    @pytest.mark.parametrize("chars", [10, 500, 4000, 20000])
+    def test_output_size(self, chars):
+        """Test that the answer has exactly the requested size."""
+        text = fake_completion("Write about AI", chars)
+        assert len(text) == chars
+        assert text.startswith("# ")
+
+    def test_default_size(self):
+        """Test that the size defaults to FAKE_LLM_OUTPUT_CHARS."""
+        with patch('fake_llm.FAKE_LLM_OUTPUT_CHARS', 1234):
+            assert len(fake_completion("Write about AI")) == 1234
+            assert fake_llm.model_name() == "fake-llm/1234"
+
+
+class TestFakeCrew:
+    """Test that the fake crew behaves like a sequential crewai Crew."""
+
+    def test_kickoff_runs_tasks_in_order(self):
+        """Test that every task gets an output and the crew returns the last one."""
+        crew = make_crew()
+        result = crew.kickoff()
+        research, writing = crew.tasks
+        assert research.output.raw == fake_completion("Research AI" + "A report")
+        assert writing.output.agent == "Writer"
+        assert str(result) == result.raw == writing.output.raw
+        assert research.end_time <= writing.start_time
+
+    def test_callback_gets_task_output(self):
+        """Test that a task's callback is called with its output."""
+        callback = Mock()
+        task = Task(description="Research AI", expected_output="A report", callback=callback)
+        Crew(agents=[], tasks=[task]).kickoff()
+        callback.assert_called_once_with(task.output)
+
+    def test_latency(self):
+        """Test that each task sleeps for FAKE_LLM_LATENCY."""
+        with patch('fake_llm.FAKE_LLM_LATENCY', 0.25), patch('fake_llm.time.sleep') as mock_sleep:
+            make_crew().kickoff()
+        assert [c.args for c in mock_sleep.call_args_list] == [(0.25,), (0.25,)]
@@ -20,19 +20,18 @@ from main import app
 class TestCompleteWorkflow:
     """Test the complete workflow from API to agent execution."""
     
+    @patch('agent.Task')
     @patch('agent.Crew')
     @patch('agent.Agent')
     @patch('agent.SerperDevTool')
-    def test_full_content_creation_workflow(self, mock_serper_tool, mock_agent_class, mock_crew_class):
+    def test_full_content_creation_workflow(self, mock_serper_tool, mock_agent_class, mock_crew_class, mock_task_class):
         """Test the complete workflow from API request to content generation."""
         # Mock the search tool
         mock_search_tool = Mock()
         mock_serper_tool.return_value = mock_search_tool
         
-        # Mock the agents
-        mock_researcher = Mock()
-        mock_content_writer = Mock()
-        mock_agent_class.side_effect = [mock_researcher, mock_content_writer]
+        # Mock the agents; each crew worker thread builds its own pair
+        mock_agent_class.side_effect = lambda **kwargs: Mock()
         
         # Mock the crew
         mock_crew_instance = Mock()
@@ -71,14 +70,13 @@ class TestCompleteWorkflow:
         mock_crew_class.assert_called_once()
         mock_crew_instance.kickoff.assert_called_once()
     
+    @patch('agent.Task')
     @patch('agent.Crew')
     @patch('agent.Agent')
-    def test_workflow_with_different_topics(self, mock_agent_class, mock_crew_class):
+    def test_workflow_with_different_topics(self, mock_agent_class, mock_crew_class, mock_task_class):
         """Test the workflow with different topics."""
-        # Mock the agents
-        mock_researcher = Mock()
-        mock_content_writer = Mock()
-        mock_agent_class.side_effect = [mock_researcher, mock_content_writer]
+        # Mock the agents; each crew worker thread builds its own pair
+        mock_agent_class.side_effect = lambda **kwargs: Mock()
         
         # Mock the crew
         mock_crew_instance = Mock()
@@ -107,14 +105,13 @@ class TestCompleteWorkflow:
             assert response.status_code == 200
             assert topic in response.json()["content"]
     
+    @patch('agent.Task')
     @patch('agent.Crew')
     @patch('agent.Agent')
-    def test_workflow_error_handling(self, mock_agent_class, mock_crew_class):
+    def test_workflow_error_handling(self, mock_agent_class, mock_crew_class, mock_task_class):
         """Test error handling in the complete workflow."""
-        # Mock the agents
-        mock_researcher = Mock()
-        mock_content_writer = Mock()
-        mock_agent_class.side_effect = [mock_researcher, mock_content_writer]
+        # Mock the agents; each crew worker thread builds its own pair
+        mock_agent_class.side_effect = lambda **kwargs: Mock()
         
         # Mock the crew to raise an exception
         mock_crew_instance = Mock()
@@ -161,9 +158,10 @@ class TestAPIEndpoints:
 class TestAgentIntegration:
     """Test agent integration with the API."""
     
+    @patch('agent.Task')
     @patch('agent.Crew')
     @patch('agent.Agent')
-    def test_agent_task_sequence(self, mock_agent_class, mock_crew_class):
+    def test_agent_task_sequence(self, mock_agent_class, mock_crew_class, mock_task_class):
         """Test that agents execute tasks in the correct sequence."""
         # Mock the agents
         mock_researcher = Mock()
@@ -199,14 +197,13 @@ class TestAgentIntegration:
 class TestPerformanceIntegration:
     """Test performance aspects of the integration."""
     
+    @patch('agent.Task')
     @patch('agent.Crew')
     @patch('agent.Agent')
-    def test_large_topic_handling(self, mock_agent_class, mock_crew_class):
+    def test_large_topic_handling(self, mock_agent_class, mock_crew_class, mock_task_class):
         """Test handling of large/complex topics."""
-        # Mock the agents
-        mock_researcher = Mock()
-        mock_content_writer = Mock()
-        mock_agent_class.side_effect = [mock_researcher, mock_content_writer]
+        # Mock the agents; each crew worker thread builds its own pair
+        mock_agent_class.side_effect = lambda **kwargs: Mock()
         
         # Mock the crew
         mock_crew_instance = Mock()
@@ -225,14 +222,13 @@ class TestPerformanceIntegration:
         assert response.status_code == 200
         assert "content" in response.json()
     
+    @patch('agent.Task')
     @patch('agent.Crew')
     @patch('agent.Agent')
-    def test_concurrent_requests(self, mock_agent_class, mock_crew_class):
+    def test_concurrent_requests(self, mock_agent_class, mock_crew_class, mock_task_class):
         """Test handling of concurrent requests."""
-        # Mock the agents
-        mock_researcher = Mock()
-        mock_content_writer = Mock()
-        mock_agent_class.side_effect = [mock_researcher, mock_content_writer]
+        # Mock the agents; each crew worker thread builds its own pair
+        mock_agent_class.side_effect = lambda **kwargs: Mock()
         
         # Mock the crew
         mock_crew_instance = Mock()
@@ -0,0 +1,145 @@
+"""
+Unit tests for the job stores in jobs.py.
+"""
+
+import pytest
+import os
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jobs import (
+    FAILED, PENDING, RUNNING, SUCCEEDED,
+    InMemoryJobStore, SQLiteJobStore, open_job_store,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def job_store(request, tmp_path):
+    """Provide each job store backend in turn."""
+    if request.param == "sqlite":
+        store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    else:
+        store = InMemoryJobStore()
+    yield store
+    store.close()
+
+
+class TestJobStore:
+    """Test the behaviour shared by both job stores."""
+
+    def test_create_returns_pending_job(self, job_store):
+        """Test that a new job starts out pending."""
+        job = job_store.create("AI in Healthcare")
+
+        assert job.topic == "AI in Healthcare"
+        assert job.status == PENDING
+        assert job.result is None
+        assert not job.finished
+
+    def test_job_ids_are_unique(self, job_store):
+        """Test that every job gets its own ID."""
+        ids = {job_store.create("Topic").id for _ in range(50)}
+        assert len(ids) == 50
+
+    def test_get_unknown_job(self, job_store):
+        """Test that an unknown job ID returns None."""
+        assert job_store.get("missing") is None
+
+    def test_update_to_succeeded(self, job_store):
+        """Test recording a finished job's content."""
+        job = job_store.create("AI in Healthcare")
+        job_store.update(job.id, RUNNING)
+        assert job_store.get(job.id).status == RUNNING
+
+        job_store.update(job.id, SUCCEEDED, result="Generated content")
+        stored = job_store.get(job.id)
+
+        assert stored.status == SUCCEEDED
+        assert stored.result == "Generated content"
+        assert stored.finished
+        assert stored.updated_at >= stored.created_at
+
+    def test_update_to_failed(self, job_store):
+        """Test recording a failed job's error."""
+        job = job_store.create("AI in Healthcare")
+        job_store.update(job.id, FAILED, error="Crew execution failed")
+
+        stored = job_store.get(job.id)
+        assert stored.status == FAILED
+        assert stored.error == "Crew execution failed"
+
+
+class TestInMemoryJobStore:
+    """Test the in-memory job store."""
+
+    def test_returned_jobs_are_copies(self):
+        """Test that later updates do not change a job already handed out."""
+        store = InMemoryJobStore()
+        job = store.create("Topic")
+        store.update(job.id, SUCCEEDED, result="Done")
+
+        assert job.status == PENDING
+
+    def test_evicts_oldest_finished_jobs(self):
+        """Test that finished jobs are dropped once max_jobs is exceeded."""
+        store = InMemoryJobStore(max_jobs=2)
+        first = store.create("First")
+        store.update(first.id, SUCCEEDED, result="Done")
+        second = store.create("Second")
+        third = store.create("Third")
+
+        assert store.get(first.id) is None
+        assert store.get(second.id) is not None
+        assert store.get(third.id) is not None
+
+    def test_keeps_unfinished_jobs(self):
+        """Test that pending jobs are never evicted."""
+        store = InMemoryJobStore(max_jobs=1)
+        jobs = [store.create(f"Topic {i}") for i in range(3)]
+
+        assert all(store.get(job.id) is not None for job in jobs)
+
+
+class TestSQLiteJobStore:
+    """Test the SQLite job store."""
+
+    def test_jobs_survive_reopening(self, tmp_path):
+        """Test that finished jobs are still there after a restart."""
+        path = str(tmp_path / "jobs.db")
+        store = SQLiteJobStore(path)
+        job = store.create("AI in Healthcare")
+        store.update(job.id, SUCCEEDED, result="Generated content")
+        store.close()
+
+        reopened = SQLiteJobStore(path)
+        stored = reopened.get(job.id)
+        reopened.close()
+
+        assert stored.status == SUCCEEDED
+        assert stored.result == "Generated content"
+
+    def test_unfinished_jobs_fail_on_reopen(self, tmp_path):
+        """Test that jobs interrupted by a restart are marked as failed."""
+        path = str(tmp_path / "jobs.db")
+        store = SQLiteJobStore(path)
+        pending = store.create("Pending")
+        running = store.create("Running")
+        store.update(running.id, RUNNING)
+        store.close()
+
+        reopened = SQLiteJobStore(path)
+        for job in (pending, running):
+            stored = reopened.get(job.id)
+            assert stored.status == FAILED
+            assert "restart" in stored.error
+        reopened.close()
+
+
+def test_open_job_store(tmp_path):
+    """Test choosing the backend from a path."""
+    assert isinstance(open_job_store(None), InMemoryJobStore)
+    store = open_job_store(str(tmp_path / "jobs.db"))
+    assert isinstance(store, SQLiteJobStore)
+    store.close()
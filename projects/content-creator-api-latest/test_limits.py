@@ -0,0 +1,125 @@
+"""
+Unit tests for the rate limiter and admission helpers in limits.py.
+"""
+
+import pytest
+import os
+import sys
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from limits import RateLimited, RateLimiter, ServerBusy, TokenBucket, retry_after_header
+
+
+class FakeClock:
+    """A time.monotonic stand-in that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """Patch limits.time.monotonic with a controllable clock."""
+    fake = FakeClock()
+    with patch('limits.time.monotonic', fake):
+        yield fake
+
+
+class TestTokenBucket:
+    """Test the token bucket."""
+
+    def test_burst_then_wait(self):
+        """Test that a full bucket allows `burst` takes, then reports the wait."""
+        bucket = TokenBucket(rate=2, burst=3, now=0)
+        assert [bucket.take(0) for _ in range(3)] == [0, 0, 0]
+        assert bucket.take(0) == pytest.approx(0.5)
+
+    def test_refills_over_time_up_to_burst(self):
+        """Test that tokens come back at `rate` per second, capped at `burst`."""
+        bucket = TokenBucket(rate=1, burst=2, now=0)
+        bucket.take(0)
+        bucket.take(0)
+        assert bucket.take(1) == 0
+        assert bucket.take(1) == pytest.approx(1)
+        # A long idle period does not bank more than `burst`
+        assert bucket.take(100) == 0
+        assert bucket.take(100) == 0
+        assert bucket.take(100) > 0
+
+
+class TestRateLimiter:
+    """Test the per-client rate limiter."""
+
+    def test_limits_each_client_separately(self, clock):
+        """Test that one client running out does not affect another."""
+        limiter = RateLimiter(per_minute=60, burst=2)
+        assert limiter.check("a") == 0
+        assert limiter.check("a") == 0
+        assert limiter.check("a") == pytest.approx(1)
+        assert limiter.check("b") == 0
+        assert limiter.limited == 1
+
+    def test_allows_again_after_waiting(self, clock):
+        """Test that a limited client is allowed once the wait has passed."""
+        limiter = RateLimiter(per_minute=30, burst=1)
+        limiter.check("a")
+        wait = limiter.check("a")
+        assert wait == pytest.approx(2)
+        clock.now += wait
+        assert limiter.check("a") == 0
+
+    def test_zero_rate_disables_limiting(self, clock):
+        """Test that per_minute=0 lets everything through."""
+        limiter = RateLimiter(per_minute=0, burst=1)
+        assert not limiter.enabled
+        assert all(limiter.check("a") == 0 for _ in range(100))
+        assert len(limiter) == 0
+
+    def test_forgets_least_recently_seen_clients(self, clock):
+        """Test that the number of buckets stays within max_clients."""
+        limiter = RateLimiter(per_minute=60, burst=1, max_clients=2)
+        limiter.check("a")
+        limiter.check("b")
+        limiter.check("a")  # "b" is now the least recently seen
+        limiter.check("c")
+        assert len(limiter) == 2
+        # "a" is still remembered (and limited), "b" starts over
+        assert limiter.check("a") > 0
+        assert limiter.check("b") == 0
+
+    def test_reset(self, clock):
+        """Test that reset forgets every client and the counter."""
+        limiter = RateLimiter(per_minute=60, burst=1)
+        limiter.check("a")
+        limiter.check("a")
+        limiter.reset()
+        assert len(limiter) == 0
+        assert limiter.limited == 0
+        assert limiter.check("a") == 0
+
+
+class TestAdmissionHelpers:
+    """Test ServerBusy, RateLimited and the Retry-After header."""
+
+    def test_server_busy_carries_retry_after(self):
+        """Test that ServerBusy keeps its retry delay."""
+        error = ServerBusy(30)
+        assert error.retry_after == 30
+        assert "busy" in str(error)
+
+    def test_rate_limited_carries_retry_after(self):
+        """Test that RateLimited keeps its retry delay."""
+        error = RateLimited(1.5)
+        assert error.retry_after == 1.5
+        assert str(error) == "Too many requests. Please slow down."
+
+    @pytest.mark.parametrize("seconds,expected", [(0, "1"), (0.2, "1"), (1.5, "2"), (30, "30")])
+    def test_retry_after_header(self, seconds, expected):
+        """Test that Retry-After is rounded up to whole seconds, at least 1."""
+        assert retry_after_header(seconds) == {"Retry-After": expected}
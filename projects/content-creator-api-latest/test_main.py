@@ -9,8 +9,11 @@ This test suite covers:
 """
 
 import pytest
+import json
 import os
 import sys
+import time
+import threading
 from unittest.mock import Mock, patch, MagicMock
 from fastapi.testclient import TestClient
 from fastapi import HTTPException
@@ -18,8 +21,10 @@ from fastapi import HTTPException
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import main
+import compression
 from main import app, ContentRequest
-from agent import create_content_crew
+from agent import create_content_crew, crew_progress
 
 
 class TestContentRequest:
@@ -117,12 +122,1054 @@ class TestFastAPIEndpoints:
         assert response.status_code == 422  # Validation error
 
 
+class TestCrewExecutor:
+    """Test that crews run on the bounded crew thread pool."""
+    
+    def test_crew_runs_on_worker_thread(self):
+        """Test that the crew function runs off the event loop thread."""
+        threads = []
+        
+        def fake_crew(topic):
+            threads.append(threading.current_thread().name)
+            return "Generated content"
+        
+        with patch('main.create_content_crew', side_effect=fake_crew):
+            response = TestClient(app).post("/create-content", json={"topic": "AI"})
+        
+        assert response.status_code == 200
+        assert threads[0].startswith("crew")
+    
+    def test_health_check_responsive_during_crew_run(self):
+        """Test that the health check answers while a crew is still running."""
+        started = threading.Event()
+        release = threading.Event()
+        responses = []
+        
+        def slow_crew(topic):
+            started.set()
+            release.wait(timeout=5)
+            return "Generated content"
+        
+        with patch('main.create_content_crew', side_effect=slow_crew):
+            with TestClient(app) as client:
+                worker = threading.Thread(
+                    target=lambda: responses.append(client.post("/create-content", json={"topic": "AI"}))
+                )
+                worker.start()
+                assert started.wait(timeout=5)
+                
+                health = client.get("/")
+                assert health.status_code == 200
+                # The crew request is still waiting on its worker
+                assert not responses
+                
+                release.set()
+                worker.join(timeout=5)
+        
+        assert responses[0].status_code == 200
+    
+    def test_executor_uses_configured_worker_count(self):
+        """Test that the crew pool is capped at CREW_MAX_WORKERS."""
+        main.shutdown_crew_executor()
+        with patch('main.CREW_MAX_WORKERS', 2):
+            assert main.get_crew_executor()._max_workers == 2
+
+
+def wait_for_job(client, job_id, timeout=5):
+    """Poll a job's status until it finishes and return the last status."""
+    deadline = time.monotonic() + timeout
+    while True:
+        status = client.get(f"/jobs/{job_id}").json()
+        if status["status"] in ("succeeded", "failed") or time.monotonic() > deadline:
+            return status
+        time.sleep(0.01)
+
+
+class TestJobAPI:
+    """Test the asynchronous job endpoints."""
+    
+    def setup_method(self):
+        """Set up test client for each test."""
+        self.client = TestClient(app)
+    
+    @patch('main.create_content_crew')
+    def test_submit_returns_job_id_immediately(self, mock_create_content_crew):
+        """Test that submitting a job answers 202 with polling URLs."""
+        mock_create_content_crew.return_value = "Generated content"
+        
+        response = self.client.post("/jobs", json={"topic": "AI in Healthcare"})
+        
+        assert response.status_code == 202
+        body = response.json()
+        assert body["status"] == "pending"
+        assert body["status_url"] == f"/jobs/{body['job_id']}"
+        assert body["result_url"] == f"/jobs/{body['job_id']}/result"
+    
+    @patch('main.create_content_crew')
+    def test_job_success(self, mock_create_content_crew):
+        """Test polling a job through to its result."""
+        mock_create_content_crew.return_value = "This is a test blog post about AI."
+        
+        job_id = self.client.post("/jobs", json={"topic": "AI in Healthcare"}).json()["job_id"]
+        status = wait_for_job(self.client, job_id)
+        
+        assert status["status"] == "succeeded"
+        assert status["topic"] == "AI in Healthcare"
+        result = self.client.get(f"/jobs/{job_id}/result")
+        assert result.status_code == 200
+        assert result.json()["content"] == "This is a test blog post about AI."
+        mock_create_content_crew.assert_called_once_with("AI in Healthcare")
+    
+    def test_result_pending_while_running(self):
+        """Test that the result endpoint answers 202 until the job finishes."""
+        release = threading.Event()
+        
+        def slow_crew(topic):
+            release.wait(timeout=5)
+            return "Generated content"
+        
+        with patch('main.create_content_crew', side_effect=slow_crew):
+            job_id = self.client.post("/jobs", json={"topic": "AI"}).json()["job_id"]
+            response = self.client.get(f"/jobs/{job_id}/result")
+            release.set()
+            
+            assert response.status_code == 202
+            assert response.json()["status"] in ("pending", "running")
+            assert wait_for_job(self.client, job_id)["status"] == "succeeded"
+    
+    @patch('main.create_content_crew')
+    def test_job_failure(self, mock_create_content_crew):
+        """Test that a crew exception marks the job as failed."""
+        mock_create_content_crew.side_effect = Exception("Crew execution failed")
+        
+        job_id = self.client.post("/jobs", json={"topic": "AI in Healthcare"}).json()["job_id"]
+        status = wait_for_job(self.client, job_id)
+        
+        assert status["status"] == "failed"
+        assert "Crew execution failed" in status["error"]
+        result = self.client.get(f"/jobs/{job_id}/result")
+        assert result.status_code == 500
+        assert "internal server error" in result.json()["detail"]
+    
+    @patch('main.create_content_crew')
+    def test_job_empty_result(self, mock_create_content_crew):
+        """Test that an empty crew result marks the job as failed."""
+        mock_create_content_crew.return_value = None
+        
+        job_id = self.client.post("/jobs", json={"topic": "AI in Healthcare"}).json()["job_id"]
+        status = wait_for_job(self.client, job_id)
+        
+        assert status["status"] == "failed"
+        assert "Content creation failed" in status["error"]
+    
+    def test_unknown_job(self):
+        """Test that unknown job IDs return 404."""
+        assert self.client.get("/jobs/missing").status_code == 404
+        assert self.client.get("/jobs/missing/result").status_code == 404
+    
+    def test_submit_missing_topic(self):
+        """Test job submission validation."""
+        response = self.client.post("/jobs", json={})
+        assert response.status_code == 422
+    
+    @patch('main.create_content_crew')
+    def test_sqlite_job_store(self, mock_create_content_crew, tmp_path):
+        """Test the job API with JOB_STORE_PATH set."""
+        mock_create_content_crew.return_value = "Generated content"
+        main.close_job_store()
+        
+        with patch.dict(os.environ, {'JOB_STORE_PATH': str(tmp_path / "jobs.db")}):
+            job_id = self.client.post("/jobs", json={"topic": "AI"}).json()["job_id"]
+            assert wait_for_job(self.client, job_id)["status"] == "succeeded"
+            
+            # The result is still there after the store is reopened
+            main.close_job_store()
+            assert self.client.get(f"/jobs/{job_id}/result").json()["content"] == "Generated content"
+
+
+class TestContentCaching:
+    """Test the content cache in front of the crew."""
+    
+    def setup_method(self):
+        """Set up test client for each test."""
+        self.client = TestClient(app)
+    
+    @patch('main.create_content_crew')
+    def test_repeat_topic_served_from_cache(self, mock_create_content_crew):
+        """Test that a resubmitted topic does not run the crew again."""
+        mock_create_content_crew.return_value = "Generated content"
+        
+        first = self.client.post("/create-content", json={"topic": "AI in Healthcare"})
+        second = self.client.post("/create-content", json={"topic": "  ai in  HEALTHCARE "})
+        
+        assert first.json() == second.json() == {"content": "Generated content"}
+        mock_create_content_crew.assert_called_once_with("AI in Healthcare")
+        stats = self.client.get("/cache/stats").json()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+    
+    @patch('main.create_content_crew')
+    def test_failures_are_not_cached(self, mock_create_content_crew):
+        """Test that errors and empty results leave the cache untouched."""
+        mock_create_content_crew.side_effect = [Exception("Test exception"), None, "Generated content"]
+        
+        assert self.client.post("/create-content", json={"topic": "AI"}).status_code == 500
+        assert self.client.post("/create-content", json={"topic": "AI"}).status_code == 500
+        response = self.client.post("/create-content", json={"topic": "AI"})
+        
+        assert response.json()["content"] == "Generated content"
+        assert mock_create_content_crew.call_count == 3
+    
+    @patch('main.create_content_crew')
+    def test_cached_job_finishes_immediately(self, mock_create_content_crew):
+        """Test that a job for a cached topic succeeds without a crew run."""
+        mock_create_content_crew.return_value = "Generated content"
+        self.client.post("/create-content", json={"topic": "AI in Healthcare"})
+        
+        body = self.client.post("/jobs", json={"topic": "AI in Healthcare"}).json()
+        
+        assert body["status"] == "succeeded"
+        assert self.client.get(body["result_url"]).json()["content"] == "Generated content"
+        mock_create_content_crew.assert_called_once()
+    
+    @patch('main.create_content_crew')
+    def test_job_results_are_cached(self, mock_create_content_crew):
+        """Test that content generated by a job is reused by later requests."""
+        mock_create_content_crew.return_value = "Generated content"
+        job_id = self.client.post("/jobs", json={"topic": "AI"}).json()["job_id"]
+        assert wait_for_job(self.client, job_id)["status"] == "succeeded"
+        
+        response = self.client.post("/create-content", json={"topic": "AI"})
+        
+        assert response.json()["content"] == "Generated content"
+        mock_create_content_crew.assert_called_once()
+    
+    @patch('main.create_content_crew')
+    def test_configuration_change_misses_cache(self, mock_create_content_crew):
+        """Test that content cached under another crew configuration is not reused."""
+        mock_create_content_crew.return_value = "Generated content"
+        self.client.post("/create-content", json={"topic": "AI"})
+        main.close_content_cache()
+        
+        with patch('main.crew_config_fingerprint', return_value="another-config"):
+            self.client.post("/create-content", json={"topic": "AI"})
+        
+        assert mock_create_content_crew.call_count == 2
+
+    
+    @patch('main.create_content_crew')
+    def test_styles_are_cached_separately(self, mock_create_content_crew):
+        """Test that a styled request runs the writer with its style and keeps its own entry."""
+        mock_create_content_crew.side_effect = lambda topic, style=None: f"{style or 'Default'} post"
+        
+        plain = self.client.post("/create-content", json={"topic": "AI"})
+        styled = self.client.post("/create-content", json={"topic": "AI", "style": "Short"})
+        styled_again = self.client.post("/create-content", json={"topic": "ai", "style": "short"})
+        
+        assert plain.json()["content"] == "Default post"
+        assert styled.json()["content"] == styled_again.json()["content"] == "Short post"
+        assert mock_create_content_crew.call_count == 2
+        mock_create_content_crew.assert_called_with("AI", style="Short")
+    
+    def test_stats_include_research_and_search(self):
+        """Test that the research cache and search memo report their statistics."""
+        stats = self.client.get("/cache/stats").json()
+        
+        for section in ("research", "search"):
+            assert {"hits", "misses", "hit_rate", "size"} <= set(stats[section])
+
+class TestRequestCoalescing:
+    """Test that concurrent requests for the same topic share one crew run."""
+    
+    def run_concurrently(self, client, requests):
+        """Send (path, topic) requests from separate threads; return the responses."""
+        responses = [None] * len(requests)
+        
+        def send(index, path, topic):
+            responses[index] = client.post(path, json={"topic": topic})
+        
+        threads = [threading.Thread(target=send, args=(i, path, topic))
+                   for i, (path, topic) in enumerate(requests)]
+        for thread in threads:
+            thread.start()
+        return threads, responses
+    
+    def test_identical_topics_share_one_run(self):
+        """Test that concurrent identical topics start a single crew."""
+        release = threading.Event()
+        calls = []
+        
+        def slow_crew(topic):
+            calls.append(topic)
+            release.wait(timeout=5)
+            return f"Content about {topic}"
+        
+        with patch('main.create_content_crew', side_effect=slow_crew):
+            with TestClient(app) as client:
+                topics = ["AI in Healthcare", "ai in healthcare", "  AI  in Healthcare"]
+                threads, responses = self.run_concurrently(
+                    client, [("/create-content", topic) for topic in topics])
+                # Wait until every request has reached the crew or joined it
+                deadline = time.monotonic() + 5
+                while main.crew_flights.joined < 2 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                release.set()
+                for thread in threads:
+                    thread.join(timeout=5)
+        
+        # Whichever request arrived first ran the crew for all three
+        assert len(calls) == 1
+        assert [r.json()["content"] for r in responses] == [f"Content about {calls[0]}"] * 3
+        assert len(main.crew_flights) == 0
+    
+    def test_different_topics_run_separately(self):
+        """Test that different topics are not coalesced."""
+        with patch('main.create_content_crew', side_effect=lambda topic: f"Content about {topic}") as mock_crew:
+            with TestClient(app) as client:
+                threads, responses = self.run_concurrently(
+                    client, [("/create-content", "AI"), ("/create-content", "Blockchain")])
+                for thread in threads:
+                    thread.join(timeout=5)
+        
+        assert mock_crew.call_count == 2
+        assert {r.json()["content"] for r in responses} == {"Content about AI", "Content about Blockchain"}
+    
+    def test_shared_failure_reaches_every_caller(self):
+        """Test that every coalesced request gets the run's error."""
+        release = threading.Event()
+        
+        def failing_crew(topic):
+            release.wait(timeout=5)
+            raise Exception("Crew execution failed")
+        
+        with patch('main.create_content_crew', side_effect=failing_crew) as mock_crew:
+            with TestClient(app) as client:
+                threads, responses = self.run_concurrently(
+                    client, [("/create-content", "AI"), ("/create-content", "AI")])
+                deadline = time.monotonic() + 5
+                while main.crew_flights.joined < 1 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                release.set()
+                for thread in threads:
+                    thread.join(timeout=5)
+        
+        assert mock_crew.call_count == 1
+        for response in responses:
+            assert response.status_code == 500
+            assert "Crew execution failed" in response.json()["detail"]
+    
+    def test_job_joins_request_in_flight(self):
+        """Test that a job for a topic already being generated shares the run."""
+        started = threading.Event()
+        release = threading.Event()
+        
+        def slow_crew(topic):
+            started.set()
+            release.wait(timeout=5)
+            return "Generated content"
+        
+        with patch('main.create_content_crew', side_effect=slow_crew) as mock_crew:
+            with TestClient(app) as client:
+                threads, responses = self.run_concurrently(client, [("/create-content", "AI")])
+                assert started.wait(timeout=5)
+                
+                job = client.post("/jobs", json={"topic": "ai"}).json()
+                assert client.get(job["status_url"]).json()["status"] == "running"
+                
+                release.set()
+                for thread in threads:
+                    thread.join(timeout=5)
+                assert wait_for_job(client, job["job_id"])["status"] == "succeeded"
+        
+        assert mock_crew.call_count == 1
+        assert responses[0].json()["content"] == "Generated content"
+
+
+def parse_sse(body):
+    """Parse a Server-Sent Events body into (event, data) pairs, skipping comments."""
+    events = []
+    for message in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.splitlines() if not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class TestContentStreaming:
+    """Test the Server-Sent Events endpoint."""
+    
+    def setup_method(self):
+        """Set up test client."""
+        self.client = TestClient(app)
+    
+    def test_stream_reports_progress_then_content(self):
+        """Test the event sequence of a successful crew run."""
+        def reporting_crew(topic):
+            report = crew_progress.get()
+            report("research_started", {"topic": topic})
+            report("research_done", {"report": "Research report"})
+            report("writing_started", {})
+            return "# Title\n\nFirst paragraph.\n\nSecond paragraph."
+        
+        with patch('main.create_content_crew', side_effect=reporting_crew):
+            response = self.client.post("/create-content/stream", json={"topic": "AI in Healthcare"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.text)
+        assert [event for event, _ in events] == [
+            "queued", "research_started", "research_done", "writing_started",
+            "content", "content", "content", "done",
+        ]
+        assert events[2][1] == {"report": "Research report"}
+        content = "".join(data["text"] for event, data in events if event == "content")
+        assert content == "# Title\n\nFirst paragraph.\n\nSecond paragraph."
+    
+    @patch('main.create_content_crew')
+    def test_streamed_content_is_cached(self, mock_create_content_crew):
+        """Test that a streamed post is served from the cache next time."""
+        mock_create_content_crew.return_value = "Generated content"
+        
+        self.client.post("/create-content/stream", json={"topic": "AI"})
+        response = self.client.post("/create-content/stream", json={"topic": "ai"})
+        
+        assert mock_create_content_crew.call_count == 1
+        assert parse_sse(response.text) == [
+            ("cached", {"topic": "ai"}),
+            ("content", {"text": "Generated content"}),
+            ("done", {}),
+        ]
+    
+    @patch('main.create_content_crew')
+    def test_stream_reports_errors(self, mock_create_content_crew):
+        """Test that a failed crew run ends the stream with an error event."""
+        mock_create_content_crew.side_effect = Exception("Crew execution failed")
+        
+        events = parse_sse(self.client.post("/create-content/stream", json={"topic": "AI"}).text)
+        
+        assert events[-1][0] == "error"
+        assert "Crew execution failed" in events[-1][1]["detail"]
+    
+    @patch('main.create_content_crew')
+    def test_stream_reports_empty_result(self, mock_create_content_crew):
+        """Test that an empty crew result ends the stream with an error event."""
+        mock_create_content_crew.return_value = None
+        
+        events = parse_sse(self.client.post("/create-content/stream", json={"topic": "AI"}).text)
+        
+        assert events[-1] == ("error", {"detail": "Content creation failed, received no output from the agent."})
+    
+    def test_joined_stream_replays_earlier_events(self):
+        """Test that a stream joining a run in flight still sees its progress."""
+        release = threading.Event()
+        
+        def slow_crew(topic):
+            crew_progress.get()("research_started", {"topic": topic})
+            release.wait(timeout=5)
+            return "Generated content"
+        
+        with patch('main.create_content_crew', side_effect=slow_crew) as mock_crew:
+            with TestClient(app) as client:
+                first = threading.Thread(target=client.post, args=("/create-content",), kwargs={"json": {"topic": "AI"}})
+                first.start()
+                deadline = time.monotonic() + 5
+                while len(main.crew_flights) < 1 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                # Let the stream join the blocked run, then release it
+                threading.Timer(0.2, release.set).start()
+                response = client.post("/create-content/stream", json={"topic": "AI"})
+                first.join(timeout=5)
+        
+        assert mock_crew.call_count == 1
+        events = [event for event, _ in parse_sse(response.text)]
+        assert events == ["queued", "research_started", "content", "done"]
+    
+    @patch('main.STREAM_KEEPALIVE_SECONDS', 0.01)
+    def test_keepalive_comments_while_waiting(self):
+        """Test that keep-alive comments are sent while the crew is quiet."""
+        def slow_crew(topic):
+            time.sleep(0.1)
+            return "Generated content"
+        
+        with patch('main.create_content_crew', side_effect=slow_crew):
+            response = self.client.post("/create-content/stream", json={"topic": "AI"})
+        
+        assert ": keep-alive" in response.text
+        assert parse_sse(response.text)[-1] == ("done", {})
+
+
+def parse_ndjson(body):
+    """Parse an NDJSON body into a list of objects."""
+    return [json.loads(line) for line in body.splitlines() if line]
+
+
+class TestBatchContent:
+    """Test the batch endpoint."""
+    
+    def setup_method(self):
+        """Set up test client."""
+        self.client = TestClient(app)
+    
+    def test_batch_returns_a_line_per_topic(self):
+        """Test that every topic gets a result line, then a summary."""
+        topics = ["AI", "Blockchain", "Quantum Computing"]
+        with patch('main.create_content_crew', side_effect=lambda topic: f"Content about {topic}"):
+            response = self.client.post("/create-content/batch", json={"topics": topics})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = parse_ndjson(response.text)
+        assert lines[-1] == {"done": True, "succeeded": 3, "failed": 0}
+        results = sorted(lines[:-1], key=lambda line: line["index"])
+        assert [r["topic"] for r in results] == topics
+        assert [r["content"] for r in results] == [f"Content about {topic}" for topic in topics]
+        assert all(r["status"] == "succeeded" and not r["cached"] for r in results)
+    
+    def test_failures_are_reported_per_topic(self):
+        """Test that one failing topic does not fail the batch."""
+        def crew(topic):
+            if topic == "Bad":
+                raise Exception("Crew execution failed")
+            if topic == "Empty":
+                return None
+            return f"Content about {topic}"
+        
+        with patch('main.create_content_crew', side_effect=crew):
+            response = self.client.post("/create-content/batch", json={"topics": ["Good", "Bad", "Empty"]})
+        
+        lines = parse_ndjson(response.text)
+        results = {line["topic"]: line for line in lines[:-1]}
+        assert results["Good"]["status"] == "succeeded"
+        assert results["Bad"] == {"index": 1, "topic": "Bad", "status": "failed", "error": "Crew execution failed"}
+        assert results["Empty"]["status"] == "failed"
+        assert "no output" in results["Empty"]["error"]
+        assert lines[-1] == {"done": True, "succeeded": 1, "failed": 2}
+    
+    @patch('main.create_content_crew')
+    def test_cached_topics_skip_the_crew(self, mock_create_content_crew):
+        """Test that cached topics are answered without running the crew."""
+        mock_create_content_crew.return_value = "Generated content"
+        self.client.post("/create-content", json={"topic": "AI"})
+        
+        lines = parse_ndjson(self.client.post("/create-content/batch", json={"topics": ["ai"]}).text)
+        
+        assert mock_create_content_crew.call_count == 1
+        assert lines[0]["cached"] is True
+        assert lines[0]["content"] == "Generated content"
+    
+    @patch('main.BATCH_MAX_PARALLEL', 2)
+    def test_parallelism_is_bounded(self):
+        """Test that a batch runs at most BATCH_MAX_PARALLEL crews at once."""
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+        
+        def slow_crew(topic):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return f"Content about {topic}"
+        
+        with patch('main.create_content_crew', side_effect=slow_crew) as mock_crew:
+            response = self.client.post("/create-content/batch",
+                                        json={"topics": [f"Topic {i}" for i in range(6)]})
+        
+        assert mock_crew.call_count == 6
+        assert peak[0] == 2
+        assert parse_ndjson(response.text)[-1]["succeeded"] == 6
+    
+    @patch('main.BATCH_MAX_PARALLEL', 2)
+    def test_results_stream_in_completion_order(self):
+        """Test that a fast topic is not held back by a slow one."""
+        def crew(topic):
+            if topic == "Slow":
+                time.sleep(0.2)
+            return f"Content about {topic}"
+        
+        with patch('main.create_content_crew', side_effect=crew):
+            response = self.client.post("/create-content/batch", json={"topics": ["Slow", "Fast"]})
+        
+        assert [line.get("topic") for line in parse_ndjson(response.text)] == ["Fast", "Slow", None]
+    
+    def test_batch_validation(self):
+        """Test that empty and oversized batches are rejected."""
+        assert self.client.post("/create-content/batch", json={"topics": []}).status_code == 422
+        assert self.client.post("/create-content/batch", json={}).status_code == 422
+        with patch('main.BATCH_MAX_TOPICS', 2):
+            response = self.client.post("/create-content/batch", json={"topics": ["A", "B", "C"]})
+        assert response.status_code == 422
+
+
+def metric_value(text, sample):
+    """The value of a sample line (name plus labels) in a /metrics body, or None."""
+    for line in text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+class TestMetrics:
+    """Test the /metrics endpoint."""
+    
+    def setup_method(self):
+        """Set up test client."""
+        self.client = TestClient(app)
+    
+    def test_metrics_format(self):
+        """Test that /metrics serves the Prometheus text format."""
+        response = self.client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE http_requests_total counter" in response.text
+        assert "# TYPE crew_stage_duration_seconds histogram" in response.text
+        assert "# TYPE crew_runs_in_flight gauge" in response.text
+    
+    @patch('main.create_content_crew')
+    def test_requests_are_counted_by_route(self, mock_create_content_crew):
+        """Test that requests are labelled with their route template and status."""
+        mock_create_content_crew.return_value = "Generated content"
+        sample = 'http_requests_total{method="GET",path="/jobs/{job_id}",status="404"}'
+        before = metric_value(self.client.get("/metrics").text, sample) or 0
+        
+        self.client.post("/create-content", json={"topic": "AI"})
+        self.client.get("/jobs/missing-1")
+        self.client.get("/jobs/missing-2")
+        text = self.client.get("/metrics").text
+        
+        assert metric_value(text, sample) == before + 2
+        assert metric_value(text, 'http_requests_total{method="POST",path="/create-content",status="200"}') >= 1
+        assert metric_value(text, 'http_request_duration_seconds_count{method="POST",path="/create-content"}') >= 1
+        assert "missing-1" not in text
+    
+    @patch('main.create_content_crew')
+    def test_cache_and_coalescing_stats_are_exported(self, mock_create_content_crew):
+        """Test that cache and crew queue statistics appear as metrics."""
+        mock_create_content_crew.return_value = "Generated content"
+        self.client.post("/create-content", json={"topic": "AI"})
+        self.client.post("/create-content", json={"topic": "AI"})
+        
+        text = self.client.get("/metrics").text
+        
+        assert metric_value(text, "content_cache_hits_total") == 1
+        assert metric_value(text, "content_cache_misses_total") == 1
+        assert metric_value(text, "content_cache_entries") == 1
+        assert metric_value(text, "crew_runs_in_flight") == 0
+        assert metric_value(text, "crew_runs_rejected_total") == 0
+        assert metric_value(text, "crew_queue_wait_seconds_count") >= 1
+
+
+class TestAdmissionControl:
+    """Test the crew queue bound and per-client rate limits."""
+    
+    def setup_method(self):
+        """Set up test client."""
+        self.client = TestClient(app)
+    
+    def hold_crews(self, count):
+        """Start `count` crew runs that block until released; return the release event and threads."""
+        started = threading.Semaphore(0)
+        release = threading.Event()
+        
+        def slow_crew(topic):
+            started.release()
+            release.wait(timeout=5)
+            return f"Content about {topic}"
+        
+        self.crew_patch.side_effect = slow_crew
+        threads = [threading.Thread(target=self.client.post, args=("/create-content",),
+                                    kwargs={"json": {"topic": f"Busy {i}"}})
+                   for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for _ in range(count):
+            assert started.acquire(timeout=5)
+        return release, threads
+    
+    @patch('main.create_content_crew')
+    def test_rate_limit_returns_429_with_retry_after(self, mock_create_content_crew):
+        """Test that a client over its burst gets a 429 and a Retry-After."""
+        mock_create_content_crew.return_value = "Generated content"
+        with patch.object(main, 'rate_limiter', main.RateLimiter(per_minute=6, burst=2)):
+            statuses = [self.client.post("/create-content", json={"topic": f"AI {i}"}).status_code
+                        for i in range(3)]
+            responses = [self.client.post("/jobs", json={"topic": "AI 3"}),
+                         self.client.post("/create-content/stream", json={"topic": "AI 3"})]
+        
+        assert statuses == [200, 200, 429]
+        for response in responses:
+            assert response.status_code == 429
+            assert int(response.headers["Retry-After"]) >= 1
+    
+    @patch('main.create_content_crew')
+    def test_cache_hits_are_not_charged(self, mock_create_content_crew):
+        """Test that a client out of tokens is still served cached topics, on every endpoint."""
+        mock_create_content_crew.return_value = "Generated content"
+        with patch.object(main, 'rate_limiter', main.RateLimiter(per_minute=6, burst=1)):
+            first = self.client.post("/create-content", json={"topic": "AI"})
+            repeats = [
+                self.client.post("/create-content", json={"topic": "AI"}),
+                self.client.post("/create-content/stream", json={"topic": "AI"}),
+                self.client.post("/jobs", json={"topic": "AI"}),
+            ]
+            batch = parse_ndjson(self.client.post("/create-content/batch", json={"topics": ["AI"]}).text)
+            refused = self.client.post("/create-content", json={"topic": "Something new"})
+        
+        assert first.status_code == 200
+        assert [response.status_code for response in repeats] == [200, 200, 202]
+        assert batch[0]["status"] == "succeeded"
+        assert refused.status_code == 429
+        assert mock_create_content_crew.call_count == 1
+    
+    @patch('main.create_content_crew')
+    @patch('main.API_KEYS', frozenset({"one", "two"}))
+    def test_rate_limit_is_per_api_key(self, mock_create_content_crew):
+        """Test that clients sending different configured API keys have separate buckets."""
+        mock_create_content_crew.return_value = "Generated content"
+        with patch.object(main, 'rate_limiter', main.RateLimiter(per_minute=6, burst=1)):
+            first = self.client.post("/create-content", json={"topic": "AI 1"}, headers={"X-API-Key": "one"})
+            second = self.client.post("/create-content", json={"topic": "AI 2"}, headers={"X-API-Key": "two"})
+            again = self.client.post("/create-content", json={"topic": "AI 3"}, headers={"X-API-Key": "one"})
+        
+        assert [first.status_code, second.status_code, again.status_code] == [200, 200, 429]
+    
+    @patch('main.create_content_crew')
+    @patch('main.API_KEYS', frozenset({"one"}))
+    def test_unknown_api_keys_share_the_ip_bucket(self, mock_create_content_crew):
+        """Test that rotating unlisted API keys from one IP does not escape the limit."""
+        mock_create_content_crew.return_value = "Generated content"
+        with patch.object(main, 'rate_limiter', main.RateLimiter(per_minute=6, burst=2)):
+            statuses = [self.client.post("/create-content", json={"topic": f"AI {i}"},
+                                         headers={"X-API-Key": f"rotated-{i}"}).status_code
+                        for i in range(3)]
+            listed = self.client.post("/create-content", json={"topic": "AI 3"}, headers={"X-API-Key": "one"})
+            clients = len(main.rate_limiter)
+        
+        assert statuses == [200, 200, 429]
+        assert listed.status_code == 200
+        assert clients == 2
+    
+    def test_batch_is_charged_per_uncached_topic(self):
+        """Test that each topic needing the crew takes a token, and refused topics get a retry_after."""
+        main.get_content_cache().set("Cached", "Cached content")
+        with patch.object(main, 'rate_limiter', main.RateLimiter(per_minute=6, burst=2)), \
+                patch('main.create_content_crew', side_effect=lambda topic: f"Content about {topic}"):
+            response = self.client.post("/create-content/batch",
+                                        json={"topics": ["Cached", "First", "Second", "Third"]})
+        
+        assert response.status_code == 200
+        lines = parse_ndjson(response.text)
+        results = {line["topic"]: line for line in lines[:-1]}
+        assert results["Cached"]["cached"] is True
+        refused = [line for line in results.values() if line["status"] == "failed"]
+        assert len(refused) == 1
+        assert refused[0]["error"] == "Too many requests. Please slow down."
+        assert refused[0]["retry_after"] >= 1
+        assert lines[-1] == {"done": True, "succeeded": 3, "failed": 1}
+    
+    @patch('main.create_content_crew')
+    @patch.object(main.crew_flights, 'max_flights', 2)
+    def test_full_queue_returns_503(self, mock_create_content_crew):
+        """Test that new crew runs are refused once the queue is full, on every endpoint."""
+        self.crew_patch = mock_create_content_crew
+        release, threads = self.hold_crews(2)
+        responses = [
+            self.client.post("/create-content", json={"topic": "Another"}),
+            self.client.post("/create-content/stream", json={"topic": "Another"}),
+            self.client.post("/jobs", json={"topic": "Another"}),
+        ]
+        batch = parse_ndjson(self.client.post("/create-content/batch", json={"topics": ["Another"]}).text)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        
+        for response in responses:
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == str(int(main.CREW_RETRY_AFTER))
+        assert batch[0]["status"] == "failed"
+        assert batch[0]["retry_after"] == main.CREW_RETRY_AFTER
+        assert main.crew_flights.rejected == 4
+    
+    @patch('main.create_content_crew')
+    @patch.object(main.crew_flights, 'max_flights', 1)
+    def test_full_queue_still_admits_joiners_and_cache_hits(self, mock_create_content_crew):
+        """Test that requests that need no new crew run are not refused."""
+        self.crew_patch = mock_create_content_crew
+        main.get_content_cache().set("Cached", "Cached content")
+        release, threads = self.hold_crews(1)
+        cached = self.client.post("/create-content", json={"topic": "Cached"})
+        joiner = threading.Thread(target=self.client.post, args=("/create-content",),
+                                  kwargs={"json": {"topic": "busy 0"}})
+        joiner.start()
+        deadline = time.monotonic() + 5
+        while main.crew_flights.joined < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads + [joiner]:
+            thread.join(timeout=5)
+        
+        assert cached.status_code == 200
+        assert cached.json()["content"] == "Cached content"
+        assert main.crew_flights.joined == 1
+        assert main.crew_flights.rejected == 0
+    
+    @patch.object(main.crew_flights, 'max_flights', 1)
+    def test_queue_frees_up_after_runs_finish(self):
+        """Test that the queue bound counts runs in flight, not runs ever started."""
+        with patch('main.create_content_crew', side_effect=lambda topic: f"Content about {topic}"):
+            statuses = [self.client.post("/create-content", json={"topic": f"Topic {i}"}).status_code
+                            for i in range(3)]
+        
+        assert statuses == [200, 200, 200]
+
+
+def vary(response):
+    """The header names listed in a response's Vary header."""
+    return {name.strip() for name in response.headers.get("vary", "").split(",")}
+
+
+class TestResponseFormats:
+    """Test markdown responses and response compression."""
+    
+    def setup_method(self):
+        """Set up test client."""
+        self.client = TestClient(app)
+    
+    @patch('main.create_content_crew')
+    def test_markdown_response(self, mock_create_content_crew):
+        """Test that Accept: text/markdown returns the post without the JSON envelope."""
+        post = '# Title\n\nA "quoted" line.\n'
+        mock_create_content_crew.return_value = post
+        
+        response = self.client.post("/create-content", json={"topic": "AI"}, headers={"Accept": "text/markdown"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "text/markdown; charset=utf-8"
+        assert "Accept" in vary(response)
+        assert response.text == post
+    
+    @pytest.mark.parametrize("accept", [None, "application/json", "*/*", "application/json, text/markdown;q=0.5"])
+    @patch('main.create_content_crew')
+    def test_json_stays_the_default(self, mock_create_content_crew, accept):
+        """Test that clients not preferring markdown still get JSON."""
+        mock_create_content_crew.return_value = "Generated content"
+        headers = {"Accept": accept} if accept else {}
+        
+        response = self.client.post("/create-content", json={"topic": "AI"}, headers=headers)
+        
+        assert response.headers["content-type"] == "application/json"
+        assert "Accept" in vary(response)
+        assert response.json() == {"content": "Generated content"}
+    
+    @patch('main.create_content_crew')
+    def test_job_result_as_markdown(self, mock_create_content_crew):
+        """Test that a job's result can be fetched as markdown too."""
+        mock_create_content_crew.return_value = "# Job post"
+        job_id = self.client.post("/jobs", json={"topic": "AI"}).json()["job_id"]
+        wait_for_job(self.client, job_id)
+        
+        response = self.client.get(f"/jobs/{job_id}/result", headers={"Accept": "text/markdown"})
+        
+        assert response.headers["content-type"].startswith("text/markdown")
+        assert response.text == "# Job post"
+        as_json = self.client.get(f"/jobs/{job_id}/result")
+        assert as_json.json() == {"job_id": job_id, "content": "# Job post"}
+        assert "Accept" in vary(response) and "Accept" in vary(as_json)
+    
+    @pytest.mark.parametrize("encoding", ["gzip", pytest.param("br", marks=pytest.mark.skipif(
+        compression.brotli is None, reason="brotli is not installed"))])
+    @patch('main.create_content_crew')
+    def test_large_posts_are_compressed(self, mock_create_content_crew, encoding):
+        """Test that a large post is compressed with the encoding the client accepts."""
+        post = "# Post\n\n" + "Some paragraph about the topic.\n" * 200
+        mock_create_content_crew.return_value = post
+        
+        response = self.client.post("/create-content", json={"topic": "AI"}, headers={"Accept-Encoding": encoding})
+        
+        assert response.headers["content-encoding"] == encoding
+        assert response.headers["vary"] == "Accept, Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(post) / 4
+        assert response.json() == {"content": post}
+    
+    @patch('main.create_content_crew')
+    def test_small_and_identity_responses_are_not_compressed(self, mock_create_content_crew):
+        """Test that small bodies, and clients not accepting compression, get plain responses."""
+        mock_create_content_crew.return_value = "Short post " * 100
+        
+        small = self.client.get("/", headers={"Accept-Encoding": "gzip"})
+        identity = self.client.post("/create-content", json={"topic": "AI"}, headers={"Accept-Encoding": "identity"})
+        
+        assert "content-encoding" not in small.headers
+        assert small.json() == {"status": "ok"}
+        assert "content-encoding" not in identity.headers
+        assert identity.json() == {"content": "Short post " * 100}
+    
+    @patch('main.create_content_crew')
+    def test_streams(self, mock_create_content_crew):
+        """Test that NDJSON batches are compressed and Server-Sent Events are not."""
+        mock_create_content_crew.side_effect = lambda topic: f"Content about {topic}. " * 50
+        headers = {"Accept-Encoding": "gzip"}
+        
+        batch = self.client.post("/create-content/batch", json={"topics": ["A", "B"]}, headers=headers)
+        stream = self.client.post("/create-content/stream", json={"topic": "C"}, headers=headers)
+        
+        assert batch.headers["content-encoding"] == "gzip"
+        assert parse_ndjson(batch.text)[-1] == {"done": True, "succeeded": 2, "failed": 0}
+        assert "content-encoding" not in stream.headers
+        assert parse_sse(stream.text)[-1][0] == "done"
+
+
+class TestContentArchive:
+    """Test archiving, searching and reusing generated posts."""
+    
+    def setup_method(self):
+        """Set up test client."""
+        self.client = TestClient(app)
+    
+    @patch('main.create_content_crew')
+    def test_generated_posts_are_searchable(self, mock_create_content_crew):
+        """Test that every generated post can be found and fetched from the archive."""
+        mock_create_content_crew.side_effect = lambda topic, **kw: f"# {topic}\n\nA post about {topic.lower()}."
+        self.client.post("/create-content", json={"topic": "AI in Healthcare"})
+        self.client.post("/create-content", json={"topic": "Quantum Computing", "style": "Casual"})
+        
+        response = self.client.get("/archive/search", params={"q": "quantum"})
+        
+        assert response.status_code == 200
+        [hit] = response.json()["results"]
+        assert hit["topic"] == "Quantum Computing"
+        assert hit["style"] == "Casual"
+        assert "**quantum**" in hit["snippet"]
+        post = self.client.get(hit["url"]).json()
+        assert post["content"] == "# Quantum Computing\n\nA post about quantum computing."
+        markdown = self.client.get(hit["url"], headers={"Accept": "text/markdown"})
+        assert markdown.text == post["content"]
+        assert "Accept" in vary(markdown)
+    
+    def test_archive_validation(self):
+        """Test unknown posts and invalid searches."""
+        assert self.client.get("/archive/12345").status_code == 404
+        assert self.client.get("/archive/search").status_code == 422
+        assert self.client.get("/archive/search", params={"q": "ai", "limit": 0}).status_code == 422
+        assert self.client.get("/archive/search", params={"q": "(("}).json()["results"] == []
+    
+    @patch('main.CONTENT_ARCHIVE_REUSE_MAX_AGE', 30 * 86400)
+    @patch('main.create_content_crew')
+    def test_archived_post_is_reused_after_the_cache_forgets_it(self, mock_create_content_crew):
+        """Test that the archive answers a repeat topic once the content cache no longer has it."""
+        mock_create_content_crew.return_value = "Generated content"
+        self.client.post("/create-content", json={"topic": "AI in Healthcare"})
+        main.close_content_cache()
+        
+        response = self.client.post("/create-content", json={"topic": "healthcare AI"})
+        
+        assert response.json() == {"content": "Generated content"}
+        mock_create_content_crew.assert_called_once()
+        stats = self.client.get("/cache/stats").json()["archive"]
+        assert stats["posts"] == 1
+        assert stats["reused"] == 1
+        assert metric_value(self.client.get("/metrics").text, "content_archive_reused_total") == 1
+    
+    @patch('main.create_content_crew')
+    def test_reuse_is_off_by_default(self, mock_create_content_crew):
+        """Test that without CONTENT_ARCHIVE_REUSE_MAX_AGE the crew runs for every uncached topic."""
+        mock_create_content_crew.return_value = "Generated content"
+        self.client.post("/create-content", json={"topic": "AI in Healthcare"})
+        main.close_content_cache()
+        
+        self.client.post("/create-content", json={"topic": "AI in Healthcare"})
+        
+        assert mock_create_content_crew.call_count == 2
+        assert self.client.get("/cache/stats").json()["archive"]["posts"] == 2
+    
+    @patch('main.CONTENT_ARCHIVE_REUSE_MAX_AGE', 30 * 86400)
+    @patch('main.create_content_crew')
+    def test_zero_cache_ttl_turns_reuse_off(self, mock_create_content_crew):
+        """Test that CONTENT_CACHE_TTL=0 is not undone by the archive."""
+        mock_create_content_crew.return_value = "Generated content"
+        with patch.dict(os.environ, {"CONTENT_CACHE_TTL": "0"}):
+            main.close_content_cache()
+            self.client.post("/create-content", json={"topic": "AI in Healthcare"})
+            self.client.post("/create-content", json={"topic": "AI in Healthcare"})
+        
+        assert mock_create_content_crew.call_count == 2
+    
+    def test_in_memory_archive_is_capped(self):
+        """Test that the in-memory archive keeps only the newest posts, 1000 by default."""
+        with patch.dict(os.environ):
+            os.environ.pop("CONTENT_ARCHIVE_PATH", None)
+            os.environ.pop("CONTENT_ARCHIVE_MAX_POSTS", None)
+            main.close_content_archive()
+            assert main.get_content_archive().max_posts == 1000
+            main.close_content_archive()
+            os.environ["CONTENT_ARCHIVE_MAX_POSTS"] = "2"
+            archive = main.get_content_archive()
+        for i in range(3):
+            archive.add(f"Topic {i}", "Post.")
+        
+        assert archive.stats()["posts"] == 2
+        assert {hit.topic for hit in archive.search("topic")} == {"Topic 1", "Topic 2"}
+    
+    @patch('main.create_content_crew')
+    def test_archive_failure_still_returns_the_post(self, mock_create_content_crew):
+        """Test that a post is returned even if it cannot be archived."""
+        mock_create_content_crew.return_value = "Generated content"
+        with patch.object(main.get_content_archive(), 'add', side_effect=RuntimeError("disk full")):
+            response = self.client.post("/create-content", json={"topic": "AI"})
+        
+        assert response.json() == {"content": "Generated content"}
+
+
+class TestSharedResources:
+    """Test the lazily opened resources shared by the event loop and worker threads."""
+    
+    @pytest.mark.parametrize("opener, getter, closer", [
+        ("open_content_cache", "get_content_cache", "close_content_cache"),
+        ("open_job_store", "get_job_store", "close_job_store"),
+        ("ThreadPoolExecutor", "get_crew_executor", "shutdown_crew_executor"),
+        ("ContentArchive", "get_content_archive", "close_content_archive"),
+    ])
+    def test_concurrent_first_use_opens_once(self, opener, getter, closer):
+        """Test that threads racing to open a resource all get the same one."""
+        getattr(main, closer)()
+        original = getattr(main, opener)
+        opened = []
+        
+        def slow_open(*args, **kwargs):
+            time.sleep(0.05)
+            opened.append(original(*args, **kwargs))
+            return opened[-1]
+        
+        start = threading.Barrier(8)
+        results = []
+        
+        def first_use():
+            start.wait()
+            results.append(getattr(main, getter)())
+        
+        with patch.object(main, opener, side_effect=slow_open):
+            threads = [threading.Thread(target=first_use) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=5)
+        getattr(main, closer)()
+        
+        assert len(opened) == 1
+        assert len(results) == 8 and all(result is opened[0] for result in results)
+
+
 class TestAgentFunction:
     """Test the agent.py functions."""
     
+    @patch('agent.Task')
     @patch('agent.Crew')
     @patch('agent.Agent')
-    def test_create_content_crew_success(self, mock_agent_class, mock_crew_class):
+    def test_create_content_crew_success(self, mock_agent_class, mock_crew_class, mock_task_class):
         """Test successful crew creation and execution."""
         # Mock the crew instance
         mock_crew_instance = Mock()
@@ -138,9 +1185,10 @@ class TestAgentFunction:
         assert result == "Generated blog post content"
         mock_crew_instance.kickoff.assert_called_once()
     
+    @patch('agent.Task')
     @patch('agent.Crew')
     @patch('agent.Agent')
-    def test_create_content_crew_exception(self, mock_agent_class, mock_crew_class):
+    def test_create_content_crew_exception(self, mock_agent_class, mock_crew_class, mock_task_class):
         """Test crew creation with exception."""
         # Mock the crew instance to raise an exception
         mock_crew_instance = Mock()
@@ -173,9 +1221,10 @@ class TestAgentFunction:
 class TestIntegration:
     """Integration tests for the complete workflow."""
     
+    @patch('agent.Task')
     @patch('agent.Crew')
     @patch('agent.Agent')
-    def test_full_workflow_success(self, mock_agent_class, mock_crew_class):
+    def test_full_workflow_success(self, mock_agent_class, mock_crew_class, mock_task_class):
         """Test the complete workflow from API to agent execution."""
         # Mock the crew instance
         mock_crew_instance = Mock()
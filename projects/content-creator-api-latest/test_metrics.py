@@ -0,0 +1,98 @@
+"""
+Unit tests for the metrics in metrics.py.
+"""
+
+import pytest
+import os
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import Counter, Gauge, Histogram, Registry
+
+
+@pytest.fixture
+def registry():
+    """Provide an empty registry, so tests do not see the app's metrics."""
+    return Registry()
+
+
+class TestMetricTypes:
+    """Test counters, gauges and histograms."""
+
+    def test_counter(self, registry):
+        """Test that a counter adds up and refuses to go down."""
+        counter = Counter("jobs_total", "Jobs.", registry=registry)
+        counter.inc()
+        counter.inc(2)
+        with pytest.raises(ValueError):
+            counter.inc(-1)
+        assert "jobs_total 3" in registry.render().splitlines()
+
+    def test_unlabelled_metric_starts_at_zero(self, registry):
+        """Test that a metric without labels is reported before its first update."""
+        Gauge("queue_depth", "Queue depth.", registry=registry)
+        assert "queue_depth 0" in registry.render().splitlines()
+
+    def test_labels(self, registry):
+        """Test that each set of label values is its own series."""
+        counter = Counter("requests_total", "Requests.", ["method", "status"], registry=registry)
+        counter.labels(method="GET", status=200).inc()
+        counter.labels(method="GET", status=200).inc()
+        counter.labels(method="POST", status=500).inc()
+        lines = registry.render().splitlines()
+        assert 'requests_total{method="GET",status="200"} 2' in lines
+        assert 'requests_total{method="POST",status="500"} 1' in lines
+        with pytest.raises(ValueError):
+            counter.labels(method="GET")
+        with pytest.raises(ValueError):
+            counter.inc()
+
+    def test_gauge_function(self, registry):
+        """Test that a gauge can read its value when rendered."""
+        depth = [3]
+        Gauge("queue_depth", "Queue depth.", function=lambda: depth[0], registry=registry)
+        assert "queue_depth 3" in registry.render().splitlines()
+        depth[0] = 5
+        assert "queue_depth 5" in registry.render().splitlines()
+        with pytest.raises(ValueError):
+            Gauge("labelled", "Labelled.", ["a"], function=lambda: 1, registry=registry)
+
+    def test_histogram_buckets_are_cumulative(self, registry):
+        """Test that histogram buckets count every observation up to their bound."""
+        histogram = Histogram("duration_seconds", "Durations.", buckets=(1, 5), registry=registry)
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+        lines = registry.render().splitlines()
+        assert 'duration_seconds_bucket{le="1"} 2' in lines
+        assert 'duration_seconds_bucket{le="5"} 3' in lines
+        assert 'duration_seconds_bucket{le="+Inf"} 4' in lines
+        assert "duration_seconds_sum 14.5" in lines
+        assert "duration_seconds_count 4" in lines
+
+
+class TestRegistry:
+    """Test rendering and registration."""
+
+    def test_render_has_help_and_type(self, registry):
+        """Test that each metric is introduced by its HELP and TYPE lines."""
+        Counter("jobs_total", "Jobs submitted.", registry=registry)
+        Histogram("duration_seconds", "Durations.", ["stage"], registry=registry)
+        lines = registry.render().splitlines()
+        assert lines[:2] == ["# HELP jobs_total Jobs submitted.", "# TYPE jobs_total counter"]
+        assert "# TYPE duration_seconds histogram" in lines
+
+    def test_label_values_are_escaped(self, registry):
+        """Test that quotes, backslashes and newlines in label values are escaped."""
+        counter = Counter("topics_total", "Topics.", ["topic"], registry=registry)
+        counter.labels(topic='say "hi"\\\n').inc()
+        assert 'topics_total{topic="say \\"hi\\"\\\\\\n"} 1' in registry.render().splitlines()
+
+    def test_registering_a_name_again_replaces_it(self, registry):
+        """Test that re-creating a metric (e.g. on module reload) replaces the old one."""
+        Counter("jobs_total", "Jobs.", registry=registry).inc(5)
+        Counter("jobs_total", "Jobs.", registry=registry)
+        lines = registry.render().splitlines()
+        assert "jobs_total 0" in lines
+        assert lines.count("# TYPE jobs_total counter") == 1